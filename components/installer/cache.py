@@ -0,0 +1,70 @@
+import json
+import sys
+from collections import OrderedDict
+from helpers.utils import normalize_name
+from .utils import format_pypi_tooltip_html
+
+
+class CachedDetails:
+    """Details of one package, as fetched, along with its rendered tooltip"""
+
+    __slots__ = ("data", "tooltip", "version", "size")
+
+    def __init__(self, data: dict, tooltip: str):
+        self.data = data
+        self.tooltip = tooltip
+        self.version = data.get("info", {}).get("version", "")
+        # Rough footprint, good enough to keep the cache within its budget
+        self.size = (
+            sys.getsizeof(tooltip)
+            + len(json.dumps(data, ensure_ascii=False, default=str))
+        )
+
+
+class DetailsCache:
+    """
+    An in-memory LRU of package details and their tooltip HTML, keyed by the
+    PEP 503 normalized name.
+
+    Rows of a recurring query are filled straight from here, without asking
+    the fetcher and without formatting their tooltip again. Least recently
+    used entries are evicted once the cache grows past `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, font_family: str = "figtree"):
+        self.max_bytes = max_bytes
+        self.font_family = font_family
+        self.size = 0
+        self._entries: OrderedDict[str, CachedDetails] = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name: str):
+        return normalize_name(name) in self._entries
+
+    def get(self, name: str) -> CachedDetails | None:
+        key = normalize_name(name)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, name: str, data: dict) -> CachedDetails:
+        """Renders the tooltip of `data`, caches both and returns the entry"""
+        key = normalize_name(name)
+        entry = CachedDetails(data, format_pypi_tooltip_html(data, self.font_family))
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous.size
+        self._entries[key] = entry
+        self.size += entry.size
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= evicted.size
+        return entry
+
+    def discard(self, name: str):
+        entry = self._entries.pop(normalize_name(name), None)
+        if entry is not None:
+            self.size -= entry.size
@@ -1,12 +1,29 @@
 import sys
-from PyQt6.QtCore import QModelIndex, QTimer, pyqtSignal
-from PyQt6.QtWidgets import QLineEdit, QListView, QSizePolicy, QVBoxLayout, QWidget
+from PyQt6.QtCore import QModelIndex, QPoint, Qt, QTimer, pyqtSignal
+from PyQt6.QtWidgets import (
+    QLineEdit,
+    QListView,
+    QMenu,
+    QMessageBox,
+    QSizePolicy,
+    QVBoxLayout,
+    QWidget,
+)
 
 # Imports from our new package structure
-from .threads import GettingInstallerLibraryDetails, InstallerLibraries, PyPiRunner
+from .threads import PyPiRunner, SearchRunner
+from .scheduler import InstallScheduler
+from .preview import PreviewRunner, format_resolution
+from .prefetch import HOVERED, SELECTED, TOP_RESULT, WheelPrefetcher
+from .fetcher import DetailsFetcher
+from .viewport import ViewportTracker
 from .models import LibraryListModel
 from .models import DataRole
 from .delegates import PyPIitemDelegate
+from .search import SearchIndex
+from .cache import DetailsCache
+from .store import NameStore
+from helpers.pip_runner import PipEvent
 from helpers.utils import resource_path
 
 
@@ -23,11 +40,8 @@ class Installer(QWidget):
     def __init__(self, parent=None, config: dict = {}):
         super().__init__(parent)
         self.config = config
-        self.installer_thread = None
         self.indexes_which_are_installed = []
-        self.sorted_matches = []
-        self.sorted_match_with_install = []
-        self.all_libraries = []
+        self.search_index = SearchIndex([])
         self.python_exec = ""
         self.setStyleSheet(self.config.get("stylesheet", {}).get("tooltip", ""))
         self.API_ENDPOINT: str = (
@@ -41,7 +55,6 @@ class Installer(QWidget):
         # Setup timers and signals for fetching list of libraries
         self._setup_timers()
         self._setup_signals_for_fetching_libraries()
-        self.get_details = None
 
     def _setup_ui(self):
         # Initialize the main layout
@@ -64,9 +77,8 @@ class Installer(QWidget):
         )
         self.search_bar.setObjectName("searchBarInstaller")
         self.search_bar.setPlaceholderText("Search for libraries to install...")
-        self.search_bar.textChanged.connect(
-            self._filter_list
-        )  # ADDED: Connect search bar to filter method
+        # Searching waits for the typing to settle, see search_timer
+        self.search_bar.textChanged.connect(lambda: self.search_timer.start())
         self.main_layout.addWidget(self.search_bar)
 
     def _setup_list_model(self):
@@ -83,7 +95,12 @@ class Installer(QWidget):
         self.library_list_view.setUniformItemSizes(False)
 
         # List Model which holds the data for the library list view
-        self.source_model = LibraryListModel()
+        self.details_cache = DetailsCache(
+            self.config.get("controls", {})
+            .get("installer", {})
+            .get("detailsCacheSize", 8 * 1024 * 1024)
+        )
+        self.source_model = LibraryListModel(cache=self.details_cache)
         self.library_list_view.setModel(self.source_model)
         self.delegate = PyPIitemDelegate(self.config, self.library_list_view)
         self.library_list_view.setItemDelegate(self.delegate)
@@ -91,129 +108,230 @@ class Installer(QWidget):
 
     def _setup_timers(self):
         # Search Timer
-        self.scraper_pypi = PyPiRunner()
+        self.scraper_pypi = PyPiRunner(
+            indexUrl=self.config.get("api", {})
+            .get("pypi", {})
+            .get("packageList", "https://pypi.org/simple/")
+        )
+        self.search_runner = SearchRunner(self)
+        self.search_runner.results.connect(self._show_matches)
+        self.search_runner.more_results.connect(self._append_matches)
         self.search_timer = QTimer()
-        self.search_timer.setInterval(300)
+        self.search_timer.setInterval(
+            self.config.get("controls", {})
+            .get("installer", {})
+            .get("searchDebounce", 150)
+        )
         self.search_timer.setSingleShot(True)
         self.search_timer.timeout.connect(self._filter_list)
 
-        self.fetch_details_timer = QTimer()
-        self.fetch_details_timer.setInterval(1000)
-        self.fetch_details_timer.setSingleShot(True)
-        self.fetch_details_timer.timeout.connect(self._fetch_details)
-
     def set_status(self, libraries_list: list):
-        for library in self.sorted_matches:
-            if library in libraries_list:
-                try:
-                    index = self.sorted_matches.index(library)
-                    self.sorted_match_with_install[index].update(
-                        {"status": "installed"}
-                    )
-                    index_of_model = self.source_model.name_to_row.get(library, -1)
-                    if index_of_model != -1:
-                        idx = self.source_model.index(index_of_model)
-                        self.source_model.dataChanged.emit(idx, idx)
-                except ValueError:
-                    continue
-            else:
-                index = self.sorted_matches.index(library)
-                if index == -1:
-                    continue
-                self.sorted_match_with_install[index].update({"status": "install"})
-                index_of_model = self.source_model.name_to_row.get(library, -1)
-                if index_of_model != -1:
-                    idx = self.source_model.index(index_of_model)
-                    self.source_model.dataChanged.emit(idx, idx)
-
-    def _fetch_details(self):
-        # Fetch details of libraries
-        if self.sorted_matches:
-            # for the specific platfrom
-            platform = sys.platform
-            fetcher_config = (
-                self.config.get("paths", {})
-                .get("executables", {})
-                .get("pypiDetailFetcher", {})
+        installed = set(libraries_list)
+        self.source_model.updateRows(
+            {
+                library: {"status": "installed" if library in installed else "install"}
+                for library in self.source_model.name_to_row
+            }
+        )
+
+    def _setup_details_fetcher(self):
+        # for the specific platfrom
+        platform = sys.platform
+        fetcher_config = (
+            self.config.get("paths", {})
+            .get("executables", {})
+            .get("pypiDetailFetcher", {})
+        )
+        if platform == "win32":
+            executable_name = fetcher_config.get(platform, "./pypi_detail_fetcher.exe")
+        else:
+            executable_name = fetcher_config.get(platform, "./pypi_detail_fetcher")
+        # One fetcher process serves every search, rows are filled as details arrive
+        self.details_fetcher = DetailsFetcher(
+            resource_path(executable_name), self.API_ENDPOINT, self
+        )
+        self.details_fetcher.details.connect(self.source_model.updateData)
+        self.details_fetcher.start()
+        # Details are requested only for the rows on screen and around them
+        self.viewport_tracker = ViewportTracker(
+            self.library_list_view,
+            self.details_fetcher,
+            margin=self.config.get("controls", {})
+            .get("installer", {})
+            .get("detailsPrefetch", 20),
+        )
+
+    def _show_install_status(self, name_of_library: str, status: str):
+        self.source_model.updateRows(
+            {name_of_library: {"status": status, "phase": ""}}
+        )
+
+    def _show_install_progress(self, name_of_library: str, event: PipEvent):
+        if event.finished:
+            return
+        self.source_model.updateRows({name_of_library: {"phase": event.label()}})
+
+    def _prefetch(self, model_index: QModelIndex, priority: int):
+        item_data = model_index.data(DataRole) if model_index.isValid() else None
+        if item_data and item_data.get("status", "install") == "install":
+            self.prefetcher.prefetch(self.python_exec, item_data["name"], priority)
+
+    def _show_context_menu(self, position: QPoint):
+        model_index = self.library_list_view.indexAt(position)
+        item_data = model_index.data(DataRole) if model_index.isValid() else None
+        if not item_data or item_data.get("status", "install") != "install":
+            return
+        menu = QMenu(self.library_list_view)
+        preview_action = menu.addAction("Preview install")
+        install_action = menu.addAction("Install")
+        chosen = menu.exec(self.library_list_view.viewport().mapToGlobal(position))
+        if chosen == preview_action:
+            self._preview_library(item_data["name"])
+        elif chosen == install_action:
+            self._install_library(model_index)
+
+    def _preview_library(self, name_of_library: str):
+        if not self.python_exec:
+            return
+        self.source_model.updateRows({name_of_library: {"phase": "Resolving"}})
+        self.preview_runner.preview(self.python_exec, name_of_library)
+
+    def _show_preview(self, python_exec: str, name_of_library: str, resolved: list):
+        self.source_model.updateRows({name_of_library: {"phase": ""}})
+        if python_exec != self.python_exec:
+            return  # Resolved for an interpreter which isn't selected anymore
+        if not resolved:
+            QMessageBox.information(
+                self, "Preview install", f"{name_of_library} is already installed"
             )
-            if platform == "win32":
-                executable_name = fetcher_config.get(
-                    platform, "./pypi_detail_fetcher.exe"
-                )
-            else:
-                executable_name = fetcher_config.get(platform, "./pypi_detail_fetcher")
-            self.get_details = GettingInstallerLibraryDetails(
-                resource_path(executable_name),
-                self.sorted_matches,
+            return
+        reply = QMessageBox.question(
+            self,
+            "Preview install",
+            f"Installing {name_of_library} installs:\n\n{format_resolution(resolved)}",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.No,
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            # The previewed resolution gets installed as it is, pip doesn't resolve again
+            self.install_scheduler.queue(
+                python_exec,
+                name_of_library,
+                [f"{package['name']}=={package['version']}" for package in resolved],
             )
-            self.get_details.finished.connect(self.source_model.updateData)
-            self.get_details.start()
 
-    def _show_installed_flag(self, return_code, model_index: QModelIndex):
-        name_of_library = model_index.data(DataRole).get("name")
-        self.installed.emit()
-        idx = self.sorted_matches.index(name_of_library)
-        if return_code == -1:
-            self.sorted_match_with_install[idx].update({"status": "failed"})
-            self.source_model.dataChanged.emit(model_index, model_index)
-        else:
-            self.sorted_match_with_install[idx].update({"status": "installed"})
-            self.source_model.dataChanged.emit(model_index, model_index)
-        self.installer_thread = None
+    def _show_preview_error(self, name_of_library: str, error: str):
+        self.source_model.updateRows({name_of_library: {"phase": ""}})
+        QMessageBox.warning(
+            self, "Preview install", f"Failed to resolve {name_of_library}:\n\n{error}"
+        )
 
     def _install_library(self, model_index: QModelIndex):
         name_of_library = model_index.data(DataRole).get("name")
-        idx = self.sorted_matches.index(name_of_library)
-        self.sorted_match_with_install[idx].update({"status": "installing"})
-        self.source_model.dataChanged.emit(model_index, model_index)
-        self.installer_thread = InstallerLibraries(
-            self.python_exec, name_of_library, model_index
-        )
-        self.installer_thread.finished.connect(self._show_installed_flag)
-        self.installer_thread.finished.connect(self.installer_thread.quit)
-        self.installer_thread.start()
+        self.install_scheduler.queue(self.python_exec, name_of_library)
 
     def _setup_signals_for_fetching_libraries(self):
         # Threading setup, fetching details of libraries will be in different function
+        self._setup_details_fetcher()
         self.source_model.remove_item.connect(self._remove_garbage_data)
-        self.scraper_pypi.list_of_libraries.connect(self._get_all_libraries)
+        self.source_model.more_requested.connect(self.search_runner.fetch_more)
+        self.scraper_pypi.search_index.connect(self._get_all_libraries)
         self.scraper_pypi.startFetching()
         self.delegate.install_clicked.connect(self._install_library)
+        # Wheels of the packages the user is looking at are downloaded ahead of the click
+        prefetch_config = (
+            self.config.get("controls", {}).get("installer", {}).get("prefetch", {})
+        )
+        self.prefetcher = WheelPrefetcher(
+            concurrency=prefetch_config.get("concurrency", 2),
+            bytes_per_minute=prefetch_config.get("bytesPerMinute", 50 * 1024 * 1024),
+            max_bytes=prefetch_config.get("wheelhouseSize", 512 * 1024 * 1024),
+            parent=self,
+        )
+        self.prefetch_top_results = prefetch_config.get("topResults", 3)
+        self.delegate.row_hovered.connect(
+            lambda index: self._prefetch(index, HOVERED)
+        )
+        self.library_list_view.selectionModel().currentChanged.connect(
+            lambda current, _: self._prefetch(current, SELECTED)
+        )
+
+        # Clicks close together get installed by one pip run
+        self.install_scheduler = InstallScheduler(
+            self.config.get("controls", {})
+            .get("installer", {})
+            .get("installBatchWindow", 400),
+            self.prefetcher.pip_args,
+            self,
+        )
+        self.install_scheduler.status_changed.connect(self._show_install_status)
+        self.install_scheduler.progress.connect(self._show_install_progress)
+        self.install_scheduler.transaction_finished.connect(
+            lambda _: self.installed.emit()
+        )
+
+        # Dry runs showing what an install would pull in, from the context menu
+        self.preview_runner = PreviewRunner(
+            self.config.get("controls", {})
+            .get("installer", {})
+            .get("previewCacheTTL", 3600),
+            self.prefetcher.pip_args,
+            self,
+        )
+        self.preview_runner.resolved.connect(self._show_preview)
+        self.preview_runner.failed.connect(self._show_preview_error)
+        self.library_list_view.setContextMenuPolicy(
+            Qt.ContextMenuPolicy.CustomContextMenu
+        )
+        self.library_list_view.customContextMenuRequested.connect(
+            self._show_context_menu
+        )
+
+    def save_library_list(self):
+        """Rewrites the stored name list, only when names were removed from it"""
+        if self.scraper_pypi.running:
+            # The sync thread may still be writing the store, removals are dropped
+            # rather than racing it
+            return
+        names = self.search_index.names
+        removed = self.search_index.removed_ids
+        if removed and isinstance(names, NameStore):
+            names.rewrite(removed)
+            removed.clear()
 
     def _remove_garbage_data(self, item):
-        self.all_libraries.remove(item)
-        self._filter_list()
+        # The row is already gone from the model, only later searches need to skip it
+        self.search_runner.remove(item)
 
-    def _get_all_libraries(self, libraries: list):
-        self.all_libraries = libraries
+    def _get_all_libraries(self, search_index: SearchIndex):
+        # The synced index replaces the local one, the search worker carries the
+        # names removed since over, so `removed_ids` is only read once it quit
+        self.search_index = search_index
+        self.search_runner.set_index(search_index)
         self.search_bar.setPlaceholderText(
             "Search for libraries to install from the {:,} available libraries".format(
-                len(self.all_libraries)
+                len(self.search_index)
             )
         )
         self._filter_list()
 
     def _filter_list(self):
-        search_text = self.search_bar.text().lower()
-        if not search_text:
-            self.sorted_matches = self.all_libraries[:50]
-            self.sorted_match_with_install = [
-                {"name": name, "status": "install"} for name in self.sorted_matches
-            ]
-        else:
-            matches = [
-                item for item in self.all_libraries if search_text in item.lower()
-            ]
-            self.sorted_matches = sorted(
-                matches, key=lambda item: item.lower().find(search_text)
-            )
-            self.sorted_matches = self.sorted_matches[:50]
-            self.sorted_match_with_install = [
-                {"name": name, "status": "install"} for name in self.sorted_matches
-            ]
+        # Searching happens in the search worker, results come back in _show_matches
+        self.search_timer.stop()
+        self.search_runner.search(self.search_bar.text())
 
-        self.population_finished.emit()
-        self.fetch_details_timer.start(1000)
+    def _show_matches(self, generation: int, matches: list, has_more: bool):
         self.library_list_view.scrollToTop()
-        self.source_model.setDataList(self.sorted_match_with_install)
-        self.source_model.set_name_to_row()
+        self.source_model.setDataList(
+            [{"name": name, "status": "install"} for name in matches], has_more
+        )
+        self.population_finished.emit()
+        if self.search_bar.text().strip():
+            for row in range(min(self.prefetch_top_results, len(matches))):
+                self._prefetch(self.source_model.index(row, 0), TOP_RESULT)
+
+    def _append_matches(self, generation: int, matches: list, has_more: bool):
+        self.source_model.appendData(
+            [{"name": name, "status": "install"} for name in matches], has_more
+        )
+        self.population_finished.emit()
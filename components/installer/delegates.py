@@ -1,10 +1,37 @@
-from PyQt6.QtCore import QEvent, QModelIndex, QPoint, QRect, QSize, Qt, pyqtSignal
-from PyQt6.QtGui import QColor, QPainter, QPainterPath, QPixmap
+import logging
+import time
+from PyQt6.QtCore import (
+    QEvent,
+    QMargins,
+    QModelIndex,
+    QPoint,
+    QRect,
+    QSize,
+    Qt,
+    QTimer,
+    pyqtSignal,
+)
+from PyQt6.QtGui import (
+    QBitmap,
+    QColor,
+    QFont,
+    QFontMetrics,
+    QPainter,
+    QPainterPath,
+    QPixmap,
+)
 from PyQt6.QtWidgets import QStyle, QStyledItemDelegate
 from ..widgets.tooltip import InteractiveToolTip
 from .models import DataRole
 from helpers.utils import resource_path
 
+logger = logging.getLogger(__name__)
+
+# Space around the install icon, filled with the hover background
+ICON_MARGIN = 5
+# Elided strings kept before the cache starts over
+MAX_ELIDED = 4096
+
 
 class PyPIitemDelegate(QStyledItemDelegate):
     """
@@ -16,11 +43,19 @@ class PyPIitemDelegate(QStyledItemDelegate):
     effects, show detailed tooltips with package information, and detect clicks
     on the install icon to trigger an installation process.
 
+    Painting reuses what it rendered before: status icons are decoded once,
+    tinted pixmaps are cached by (status, hover, size, device pixel ratio) and
+    elided texts by (text, width, font). The mouse position comes from the
+    move events of editorEvent instead of querying the cursor for every row.
+    With debug logging on, the time spent painting every frame is logged.
+
     Signals:
         install_clicked (QModelIndex): Emitted when the user clicks the install icon for an item.
+        row_hovered (QModelIndex): Emitted when the mouse moves onto another item.
     """
 
     install_clicked = pyqtSignal(QModelIndex)
+    row_hovered = pyqtSignal(QModelIndex)
 
     def __init__(self, config: dict, parent=None):
         super().__init__(parent)
@@ -59,15 +94,93 @@ class PyPIitemDelegate(QStyledItemDelegate):
             .get("primaryHover", QColor(0, 128, 255))
         )
         self.padding = 10
-        self._hovered_index = None
         self.rounded_corner_radius = (
             self.config.get("ui", {})
             .get("window", {})
             .get("installer", {})
             .get("roundedCornerRadius", 8)
         )
+        self._mouse_pos = QPoint(-1, -1)
+        # Row and whether the mouse is over its install icon, repainted when it flips
+        self._install_hover = (-1, False)
+        self._icon_masks = {}
+        self._icon_cache: dict[tuple, QPixmap] = {}
+        self._elided_cache: dict[tuple, str] = {}
+        self._frame_rows = 0
+        self._frame_start = 0.0
+
+    def _icon_mask(self, status: str):
+        """Mask of the icon of `status`, read from disk only the first time"""
+        mask = self._icon_masks.get(status)
+        if mask is None:
+            pixmap = QPixmap(
+                resource_path(
+                    self.config.get("paths", {})
+                    .get("assets", {})
+                    .get("images", {})
+                    .get(status, "")
+                )
+            )
+            mask = pixmap.createMaskFromColor(QColor(Qt.GlobalColor.transparent))
+            self._icon_masks[status] = mask
+        return mask
+
+    def _icon_pixmap(self, status: str, hovering: bool, size: QSize, dpr: float):
+        """Tinted icon of `status`, with its margin, rendered once per key"""
+        key = (status, hovering, size.width(), size.height(), dpr)
+        pixmap = self._icon_cache.get(key)
+        if pixmap is None:
+            full_size = size.grownBy(
+                QMargins(ICON_MARGIN, ICON_MARGIN, ICON_MARGIN, ICON_MARGIN)
+            )
+            pixmap = QPixmap(full_size * dpr)
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            icon_painter = QPainter(pixmap)
+            self._draw_coloured_pixmap(
+                icon_painter,
+                QRect(QPoint(ICON_MARGIN, ICON_MARGIN), size),
+                self._icon_mask(status),
+                self.button_color,
+                "#929292" if hovering else "",
+            )
+            icon_painter.end()
+            self._icon_cache[key] = pixmap
+        return pixmap
+
+    def _elided(self, text: str, font: QFont, width: int) -> str:
+        key = (text, width, font.key())
+        elided = self._elided_cache.get(key)
+        if elided is None:
+            if len(self._elided_cache) >= MAX_ELIDED:
+                self._elided_cache.clear()
+            elided = QFontMetrics(font).elidedText(
+                text, Qt.TextElideMode.ElideRight, width
+            )
+            self._elided_cache[key] = elided
+        return elided
+
+    def _count_painted_row(self):
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        if self._frame_rows == 0:
+            self._frame_start = time.perf_counter()
+            # Runs once the paint event of this frame is done
+            QTimer.singleShot(0, self._log_frame)
+        self._frame_rows += 1
+
+    def _log_frame(self):
+        elapsed = (time.perf_counter() - self._frame_start) * 1000
+        logger.debug(
+            "Painted %d installer rows in %.2f ms (%.3f ms per row)",
+            self._frame_rows,
+            elapsed,
+            elapsed / self._frame_rows,
+        )
+        self._frame_rows = 0
 
     def paint(self, painter: QPainter, option, index):  # type: ignore
+        self._count_painted_row()
         # Let the base class handle background colors for selection, hover, etc.
         painter.save()
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
@@ -81,14 +194,6 @@ class PyPIitemDelegate(QStyledItemDelegate):
         if option.state & QStyle.StateFlag.State_MouseOver:
             # painter.fillRect(rect, self.color_hover)
             painter.fillPath(path, self.color_hover)
-            if self._hovered_index != index:
-                self._hovered_index = index
-
-                if option.widget:
-                    option.widget.update()
-        else:
-            if self._hovered_index == index:
-                self._hovered_index = None
 
         item_data = index.data(DataRole)
         if not item_data:
@@ -97,17 +202,10 @@ class PyPIitemDelegate(QStyledItemDelegate):
 
         # Item layout
         padding = 15
-        padding_for_button = 15
-        button_width = 20
         version_height = 20
         name_height = 20
 
-        install_rect = QRect(
-            rect.right() - button_width - padding_for_button,
-            rect.top() + padding_for_button,
-            button_width,
-            button_width,
-        )
+        install_rect = self._install_rect(rect)
         version_rect = QRect(
             rect.center().x(),
             rect.top() + padding,
@@ -126,12 +224,15 @@ class PyPIitemDelegate(QStyledItemDelegate):
         painter.setFont(font)
 
         version_text = item_data.get("version", "...")
+        if item_data.get("phase"):
+            # What pip is doing for this library, in place of its version
+            version_text = item_data["phase"]
         # painter.setPen(self.color_muted)
         painter.setPen(self.color_muted)
         painter.drawText(
             version_rect,
             Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
-            version_text,
+            self._elided(version_text, font, version_rect.width()),
         )
 
         painter.setFont(old_font)
@@ -140,90 +241,26 @@ class PyPIitemDelegate(QStyledItemDelegate):
         painter.drawText(
             name_rect,
             Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
-            library_name,
+            self._elided(library_name, old_font, name_rect.width()),
         )
         painter.restore()
 
         status_install = item_data.get("status", "install")
-        mouse_pos = (
-            option.widget.mapFromGlobal(option.widget.cursor().pos())
-            if option.widget
-            else QPoint(-1, -1)
+        if status_install not in ("install", "installed", "installing", "failed"):
+            return
+        is_hovering_install = bool(
+            option.state & QStyle.StateFlag.State_MouseOver
+        ) and install_rect.contains(self._mouse_pos)
+        device = painter.device()
+        pixmap = self._icon_pixmap(
+            status_install,
+            status_install == "install" and is_hovering_install,
+            install_rect.size(),
+            device.devicePixelRatioF() if device else 1.0,
+        )
+        painter.drawPixmap(
+            install_rect.topLeft() - QPoint(ICON_MARGIN, ICON_MARGIN), pixmap
         )
-        is_hovering_install = install_rect.contains(mouse_pos)
-
-        if status_install == "install":
-            if is_hovering_install:
-                self._draw_coloured_pixmap(
-                    painter,
-                    install_rect,
-                    QPixmap(
-                        resource_path(
-                            self.config.get("paths", {})
-                            .get("assets", {})
-                            .get("images", {})
-                            .get("install", "")
-                        )
-                    ),
-                    self.button_color,
-                    "#929292",
-                )
-            else:
-                self._draw_coloured_pixmap(
-                    painter,
-                    install_rect,
-                    QPixmap(
-                        resource_path(
-                            self.config.get("paths", {})
-                            .get("assets", {})
-                            .get("images", {})
-                            .get("install", "")
-                        )
-                    ),
-                    self.button_color,
-                )
-        elif status_install == "installed":
-            self._draw_coloured_pixmap(
-                painter,
-                install_rect,
-                QPixmap(
-                    resource_path(
-                        self.config.get("paths", {})
-                        .get("assets", {})
-                        .get("images", {})
-                        .get("installed", "")
-                    )
-                ),
-                self.button_color,
-            )
-        elif status_install == "installing":
-            self._draw_coloured_pixmap(
-                painter,
-                install_rect,
-                QPixmap(
-                    resource_path(
-                        self.config.get("paths", {})
-                        .get("assets", {})
-                        .get("images", {})
-                        .get("installing", "")
-                    )
-                ),
-                self.button_color,
-            )
-        elif status_install == "failed":
-            self._draw_coloured_pixmap(
-                painter,
-                install_rect,
-                QPixmap(
-                    resource_path(
-                        self.config.get("paths", {})
-                        .get("assets", {})
-                        .get("images", {})
-                        .get("failed", "")
-                    )
-                ),
-                self.button_color,
-            )
 
     def helpEvent(self, event, view, option, index) -> bool:
         if event is None:
@@ -253,26 +290,36 @@ class PyPIitemDelegate(QStyledItemDelegate):
 
     def editorEvent(self, event, model, option, index: QModelIndex) -> bool:
         if event.type() == QEvent.Type.MouseMove:  # type: ignore
-            if option.widget:
-                option.widget.update(index)  # type: ignore
+            self._mouse_pos = event.position().toPoint()  # type: ignore
+            # Only repainted when the mouse enters or leaves the install icon
+            hover = (index.row(), self._install_rect(option.rect).contains(self._mouse_pos))
+            if hover != self._install_hover:
+                if hover[0] != self._install_hover[0]:
+                    self.row_hovered.emit(index)
+                self._install_hover = hover
+                if option.widget:
+                    option.widget.update(index)  # type: ignore
 
         item_data = index.data(DataRole)
         if item_data and item_data.get("status", "install") == "install":
             if event.type() == QEvent.Type.MouseButtonRelease:  # type: ignore
-                padding = 10
-                button_width = 30
-                install_rect = QRect(
-                    option.rect.right() - button_width - padding,
-                    option.rect.top() + padding,
-                    button_width,
-                    button_width,
-                )
-
-                if install_rect.contains(event.pos()):  # type: ignore
+                # The same rect paint draws the icon in
+                if self._install_rect(option.rect).contains(event.position().toPoint()):  # type: ignore
                     self.install_clicked.emit(index)
                     return True
         return super().editorEvent(event, model, option, index)
 
+    def _install_rect(self, rect: QRect) -> QRect:
+        """Where paint draws the install icon of the row in `rect`"""
+        padding_for_button = 15
+        button_width = 20
+        return QRect(
+            rect.right() - button_width - padding_for_button,
+            rect.top() + padding_for_button,
+            button_width,
+            button_width,
+        )
+
     def sizeHint(self, option, index):
         # Use of item Hint, it's more than just a hint
         return QSize(0, 55)
@@ -281,7 +328,7 @@ class PyPIitemDelegate(QStyledItemDelegate):
         self,
         painter,
         rect: QRect,
-        pixmap: QPixmap,
+        pixmap: QPixmap | QBitmap,
         color,
         bg_color="",
         mask_color: QColor = QColor(Qt.GlobalColor.transparent),
@@ -290,7 +337,10 @@ class PyPIitemDelegate(QStyledItemDelegate):
         Draws a pixmap tinted with a specified color, optionally with a background.
         It uses the pixmap's mask to apply the color, making it appear as a colored icon.
         """
-        mask = pixmap.createMaskFromColor(QColor(Qt.GlobalColor.transparent))
+        if isinstance(pixmap, QBitmap):
+            mask = pixmap
+        else:
+            mask = pixmap.createMaskFromColor(QColor(Qt.GlobalColor.transparent))
         painter.save()
         path = QPainterPath()
         path.addRoundedRect(
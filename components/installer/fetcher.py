@@ -0,0 +1,164 @@
+import json
+import logging
+from PyQt6.QtCore import QObject, QProcess, QTimer, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+class DetailsFetcher(QObject):
+    """
+    Owns a pypi-fetcher process running in daemon mode for the lifetime of the app.
+
+    Requests are written to the process as JSON lines and every package comes
+    back on its own line as soon as its details are known, so rows are filled
+    one at a time instead of once the whole batch is done. The process keeps
+    its HTTP connections and its cache open between requests.
+
+    Outdated details are answered from the fetcher's cache right away and
+    revalidated in the background, when they changed the new details come
+    later on an update line, which goes through `details` like any other.
+
+    When the process dies it's restarted with a growing delay, and the
+    packages still waiting for an answer are requested again. After
+    `MAX_RESTARTS` failures in a row the waiting requests are finished
+    unanswered, and the next request tries to start the process once more.
+
+    Signals:
+        details (dict): {name: details} of a single package, as soon as it arrives or changes.
+        request_finished (int): Emitted with the id of a request once all its packages were answered,
+            or given up on. Never before `request` returned the id.
+    """
+
+    details = pyqtSignal(dict)
+    request_finished = pyqtSignal(int)
+
+    MAX_RESTARTS = 5
+
+    def __init__(self, executable: str, api_url: str = "", parent=None):
+        super().__init__(parent)
+        self.executable = executable
+        self._next_id = 0
+        # Packages of every request not answered yet, by request id
+        self._pending: dict[int, list[str]] = {}
+        self._stopping = False
+        self._restarts = 0
+        # Incomplete last line of the log written to stderr
+        self._errors = b""
+
+        self.process = QProcess(self)
+        self.process.setProgram(executable)
+        arguments = ["-daemon"]
+        if api_url:
+            # The fetcher formats the url with %s, the config uses {package}
+            arguments.append(f"-api={api_url.replace('{package}', '%s')}")
+        self.process.setArguments(arguments)
+        self.process.readyReadStandardOutput.connect(self._read_output)
+        self.process.readyReadStandardError.connect(self._read_errors)
+        self.process.finished.connect(self._on_finished)
+        self.process.errorOccurred.connect(self._on_error)
+
+        self.restart_timer = QTimer(self)
+        self.restart_timer.setSingleShot(True)
+        self.restart_timer.timeout.connect(self.start)
+
+    def start(self):
+        if self._stopping or self.process.state() != QProcess.ProcessState.NotRunning:
+            return
+        self.process.start()
+        if not self.process.waitForStarted(3000):
+            return  # errorOccurred schedules the restart
+        for request_id, packages in self._pending.items():
+            self._write(request_id, packages)
+
+    def stop(self):
+        """Lets the process finish its current requests and waits for it to exit"""
+        self._stopping = True
+        self.restart_timer.stop()
+        if self.process.state() == QProcess.ProcessState.NotRunning:
+            return
+        self.process.closeWriteChannel()
+        if not self.process.waitForFinished(2000):
+            self.process.kill()
+            self.process.waitForFinished(1000)
+
+    def request(self, packages: list) -> int:
+        """Requests the details of `packages`, returns the id of the request"""
+        self._next_id += 1
+        request_id = self._next_id
+        packages = [package for package in packages if package]
+        if not packages:
+            self._finish_later(request_id)
+            return request_id
+        self._pending[request_id] = list(packages)
+        if self.process.state() == QProcess.ProcessState.Running:
+            self._write(request_id, packages)
+        else:
+            self.start()
+        return request_id
+
+    def _finish_later(self, request_id: int):
+        # Queued, so a request finished while being made still reaches its caller
+        QTimer.singleShot(0, lambda: self.request_finished.emit(request_id))
+
+    def _write(self, request_id: int, packages: list):
+        line = json.dumps({"id": request_id, "packages": packages}) + "\n"
+        self.process.write(line.encode("utf-8"))
+
+    def _read_output(self):
+        while self.process.canReadLine():
+            line = bytes(self.process.readLine().data()).decode("utf-8", errors="ignore")
+            try:
+                response = json.loads(line)
+            except json.JSONDecodeError:
+                logger.error("Unexpected output from pypi-fetcher: %s", line)
+                continue
+            self._restarts = 0
+            self._handle_response(response)
+
+    def _handle_response(self, response: dict):
+        request_id = response.get("id")
+        if response.get("done"):
+            self._pending.pop(request_id, None)
+            self.request_finished.emit(request_id)
+            return
+
+        package = response.get("package", "")
+        pending = self._pending.get(request_id)
+        if pending is not None and package in pending:
+            pending.remove(package)
+        if "error" in response:
+            # Left as it is, it gets requested again with the next search
+            logger.info("No details for %s: %s", package, response["error"])
+            return
+        self.details.emit({package: response.get("data", {})})
+
+    def _read_errors(self):
+        self._errors += bytes(self.process.readAllStandardError().data())
+        *lines, self._errors = self._errors.split(b"\n")
+        for line in lines:
+            logger.info(line.decode("utf-8", errors="ignore"))
+
+    def _on_finished(self, exit_code: int, exit_status: QProcess.ExitStatus):
+        if self._stopping:
+            return
+        logger.error("pypi-fetcher exited with %s (%s)", exit_code, exit_status.name)
+        self._schedule_restart()
+
+    def _on_error(self, error: QProcess.ProcessError):
+        if self._stopping or error != QProcess.ProcessError.FailedToStart:
+            return  # Crashes also end up in _on_finished
+        logger.error("Failed to start pypi-fetcher %s", self.executable)
+        self._schedule_restart()
+
+    def _schedule_restart(self):
+        if self._restarts >= self.MAX_RESTARTS:
+            logger.error("pypi-fetcher keeps failing, library details are disabled")
+            # Nothing answers them anymore, their rows are requested again once
+            # a new search resets the viewport
+            for request_id in self._pending:
+                self._finish_later(request_id)
+            self._pending.clear()
+            return
+        delay = 500 * 2**self._restarts
+        self._restarts += 1
+        self.restart_timer.start(delay)
@@ -1,44 +1,85 @@
 from PyQt6.QtCore import QAbstractListModel, QModelIndex, QVariant, Qt, pyqtSignal
-from .utils import format_pypi_tooltip_html
+from .cache import DetailsCache
 
 DataRole = Qt.ItemDataRole.UserRole + 1
 
 
+def contiguous_ranges(rows) -> list[tuple[int, int]]:
+    """Groups row numbers into sorted (first, last) ranges of consecutive rows"""
+    ranges = []
+    for row in sorted(set(rows)):
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
+
+
 class LibraryListModel(QAbstractListModel):
     """
     A custom QAbstractListModel for managing and presenting PyPI library data
     to a QListView.
 
-    This model stores a list of dictionaries, where each dictionary represents
-    a PyPI package and can include details like 'name', 'version', 'status'
-    (e.g., 'install', 'installed', 'installing', 'failed'), and a 'description'
-    (which is pre-formatted HTML for a tooltip).
+    Every row is a dictionary keyed by the package name, which can include
+    details like 'name', 'version', 'status' (e.g., 'install', 'installed',
+    'installing', 'failed'), and a 'description' (which is pre-formatted HTML
+    for a tooltip). Rows are stored by name, with a separate list for their
+    order and `name_to_row` mapping a name back to its row, so a row is found
+    and updated without scanning the list.
 
     It provides data for display and custom roles, handles updates to library
     details fetched from an external source, and signals when items are removed.
+    Updates of many rows are applied in one pass, with a single dataChanged per
+    range of consecutive rows and a single removal per span of removed rows.
+
+    Rows are paged in lazily: while the search has more results, the view's
+    fetchMore asks for the next page through `more_requested`, and the page
+    arrives later through `appendData`.
+
+    Fetched details go through `cache`, rows whose details are cached are
+    filled as soon as they are set or appended, without waiting for the fetcher.
 
     Signals:
         remove_item (str): Emitted with the name of the library that has been removed from the model (e.g., if its version is "UNKNOWN").
+        more_requested (): Emitted when the view scrolled near the end and the next page of results is needed.
     """
 
     remove_item = pyqtSignal(str)
+    more_requested = pyqtSignal()
 
-    def __init__(self, data=None, parent=None):
+    def __init__(self, data=None, parent=None, cache: DetailsCache | None = None):
         super().__init__(parent)
-        self._data = data if data else []
-        self.name_to_row = {}
+        self.cache = cache if cache is not None else DetailsCache()
+        self._keys: list[str] = []
+        self._rows: dict[str, dict] = {}
+        self.name_to_row: dict[str, int] = {}
+        self._has_more = False
+        self._fetching = False
+        if data:
+            self._store(data)
+
+    def _store(self, rows: list):
+        for row_item in rows:
+            name = row_item["name"]
+            if name in self._rows:
+                continue
+            self.name_to_row[name] = len(self._keys)
+            self._keys.append(name)
+            self._rows[name] = row_item
 
-    def set_name_to_row(self):
-        self.name_to_row = {data["name"]: i for i, data in enumerate(self._data)}
+    def _reindex(self, first: int = 0):
+        """Renumbers `name_to_row` from row `first` on, after rows moved"""
+        for row in range(first, len(self._keys)):
+            self.name_to_row[self._keys[row]] = row
 
     def rowCount(self, parent=None):
-        return len(self._data)
+        return len(self._keys)
 
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
-        if not index.isValid() or not (0 <= index.row() < len(self._data)):
+        if not index.isValid() or not (0 <= index.row() < len(self._keys)):
             return QVariant()
 
-        row_item = self._data[index.row()]
+        row_item = self._rows[self._keys[index.row()]]
         if role == DataRole:
             return row_item
         if role == Qt.ItemDataRole.DisplayRole:
@@ -47,36 +88,102 @@ class LibraryListModel(QAbstractListModel):
         return QVariant()
 
     def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
         return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
 
-    def setDataList(self, data):
+    def row_data(self, name: str) -> dict | None:
+        return self._rows.get(name)
+
+    def _fill_from_cache(self, rows: list):
+        for row_item in rows:
+            entry = self.cache.get(row_item["name"])
+            if entry is not None:
+                row_item.update({"description": entry.tooltip, "version": entry.version})
+
+    def setDataList(self, data, has_more: bool = False):
+        self._fill_from_cache(data)
         self.beginResetModel()
-        self._data = data
+        self._keys = []
+        self._rows = {}
+        self.name_to_row = {}
+        self._store(data)
+        self._has_more = has_more
+        self._fetching = False
         self.endResetModel()
 
-    def _delete_updated_data(self, indexes):
-        for idx, item in indexes.items():
-            item_to_remove = [
-                index for index, data in enumerate(self._data) if data["name"] == item
-            ]
-            self._data.pop(item_to_remove[0])
-            self.remove_item.emit(item)
-            model_index = self.index(idx, 0, QModelIndex())
-            self.dataChanged.emit(model_index, model_index)
+    def appendData(self, rows: list, has_more: bool):
+        """Appends a page of rows fetched after a fetchMore"""
+        self._fetching = False
+        self._has_more = has_more
+        rows = [row_item for row_item in rows if row_item["name"] not in self._rows]
+        if not rows:
+            return
+        self._fill_from_cache(rows)
+        first = len(self._keys)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._store(rows)
+        self.endInsertRows()
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return self._has_more and not self._fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self.canFetchMore():
+            return
+        # Rows are appended once the page arrives, see appendData
+        self._fetching = True
+        self.more_requested.emit()
+
+    def updateRows(self, updates: dict):
+        """
+        Applies {name: {field: value}} to the rows of those names, names without
+        a row are skipped. One dataChanged is emitted per range of changed rows.
+        """
+        changed = []
+        for name, fields in updates.items():
+            row = self.name_to_row.get(name)
+            if row is None:
+                continue
+            self._rows[name].update(fields)
+            changed.append(row)
+        for first, last in contiguous_ranges(changed):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, 0))
+
+    def removeNames(self, names):
+        """Removes the rows of `names`, one span of consecutive rows at a time"""
+        rows = [self.name_to_row[name] for name in names if name in self.name_to_row]
+        if not rows:
+            return
+        removed = []
+        # From the bottom up, so the rows of the spans left don't move
+        for first, last in reversed(contiguous_ranges(rows)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            span = self._keys[first : last + 1]
+            del self._keys[first : last + 1]
+            for name in span:
+                del self._rows[name]
+                del self.name_to_row[name]
+            self.endRemoveRows()
+            removed.extend(span)
+        self._reindex(min(rows))
+        for name in removed:
+            self.remove_item.emit(name)
 
     def updateData(self, data_dict: dict):
         # When the API has emitted some data related to the library
-        indexes_to_remove = {}
-        for _, (item, item_data) in enumerate(data_dict.items()):
-            index_number = self.name_to_row.get(item, -1)
-            if index_number == -1:
-                continue
-            tootlip = format_pypi_tooltip_html(item_data, "figtree")
+        updates = {}
+        to_remove = []
+        for item, item_data in data_dict.items():
+            # An empty summary is what the fetcher sends for unknown packages
             if item_data.get("info", {}).get("summary") == "":
-                indexes_to_remove[index_number] = item
-            self._data[index_number].update({"description": tootlip})
-            self._data[index_number].update({"version": item_data["info"]["version"]})
-            idx = self.index(index_number, 0, QModelIndex())
-            self.dataChanged.emit(idx, idx)
+                self.cache.discard(item)
+                to_remove.append(item)
+                continue
+            entry = self.cache.put(item, item_data)
+            updates[item] = {"description": entry.tooltip, "version": entry.version}
 
-        self._delete_updated_data(indexes_to_remove)
+        self.updateRows(updates)
+        self.removeNames(to_remove)
@@ -0,0 +1,254 @@
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+from PyQt6.QtCore import QObject, QProcess, QTimer
+from helpers.utils import get_app_support_directory, normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Prefetch priorities, what the user points at first
+SELECTED = 0
+HOVERED = 1
+TOP_RESULT = 2
+
+# Run by the interpreter a package is prefetched for: resolves the wheel pip would
+# download for it, without its dependencies, and prints its url and size.
+# The size is -1 when the wheel is already in a --find-links directory.
+PROBE_SCRIPT = """
+import json, subprocess, sys, urllib.request
+result = subprocess.run(
+    [sys.executable, "-m", "pip", "install", "--dry-run", "--no-deps",
+     "--ignore-installed", "--only-binary=:all:", "--disable-pip-version-check",
+     "--quiet", "--report", "-"] + sys.argv[1:],
+    stdout=subprocess.PIPE,
+)
+if result.returncode:
+    sys.exit(result.returncode)
+url = json.loads(result.stdout)["install"][0]["download_info"]["url"]
+size = -1
+if not url.startswith("file:"):
+    request = urllib.request.Request(url, method="HEAD")
+    with urllib.request.urlopen(request, timeout=10) as response:
+        size = int(response.headers.get("Content-Length") or 0)
+print(json.dumps({"url": url, "size": size}))
+"""
+
+
+class WheelPrefetcher(QObject):
+    """
+    Downloads the wheels of packages which are likely to be installed next into
+    a local wheelhouse, so installing them later doesn't wait for the download.
+
+    Packages are queued by priority (selected, hovered, top search results) and
+    fetched with `pip download --only-binary=:all: --no-deps` by the interpreter
+    they'd be installed with, so the wheels match it. Only the wheel of the
+    package itself is prefetched, never its dependencies.
+
+    Before a download starts, a probe run by the same interpreter resolves the
+    wheel and asks for its size, and the download is only admitted within the
+    budgets:
+    - at most `concurrency` pip processes (probes and downloads) at a time
+    - at most `bytes_per_minute` downloaded over the last minute, counting the
+      downloads still running, further downloads wait for the minute to pass
+    - at most `max_bytes` kept in the wheelhouse, least recently used first out
+    A wheel larger than either byte budget, or whose size is unknown, isn't
+    prefetched at all.
+
+    Installs pick the wheels up through `pip_args` (`--find-links`).
+    """
+
+    MAX_QUEUED = 20
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        bytes_per_minute: int = 50 * 1024 * 1024,
+        max_bytes: int = 512 * 1024 * 1024,
+        wheelhouse: str = "",
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.wheelhouse = wheelhouse or os.path.join(
+            get_app_support_directory(), "wheelhouse"
+        )
+        os.makedirs(self.wheelhouse, exist_ok=True)
+        self.concurrency = concurrency
+        self.bytes_per_minute = bytes_per_minute
+        self.max_bytes = max_bytes
+        self._queue: list[tuple[int, int, str, str]] = []
+        # Probed wheels waiting for the budget, (priority, order, exec, name, size)
+        self._sized: list[tuple[int, int, str, str, int]] = []
+        self._order = itertools.count()
+        # (interpreter, normalized name) of everything queued, running or done
+        self._seen: set[tuple[str, str]] = set()
+        # (priority, exec, name) of every probe, (exec, name, size) of every download
+        self._probing: dict[QProcess, tuple[int, str, str]] = {}
+        self._running: dict[QProcess, tuple[str, str, int]] = {}
+        # (time, bytes) added to the wheelhouse by finished downloads
+        self._downloaded: list[tuple[float, int]] = []
+        self._size = self._wheelhouse_size()
+
+        self.retry_timer = QTimer(self)
+        self.retry_timer.setSingleShot(True)
+        self.retry_timer.timeout.connect(self._dispatch)
+
+    @property
+    def pip_args(self) -> list:
+        return ["--find-links", self.wheelhouse]
+
+    def prefetch(self, python_exec: str, name: str, priority: int = TOP_RESULT):
+        if not python_exec or not name:
+            return
+        key = (python_exec, normalize_name(name))
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        heapq.heappush(self._queue, (priority, next(self._order), python_exec, name))
+        if len(self._queue) > self.MAX_QUEUED:
+            # Drops the least likely package, it can be queued again later
+            dropped = max(self._queue)
+            self._queue.remove(dropped)
+            heapq.heapify(self._queue)
+            self._seen.discard((dropped[2], normalize_name(dropped[3])))
+        self._dispatch()
+
+    def stop(self):
+        self.retry_timer.stop()
+        self._queue.clear()
+        self._sized.clear()
+        for process in [*self._probing, *self._running]:
+            process.kill()
+            process.waitForFinished(1000)
+
+    def _wheelhouse_size(self) -> int:
+        return sum(
+            entry.stat().st_size
+            for entry in os.scandir(self.wheelhouse)
+            if entry.is_file()
+        )
+
+    def _recently_downloaded(self) -> int:
+        minute_ago = time.monotonic() - 60
+        self._downloaded = [entry for entry in self._downloaded if entry[0] > minute_ago]
+        return sum(size for _, size in self._downloaded)
+
+    def _in_flight(self) -> int:
+        return sum(size for _, _, size in self._running.values())
+
+    def _budget_wait(self, size: int) -> float | None:
+        """
+        Seconds until a download of `size` fits the per minute budget, 0 when it
+        does now, None when it has to wait for a running download to finish.
+        """
+        used = self._recently_downloaded() + self._in_flight()
+        if used + size <= self.bytes_per_minute:
+            return 0
+        if self._downloaded:
+            # Waits for the oldest download to leave the one minute window
+            return max(self._downloaded[0][0] + 60 - time.monotonic(), 0.1)
+        return None
+
+    def _dispatch(self):
+        self.retry_timer.stop()
+        while self._sized and self._slots():
+            wait = self._budget_wait(self._sized[0][4])
+            if wait is None:
+                break
+            if wait > 0:
+                self.retry_timer.start(int(wait * 1000))
+                break
+            _, _, python_exec, name, size = heapq.heappop(self._sized)
+            self._start(python_exec, name, size)
+        while self._queue and self._slots():
+            priority, _, python_exec, name = heapq.heappop(self._queue)
+            self._probe(priority, python_exec, name)
+
+    def _slots(self) -> bool:
+        return len(self._probing) + len(self._running) < self.concurrency
+
+    def _probe(self, priority: int, python_exec: str, name: str):
+        process = QProcess(self)
+        process.setProgram(python_exec)
+        process.setArguments(["-c", PROBE_SCRIPT, *self.pip_args, name])
+        process.finished.connect(lambda *_: self._on_probed(process))
+        self._probing[process] = (priority, python_exec, name)
+        process.start()
+
+    def _on_probed(self, process: QProcess):
+        priority, python_exec, name = self._probing.pop(process, (0, "", ""))
+        output = bytes(process.readAllStandardOutput().data()).decode(errors="ignore")
+        error = bytes(process.readAllStandardError().data()).decode(errors="ignore")
+        process.deleteLater()
+        try:
+            size = int(json.loads(output)["size"])
+        except (ValueError, KeyError, TypeError):
+            # No wheel for this interpreter, installing will build it as usual
+            logger.info("No wheel to prefetch for %s: %s", name, error.strip())
+            size = 0
+
+        if size < 0:
+            logger.info("Wheel of %s is already in the wheelhouse", name)
+        elif size == 0 or size > min(self.bytes_per_minute, self.max_bytes):
+            if size:
+                logger.info("Wheel of %s is too large to prefetch: %d", name, size)
+        else:
+            heapq.heappush(
+                self._sized, (priority, next(self._order), python_exec, name, size)
+            )
+        self._dispatch()
+
+    def _start(self, python_exec: str, name: str, size: int):
+        process = QProcess(self)
+        process.setProgram(python_exec)
+        process.setArguments(
+            [
+                "-m",
+                "pip",
+                "download",
+                "--only-binary=:all:",
+                "--no-deps",
+                "--disable-pip-version-check",
+                "--quiet",
+                "--dest",
+                self.wheelhouse,
+                *self.pip_args,
+                name,
+            ]
+        )
+        process.finished.connect(lambda *_: self._on_finished(process))
+        self._running[process] = (python_exec, name, size)
+        process.start()
+
+    def _on_finished(self, process: QProcess):
+        python_exec, name, _ = self._running.pop(process, ("", "", 0))
+        if process.exitCode() != 0:
+            error = bytes(process.readAllStandardError().data()).decode(errors="ignore")
+            logger.info("No wheel prefetched for %s: %s", name, error.strip())
+        process.deleteLater()
+
+        size = self._wheelhouse_size()
+        if size > self._size:
+            self._downloaded.append((time.monotonic(), size - self._size))
+        self._size = size
+        if size > self.max_bytes:
+            self._prune()
+        self._dispatch()
+
+    def _prune(self):
+        """Removes the least recently used wheels until the wheelhouse fits `max_bytes`"""
+        wheels = sorted(
+            (entry for entry in os.scandir(self.wheelhouse) if entry.is_file()),
+            key=lambda entry: entry.stat().st_atime,
+        )
+        for entry in wheels:
+            if self._size <= self.max_bytes:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self._size -= size
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlparse
+import requests
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from helpers.pip_runner import format_size
+from helpers.utils import get_app_support_directory, normalize_name
+
+logger = logging.getLogger(__name__)
+
+SITE_DIRS_SCRIPT = (
+    "import json, sysconfig; "
+    "paths = sysconfig.get_paths(); "
+    "print(json.dumps(sorted({paths['purelib'], paths['platlib']})))"
+)
+
+
+def format_resolution(resolved: list) -> str:
+    """One line per resolved package, with its download size when known"""
+    lines = []
+    total = 0
+    for package in resolved:
+        size = package.get("size") or 0
+        total += size
+        size_text = format_size(size) if size else "size unknown"
+        lines.append(f"{package['name']} {package['version']}  ({size_text})")
+    lines.append(f"\nTotal download: {format_size(total)}")
+    return "\n".join(lines)
+
+
+class PreviewWorker(QObject):
+    """
+    Resolves what installing a library would pull in, with
+    `pip install --dry-run --report -`, without installing anything.
+
+    Reports are cached on disk by (library, interpreter, fingerprint of the
+    installed distributions), so previewing again, or previewing and then
+    installing, doesn't pay for the resolver twice. An entry is dropped once
+    something gets installed in or removed from the interpreter, and after
+    `ttl` seconds, as new releases change the resolution too.
+
+    Download sizes are read from the `Content-Length` of a HEAD request on
+    every resolved file, and cached along with the report.
+    """
+
+    resolved = pyqtSignal(int, str, list)  # (request_id, library_name, packages)
+    failed = pyqtSignal(int, str, str)  # (request_id, library_name, error)
+
+    def __init__(self, ttl: int = 3600, cache_dir: str = ""):
+        super().__init__()
+        self.ttl = ttl
+        self.cache_dir = cache_dir or os.path.join(
+            get_app_support_directory(), "dry_run"
+        )
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._site_dirs: dict[str, list[str]] = {}
+        self.session = None
+
+    def site_dirs(self, python_exec: str) -> list:
+        """purelib and platlib of an interpreter, asked for once per interpreter"""
+        if python_exec not in self._site_dirs:
+            try:
+                result = subprocess.run(
+                    [python_exec, "-c", SITE_DIRS_SCRIPT],
+                    capture_output=True,
+                    text=True,
+                )
+                self._site_dirs[python_exec] = json.loads(result.stdout)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Failed to find the site-packages of {python_exec}: {e}")
+                return []
+        return self._site_dirs[python_exec]
+
+    def fingerprint(self, python_exec: str) -> str:
+        """Hash of the metadata directories installed for the interpreter"""
+        entries = []
+        for directory in self.site_dirs(python_exec):
+            try:
+                entries.extend(
+                    entry
+                    for entry in os.listdir(directory)
+                    if entry.endswith((".dist-info", ".egg-info"))
+                )
+            except OSError:
+                continue
+        return hashlib.sha256("\n".join(sorted(entries)).encode()).hexdigest()
+
+    def _cache_path(self, library_name: str, python_exec: str, fingerprint: str):
+        key = json.dumps([normalize_name(library_name), python_exec, fingerprint])
+        return os.path.join(
+            self.cache_dir, hashlib.sha256(key.encode()).hexdigest() + ".json"
+        )
+
+    def _load(self, path: str) -> list | None:
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "r", encoding="utf-8") as file:
+                return json.load(file)["resolved"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            return None
+
+    def _save(self, path: str, report: dict, resolved: list):
+        temp_path = f"{path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as file:
+                json.dump({"report": report, "resolved": resolved}, file)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to cache the dry run report: {e}")
+        self._prune()
+
+    def _prune(self):
+        expired = time.time() - self.ttl
+        for entry in os.scandir(self.cache_dir):
+            try:
+                if entry.stat().st_mtime < expired:
+                    os.remove(entry.path)
+            except OSError:
+                continue
+
+    def _size(self, url: str) -> int:
+        parsed = urlparse(url)
+        if parsed.scheme == "file":
+            try:
+                return os.path.getsize(unquote(parsed.path))
+            except OSError:
+                return 0
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers.update({"User-Agent": "P4cMan"})
+        try:
+            response = self.session.head(url, allow_redirects=True, timeout=10)
+            return int(response.headers.get("Content-Length", 0))
+        except (requests.RequestException, ValueError):
+            return 0
+
+    def _resolve(self, python_exec: str, library_name: str, pip_args: list) -> dict:
+        result = subprocess.run(
+            [
+                python_exec,
+                "-m",
+                "pip",
+                "install",
+                "--dry-run",
+                "--quiet",
+                "--disable-pip-version-check",
+                "--report",
+                "-",
+                *pip_args,
+                library_name,
+            ],
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or "pip failed to resolve")
+        return json.loads(result.stdout)
+
+    @pyqtSlot(int, str, str, list)
+    def preview(self, request_id: int, python_exec: str, library_name: str, pip_args):
+        path = self._cache_path(
+            library_name, python_exec, self.fingerprint(python_exec)
+        )
+        resolved = self._load(path)
+        if resolved is not None:
+            self.resolved.emit(request_id, library_name, resolved)
+            return
+        try:
+            report = self._resolve(python_exec, library_name, list(pip_args))
+        except (OSError, RuntimeError, json.JSONDecodeError) as e:
+            logger.error(f"Dry run of {library_name} failed: {e}")
+            self.failed.emit(request_id, library_name, str(e))
+            return
+
+        installs = report.get("install", [])
+        urls = [item.get("download_info", {}).get("url", "") for item in installs]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            sizes = list(pool.map(self._size, urls))
+        resolved = [
+            {
+                "name": item.get("metadata", {}).get("name", ""),
+                "version": item.get("metadata", {}).get("version", ""),
+                "url": url,
+                "size": size,
+                "requested": item.get("requested", False),
+            }
+            for item, url, size in zip(installs, urls, sizes)
+        ]
+        self._save(path, report, resolved)
+        self.resolved.emit(request_id, library_name, resolved)
+
+
+class PreviewRunner(QObject):
+    """Owns the thread of the PreviewWorker and relays its requests and results"""
+
+    resolved = pyqtSignal(str, str, list)  # (python_exec, library_name, packages)
+    failed = pyqtSignal(str, str)  # (library_name, error)
+    preview_requested = pyqtSignal(int, str, str, list)
+
+    def __init__(self, ttl: int = 3600, pip_args=(), parent=None):
+        super().__init__(parent)
+        self.pip_args = list(pip_args)
+        self._next_id = 0
+        # Interpreter of every request waiting for its answer
+        self._requests: dict[int, str] = {}
+        self.thread_preview = QThread()
+        self.worker = PreviewWorker(ttl)
+        self.worker.moveToThread(self.thread_preview)
+
+        self.worker.resolved.connect(self._on_resolved)
+        self.worker.failed.connect(self._on_failed)
+        self.preview_requested.connect(self.worker.preview)
+        self.thread_preview.start()
+
+    def preview(self, python_exec: str, library_name: str):
+        self._next_id += 1
+        self._requests[self._next_id] = python_exec
+        self.preview_requested.emit(
+            self._next_id, python_exec, library_name, self.pip_args
+        )
+
+    def _on_resolved(self, request_id: int, library_name: str, resolved: list):
+        python_exec = self._requests.pop(request_id, "")
+        self.resolved.emit(python_exec, library_name, resolved)
+
+    def _on_failed(self, request_id: int, library_name: str, error: str):
+        self._requests.pop(request_id, None)
+        self.failed.emit(library_name, error)
+
+    def quit(self):
+        if self.thread_preview.isRunning():
+            self.thread_preview.quit()
+            self.thread_preview.wait()
@@ -0,0 +1,121 @@
+import logging
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from .threads import InstallerLibraries
+
+logger = logging.getLogger(__name__)
+
+
+class InstallScheduler(QObject):
+    """
+    Queues installs per target interpreter and runs them as pip transactions.
+
+    Libraries queued for an interpreter within `window` ms of each other are
+    installed by a single `pip install a b c`, so they are resolved together.
+    Only one transaction runs per interpreter at a time, libraries queued
+    while one runs go into the next one. Different interpreters don't wait
+    for each other. `pip_args` are added to every pip install, like the
+    `--find-links` of prefetched wheels.
+
+    A library queued with `pins` (the resolution of a preview) is installed
+    as exactly those pins with `--no-deps`, skipping the resolver. Pinned
+    and unpinned libraries never share a transaction.
+
+    Signals:
+        status_changed (str, str): (library_name, status), status being 'installing', 'installed' or 'failed'.
+        transaction_finished (str): Emitted with the interpreter once one of its transactions is done.
+        progress (str, object): (library_name, PipEvent) for every library of a transaction, as pip goes through its phases.
+    """
+
+    status_changed = pyqtSignal(str, str)
+    progress = pyqtSignal(str, object)
+    transaction_finished = pyqtSignal(str)
+
+    def __init__(self, window: int = 400, pip_args=(), parent=None):
+        super().__init__(parent)
+        self.window = window
+        self.pip_args = list(pip_args)
+        # Libraries waiting for a transaction, by interpreter
+        self._queued: dict[str, list[str]] = {}
+        # Pins of the libraries queued with them, by interpreter
+        self._pins: dict[str, dict[str, list[str]]] = {}
+        self._timers: dict[str, QTimer] = {}
+        self._running: dict[str, InstallerLibraries] = {}
+
+    def queue(self, python_exec: str, library_name: str, pins=None):
+        queued = self._queued.setdefault(python_exec, [])
+        running = self._running.get(python_exec)
+        if library_name in queued or (
+            running is not None and library_name in running.library_names
+        ):
+            return
+        queued.append(library_name)
+        if pins:
+            self._pins.setdefault(python_exec, {})[library_name] = list(pins)
+        self.status_changed.emit(library_name, "installing")
+
+        timer = self._timers.get(python_exec)
+        if timer is None:
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.setInterval(self.window)
+            timer.timeout.connect(lambda: self._start(python_exec))
+            self._timers[python_exec] = timer
+        # Every new library gives the next one `window` ms to join the transaction
+        timer.start()
+
+    def is_busy(self) -> bool:
+        return bool(self._running) or any(self._queued.values())
+
+    def _start(self, python_exec: str):
+        if python_exec in self._running:
+            return  # Started once the running transaction is done
+        queued = self._queued.get(python_exec, [])
+        if not queued:
+            return
+        pins = self._pins.get(python_exec, {})
+        # Takes the libraries of the same kind as the first one, the rest waits
+        pinned = queued[0] in pins
+        library_names = [name for name in queued if (name in pins) == pinned]
+        self._queued[python_exec] = [
+            name for name in queued if name not in library_names
+        ]
+        requirements = {name: pins.pop(name) for name in library_names if name in pins}
+        pip_args = [*self.pip_args, "--no-deps"] if pinned else self.pip_args
+        logger.info(
+            "Installing %s with %s", " ".join(library_names), python_exec
+        )
+        transaction = InstallerLibraries(
+            python_exec, library_names, pip_args, requirements
+        )
+        transaction.package_finished.connect(self._on_package_finished)
+        transaction.progress.connect(
+            lambda event: self._on_progress(python_exec, event)
+        )
+        transaction.finished.connect(
+            lambda _: self._on_transaction_finished(python_exec)
+        )
+        self._running[python_exec] = transaction
+        transaction.start()
+
+    def _on_progress(self, python_exec: str, event):
+        transaction = self._running.get(python_exec)
+        if transaction is None:
+            return
+        # Dependencies have no row of their own, the libraries asked for show them
+        for library_name in transaction.library_names:
+            self.progress.emit(library_name, event)
+
+    def _on_package_finished(self, library_name: str, return_code: int):
+        self.status_changed.emit(
+            library_name, "installed" if return_code == 1 else "failed"
+        )
+
+    def _on_transaction_finished(self, python_exec: str):
+        transaction = self._running.pop(python_exec, None)
+        if transaction is not None:
+            transaction.wait()
+            transaction.deleteLater()
+        self.transaction_finished.emit(python_exec)
+        timer = self._timers.get(python_exec)
+        if self._queued.get(python_exec) and not (timer and timer.isActive()):
+            self._start(python_exec)
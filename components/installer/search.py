@@ -0,0 +1,236 @@
+import bisect
+import heapq
+import itertools
+from array import array
+from collections import Counter
+from helpers.ranking import FUZZY, allowed_typos, fuzzy_distance, match_score
+from helpers.utils import normalize_name
+
+
+class SearchIndex:
+    """
+    A search index over the list of PyPI package names.
+
+    Every name is keyed by its PEP 503 normalized form and two structures are
+    built once over those keys:
+    - a sorted prefix array (ids ordered by their normalized name), so all the
+      names starting with the query are found with two bisects
+    - a trigram table, mapping every 3 character slice to the ids containing it,
+      which narrows a substring query down to a small candidate set
+
+    Results are ranked with the tiers of helpers.ranking: names starting with
+    the query come straight out of the prefix array, the rest of the
+    substring matches are scored and only the best are kept in a bounded heap,
+    and when there still aren't enough, names keeping enough trigrams (or
+    bigrams, for queries too short for trigrams to tell) of the query in
+    place are checked for typos.
+
+    Names are never copied, they are looked up from `names` by id when needed.
+    `names` can be any sequence of str, like a NameStore, whose precomputed
+    sorted order can be handed over as `order`.
+    """
+
+    def __init__(self, names, order=None):
+        self.names = names
+        self._removed = set()
+        self._trigrams: dict[str, array] = {}
+        # Names too short to have a single trigram
+        self._short = array("I")
+
+        # Keys are only kept around when the sorted order has to be computed
+        keys = [] if order is None else None
+        for idx, name in enumerate(names):
+            key = normalize_name(name)
+            if keys is not None:
+                keys.append(key)
+            if len(key) < 3:
+                self._short.append(idx)
+            for trigram in {key[i : i + 3] for i in range(len(key) - 2)}:
+                posting = self._trigrams.get(trigram)
+                if posting is None:
+                    posting = self._trigrams[trigram] = array("I")
+                posting.append(idx)
+        if order is None:
+            order = array("I", sorted(range(len(keys)), key=keys.__getitem__))
+        self._order = order
+
+    def __len__(self):
+        return len(self.names) - len(self._removed)
+
+    def _key(self, idx: int) -> str:
+        return normalize_name(self.names[idx])
+
+    def _prefix_range(self, query: str) -> tuple[int, int]:
+        """Returns the slice of the prefix array whose keys start with `query`"""
+        low = bisect.bisect_left(self._order, query, key=self._key)
+        upper_bound = query[:-1] + chr(ord(query[-1]) + 1)
+        high = bisect.bisect_left(self._order, upper_bound, lo=low, key=self._key)
+        return low, high
+
+    def _candidates(self, query: str):
+        """Ids which may contain `query`, taken from its rarest trigram"""
+        if len(query) < 3:
+            # Too short to have a trigram, every trigram containing it is a candidate
+            candidates = set(self._short)
+            for trigram, posting in self._trigrams.items():
+                if query in trigram:
+                    candidates.update(posting)
+            return sorted(candidates)
+        smallest = None
+        for trigram in {query[i : i + 3] for i in range(len(query) - 2)}:
+            posting = self._trigrams.get(trigram)
+            if posting is None:
+                return ()
+            if smallest is None or len(posting) < len(smallest):
+                smallest = posting
+        return smallest or ()
+
+    @property
+    def removed_ids(self) -> set:
+        return self._removed
+
+    def remove(self, name: str):
+        """Hides `name` from every search result"""
+        key = normalize_name(name)
+        low, high = self._prefix_range(key)
+        for idx in self._order[low:high]:
+            if self.names[idx] == name:
+                self._removed.add(idx)
+                return
+
+    def matches(self, query: str, candidates=None) -> array:
+        """
+        Returns every id whose normalized name contains the normalized `query`.
+        When `candidates` is given only those ids are checked.
+        """
+        if candidates is None:
+            candidates = self._candidates(query)
+        found = array("I")
+        for idx in candidates:
+            if idx not in self._removed and query in self._key(idx):
+                found.append(idx)
+        return found
+
+    def cursor(self, query: str) -> "SearchCursor":
+        """Returns a cursor over the ranked matches of `query`"""
+        return SearchCursor(self, query)
+
+    def _scored(self, query: str, ids):
+        """Yields the ranked entries of the substring matches `ids`"""
+        for idx in ids:
+            key = self._key(idx)
+            score = match_score(key, query, 0)
+            if score[1] == 0:
+                continue  # Already taken from the prefix array
+            yield score, key, idx
+
+    def _bigram_posting(self, bigram: str) -> set:
+        """Ids containing `bigram`, from the trigrams starting or ending with it"""
+        posting = set()
+        for trigram, ids in self._trigrams.items():
+            if trigram.startswith(bigram) or trigram.endswith(bigram):
+                posting.update(ids)
+        return posting
+
+    def _fuzzy_grams(self, query: str, typos: int):
+        """
+        Returns (size, grams, needed): the n-grams of `query` by position, and
+        how many of them a name within `typos` edits still has in place.
+
+        Every edit breaks at most 4 trigrams (a swap does), or 3 bigrams. The
+        others are kept, shifted by at most `typos` positions, as typos are
+        only matched from the start of a name. Trigrams are used when they
+        leave something to filter on, bigrams for shorter queries, like 5 and
+        6 characters with a typo.
+        """
+        size, breaks = 3, 4
+        if len(query) - 2 - 4 * typos < 1:
+            size, breaks = 2, 3
+        grams = [(i, query[i : i + size]) for i in range(len(query) - size + 1)]
+        return size, grams, len(grams) - breaks * typos
+
+    def _fuzzy_matches(self, query: str, typos: int, exclude: set):
+        """Yields the ranked entries of the names within `typos` edits of `query`"""
+        size, grams, needed = self._fuzzy_grams(query, typos)
+        if needed < 1:
+            return  # Never the case with the typos of allowed_typos
+        distinct = {gram for _, gram in grams}
+        shared = Counter()
+        for gram in distinct:
+            if size == 3:
+                shared.update(self._trigrams.get(gram, ()))
+            else:
+                shared.update(self._bigram_posting(gram))
+        # Broken positions take at most as many distinct grams away
+        distinct_needed = max(1, len(distinct) - (len(grams) - needed))
+
+        for idx, count in shared.items():
+            if count < distinct_needed or idx in exclude or idx in self._removed:
+                continue
+            key = self._key(idx)
+            kept = 0
+            for position, gram in grams:
+                start = max(0, position - typos)
+                if key.find(gram, start, position + typos + size) != -1:
+                    kept += 1
+            if kept < needed:
+                continue
+            distance = fuzzy_distance(key, query, typos)
+            if distance is not None:
+                yield (FUZZY, distance), key, idx
+
+
+class SearchCursor:
+    """
+    The ranked matches of one query, evaluated a page at a time.
+
+    Names starting with the query are read straight from the prefix array, so
+    the first pages of a broad query cost the same as the first page of a
+    narrow one. Only once they run out are the other substring matches
+    collected and scored into a heap which is popped a page at a time,
+    followed by the names matching with typos.
+
+    `matches` holds the ids of every substring match once they were collected
+    (it stays None while prefixes were enough).
+    """
+
+    def __init__(self, index: SearchIndex, query: str):
+        self.index = index
+        self.query = normalize_name(query.strip())
+        self.matches = None
+        self.exhausted = False
+        self._ids = self._ranked_ids()
+
+    def _ranked_ids(self):
+        index, query = self.index, self.query
+        removed = index.removed_ids
+        if not query:
+            yield from (idx for idx in range(len(index.names)) if idx not in removed)
+            return
+
+        low, high = index._prefix_range(query)
+        for position in range(low, high):
+            idx = index._order[position]
+            if idx not in removed:
+                yield idx
+
+        # No more names start with the query, rank all the substring matches
+        self.matches = index.matches(query)
+        heap = list(index._scored(query, self.matches))
+        heapq.heapify(heap)
+        while heap:
+            yield heapq.heappop(heap)[-1]
+
+        typos = allowed_typos(query)
+        if typos:
+            heap = list(index._fuzzy_matches(query, typos, set(self.matches)))
+            heapq.heapify(heap)
+            while heap:
+                yield heapq.heappop(heap)[-1]
+
+    def next_page(self, size: int = 50) -> list:
+        """Returns the next `size` names, fewer (or none) once exhausted"""
+        names = [self.index.names[idx] for idx in itertools.islice(self._ids, size)]
+        if len(names) < size:
+            self.exhausted = True
+        return names
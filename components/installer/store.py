@@ -0,0 +1,147 @@
+import itertools
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+from helpers.utils import normalize_name
+
+# magic, format version, number of names (padded to keep the arrays aligned)
+HEADER = struct.Struct("<4sII4x")
+MAGIC = b"P4CN"
+VERSION = 1
+
+
+class NameStore:
+    """
+    A read only list of package names backed by a memory mapped file.
+
+    The file holds, after its header:
+    - offsets: count + 1 uint32, name `i` is blob[offsets[i]:offsets[i + 1]]
+    - order: count uint32, the ids sorted by their PEP 503 normalized name
+    - blob: every name encoded in UTF-8, back to back
+
+    Names are decoded only when they are indexed, so opening the store costs
+    the same whatever the number of names.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._open()
+
+    def _open(self):
+        file_path = self.file_path
+        with open(file_path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"{file_path} is not a name store")
+
+        self._count = count
+        view = memoryview(self._mmap)
+        offsets_start = HEADER.size
+        order_start = offsets_start + 4 * (count + 1)
+        self._blob_start = order_start + 4 * count
+        self._offsets = view[offsets_start:order_start].cast("I")
+        self.order = view[order_start : self._blob_start].cast("I")
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(self._count))]
+        if idx < 0:
+            idx += self._count
+        if not 0 <= idx < self._count:
+            raise IndexError("name store index out of range")
+        start = self._blob_start + self._offsets[idx]
+        end = self._blob_start + self._offsets[idx + 1]
+        return self._mmap[start:end].decode("utf-8")
+
+    def __iter__(self):
+        for idx in range(self._count):
+            yield self[idx]
+
+    def close(self):
+        if self._mmap.closed:
+            return
+        self._offsets.release()
+        self.order.release()
+        self._mmap.close()
+
+    def rewrite(self, removed_ids, added=()):
+        """
+        Rewrites the file without `removed_ids` and with `added` appended,
+        then maps the new file.
+        """
+        kept = (name for idx, name in enumerate(self) if idx not in removed_ids)
+        names = itertools.chain(kept, added)
+        temp_path = write_name_store(self.file_path, names, replace=False)
+        # The file can't be replaced while it's still mapped on Windows
+        self.close()
+        os.replace(temp_path, self.file_path)
+        self._open()
+
+
+def pending_path(file_path: str) -> str:
+    """Where a synced store waits while `file_path` can't be replaced, see IndexSync"""
+    return f"{file_path}.pending"
+
+
+def write_name_store(file_path: str, names, replace: bool = True) -> str:
+    """
+    Writes `names` (any iterable of str, consumed once) as a name store.
+
+    The store is written next to `file_path` first and then moved over it, so
+    a crash never leaves a half written store behind. With `replace` set to
+    False the move is left to the caller and the temporary path is returned.
+    Every write gets its own temporary files, so concurrent writers never
+    share them.
+    """
+    directory, base = os.path.split(os.path.abspath(file_path))
+    blob_fd, blob_path = tempfile.mkstemp(prefix=f".{base}-", dir=directory)
+    temp_fd, temp_path = tempfile.mkstemp(prefix=f".{base}-", dir=directory)
+    os.close(temp_fd)
+    try:
+        _write_store(temp_path, blob_fd, blob_path, names)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    finally:
+        os.remove(blob_path)
+
+    if replace:
+        os.replace(temp_path, file_path)
+        return file_path
+    return temp_path
+
+
+def _write_store(temp_path: str, blob_fd: int, blob_path: str, names):
+    """Writes the names to the blob first, then the store at `temp_path` from it"""
+    offsets = array("I", [0])
+    with open(blob_fd, "wb") as blob:
+        for name in names:
+            offsets.append(offsets[-1] + blob.write(name.encode("utf-8")))
+    count = len(offsets) - 1
+
+    keys = [""] * count
+    if offsets[-1]:
+        with open(blob_path, "rb") as blob, mmap.mmap(
+            blob.fileno(), 0, access=mmap.ACCESS_READ
+        ) as blob_map:
+            keys = [
+                normalize_name(blob_map[offsets[i] : offsets[i + 1]].decode("utf-8"))
+                for i in range(count)
+            ]
+    order = array("I", sorted(range(count), key=keys.__getitem__))
+    del keys
+
+    with open(temp_path, "wb") as file, open(blob_path, "rb") as blob:
+        file.write(HEADER.pack(MAGIC, VERSION, count))
+        file.write(offsets.tobytes())
+        file.write(order.tobytes())
+        shutil.copyfileobj(blob, file)
+
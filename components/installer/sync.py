@@ -0,0 +1,119 @@
+import itertools
+import json
+import os
+import logging
+import requests
+from .store import NameStore, pending_path, write_name_store
+
+logger = logging.getLogger(__name__)
+
+SIMPLE_JSON = "application/vnd.pypi.simple.v1+json"
+
+
+class IndexSync:
+    """
+    Keeps the local name store in sync with the PEP 691 JSON simple index.
+
+    The `ETag` and `X-PyPI-Last-Serial` of the last applied response are saved
+    next to the store, every sync after the first one is a conditional request
+    which PyPI answers with a bodyless 304 when nothing changed. When the index
+    did change, only the added and removed names are applied, into a new
+    store, so the one in use can stay mapped and searchable while syncing.
+    """
+
+    def __init__(self, file_path: str, url: str, timeout: float = 30):
+        self.file_path = file_path
+        self.state_path = f"{os.path.splitext(file_path)[0]}.sync.json"
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({"User-Agent": "P4cMan"})
+
+    def load_state(self) -> dict:
+        try:
+            with open(self.state_path, "r") as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_state(self, etag: str, serial: int):
+        with open(self.state_path, "w") as file:
+            json.dump({"etag": etag, "last_serial": serial}, file, indent=4)
+
+    def fetch(self, etag: str = ""):
+        """
+        Requests the project list, conditionally when `etag` is given.
+
+        Returns None when PyPI answered 304, otherwise (names, etag, serial).
+        Raises ValueError when the server didn't answer with the JSON API.
+        """
+        headers = {"Accept": SIMPLE_JSON}
+        if etag:
+            headers["If-None-Match"] = etag
+        response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        if not response.headers.get("Content-Type", "").startswith(SIMPLE_JSON):
+            raise ValueError(
+                f"{self.url} answered with {response.headers.get('Content-Type')}"
+            )
+
+        data = response.json()
+        serial = response.headers.get("X-PyPI-Last-Serial") or data.get(
+            "meta", {}
+        ).get("_last-serial", 0)
+        names = [project["name"] for project in data.get("projects", [])]
+        return names, response.headers.get("ETag", ""), int(serial)
+
+    def _apply(self, store: NameStore, removed_ids: set, added: list) -> NameStore:
+        """Writes `store` without `removed_ids` and with `added` as a new store"""
+        kept = (name for idx, name in enumerate(store) if idx not in removed_ids)
+        temp_path = write_name_store(
+            self.file_path, itertools.chain(kept, added), replace=False
+        )
+        try:
+            # The old file stays mapped by `store` until it's no longer used
+            os.replace(temp_path, self.file_path)
+            return NameStore(self.file_path)
+        except PermissionError:
+            # Windows can't replace a mapped file, it's moved in place next launch
+            os.replace(temp_path, pending_path(self.file_path))
+            return NameStore(pending_path(self.file_path))
+
+    def sync(self, store: NameStore | None) -> NameStore:
+        """
+        Returns `store` brought up to date, creating the store when `store` is
+        None. `store` itself is never modified, when names changed a new store
+        is returned. Network errors are left to the caller.
+        """
+        state = self.load_state() if store is not None else {}
+        fetched = self.fetch(state.get("etag", ""))
+        if fetched is None:
+            logger.info(
+                "Package index not modified since serial %s", state.get("last_serial")
+            )
+            return store  # type: ignore
+        names, etag, serial = fetched
+
+        if store is None:
+            write_name_store(self.file_path, names)
+            store = NameStore(self.file_path)
+        elif serial != state.get("last_serial"):
+            current = set(names)
+            removed_ids = {idx for idx, name in enumerate(store) if name not in current}
+            del current
+            known = set(store)
+            added = [name for name in names if name not in known]
+            del known
+            if added or removed_ids:
+                logger.info(
+                    "Package index serial %s: %d added, %d removed",
+                    serial,
+                    len(added),
+                    len(removed_ids),
+                )
+                store = self._apply(store, removed_ids, added)
+
+        self.save_state(etag, serial)
+        return store
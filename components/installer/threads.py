@@ -1,7 +1,7 @@
-import json
-import subprocess
-from .utils import load_data
-from PyQt6.QtCore import QModelIndex, QObject, QThread, pyqtSignal
+from .utils import load_local_store, sync_store
+from .search import SearchIndex
+from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
+from helpers.pip_runner import run_pip, save_timings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,122 +12,262 @@ class GetAllLibraryFromPyPI(QThread):
         super().__init__(parent)
 
 
-class GettingInstallerLibraryDetails(QThread):
-    """
-    A QThread subclass that fetches details for a list of Python libraries
-    using an external Go executable.
-
-    It executes the Go program with the provided list of libraries, captures
-    its JSON output, and emits theS parsed dictionary result via the
-    `finished` signal.
+class InstallerLibraries(QThread):
     """
+    A QThread subclass for installing Python libraries using pip in a
+    separate background thread, as a single transaction.
 
-    finished = pyqtSignal(dict)
-
-    def __init__(self, go_executable, list_of_libraries, parent=None):
-        super().__init__(parent)
-        self.go_executable = go_executable
-        self.list_of_libraries = list_of_libraries
-
-    def run(self):
-        if self.list_of_libraries:
-            result = subprocess.run(
-                [self.go_executable, *self.list_of_libraries],
-                capture_output=True,
-                encoding="utf-8",
-                errors="ignore",  # Makes the process more robust
-                text=True,
-            )
-            if result.stderr:
-                logger.error(result.stderr)
-            try:
-                data = json.loads(result.stdout)
-                if isinstance(data, dict):
-                    self.finished.emit(data)
-            except Exception as e:
-                self.finished.emit({})
-                logger.error(e)
-                logger.info(result.stdout)
-        else:
-            self.finished.emit({})
-
+    It executes one 'pip install' command with the specified Python executable
+    for all the library names, so they get resolved together. When the
+    transaction fails, every library is installed again on its own, to find
+    out which of them can't be. The outcome of every library is emitted
+    through `package_finished`, followed by `finished`.
 
-class InstallerLibraries(QThread):
-    """
-    A QThread subclass for installing a single Python library using pip
-    in a separate background thread.
+    pip's output is streamed while it runs, every phase it goes through
+    (collecting, downloading, building, installing) is emitted as a PipEvent
+    through `progress`, and the timings of every run are saved for later.
 
-    It executes the 'pip install' command with the specified Python executable
-    and library name, capturing the output and emitting a signal upon completion
-    indicating success or failure.
+    `requirements` maps a library to what pip gets asked for in its place,
+    like the pins of a previewed resolution.
     """
 
-    finished = pyqtSignal(int, QModelIndex)
+    package_finished = pyqtSignal(str, int)  # (library_name, 1 or -1)
+    progress = pyqtSignal(object)  # PipEvent
+    finished = pyqtSignal(int)  # 1 when every library got installed, -1 otherwise
 
     def __init__(
-        self, python_exec_path, library_name, model_index: QModelIndex
+        self, python_exec_path, library_names: list, pip_args=(), requirements=None
     ) -> None:
         super().__init__()
         self.python_exec_path = python_exec_path
-        self.library_name = library_name
-        self.model_index = model_index
+        self.library_names = list(library_names)
+        self.pip_args = list(pip_args)
+        self.requirements = dict(requirements or {})
 
-    def run(self):
-        try:
-            # subprocess.run is a blocking call, which is now safely in the background
-            result = subprocess.run(
-                [self.python_exec_path, "-m", "pip", "install", self.library_name],
-                capture_output=True,
-                text=True,
-            )
+    def _pip_install(self, library_names: list) -> bool:
+        # pip's output is read as it's written, its phases come out through `progress`
+        result = run_pip(
+            self.python_exec_path,
+            [
+                "install",
+                "--progress-bar",
+                "off",
+                *self.pip_args,
+                *(
+                    requirement
+                    for library_name in library_names
+                    for requirement in self.requirements.get(
+                        library_name, [library_name]
+                    )
+                ),
+            ],
+            self.progress.emit,
+        )
+        save_timings("install", self.python_exec_path, library_names, result)
+        if result.returncode != 0 and result.output:
+            logger.error(result.output)
+        return result.returncode == 0
 
-            if result.stderr:
-                logger.error(result.stderr)
+    def run(self):
+        if self._pip_install(self.library_names):
+            for library_name in self.library_names:
+                self.package_finished.emit(library_name, 1)
+            self.finished.emit(1)
+            return
 
-            if result.returncode == 0:
-                self.finished.emit(1, self.model_index)
-            else:
-                self.finished.emit(-1, self.model_index)
+        if len(self.library_names) == 1:
+            self.package_finished.emit(self.library_names[0], -1)
+            self.finished.emit(-1)
+            return
 
-        except Exception as e:
-            logger.error(f"An exception occurred: {e}")
-            self.finished.emit(-1, self.model_index)  # Use -1 for exceptions
+        # pip doesn't tell which library broke the transaction
+        all_installed = True
+        for library_name in self.library_names:
+            installed = self._pip_install([library_name])
+            all_installed = all_installed and installed
+            self.package_finished.emit(library_name, 1 if installed else -1)
+        self.finished.emit(1 if all_installed else -1)
 
 
 class PyPiRunner(QObject):
     """This class is for fetching libraries for PyPI"""
 
-    list_of_libraries = pyqtSignal(list)
+    search_index = pyqtSignal(object)
 
-    def __init__(self, appName: str = "P4cMan", fileName: str = "library_list.txt"):
+    def __init__(
+        self,
+        appName: str = "P4cMan",
+        fileName: str = "library_list.bin",
+        indexUrl: str = "https://pypi.org/simple/",
+    ):
         super().__init__()
+        self.running = False
         self.thread_runner = QThread()
-        self.worker = PyPiWorker(appName, fileName)
+        self.worker = PyPiWorker(appName, fileName, indexUrl)
         self.worker.moveToThread(self.thread_runner)
 
         self.worker.finished.connect(self.thread_runner.quit)
         self.thread_runner.started.connect(self.worker.run)
-        self.worker.list_of_libraries.connect(self.list_of_libraries)
+        self.worker.search_index.connect(self.search_index)
 
+        # Connected before deleteLater, so the flag is cleared before the thread goes
+        self.thread_runner.finished.connect(self._on_finished)
         self.worker.finished.connect(self.worker.deleteLater)
         self.thread_runner.finished.connect(self.thread_runner.deleteLater)
 
     def startFetching(self):
+        self.running = True
         self.thread_runner.start()
 
+    def _on_finished(self):
+        self.running = False
+
 
 class PyPiWorker(QObject):
-    """Worker for fetching libraries from PyPI"""
+    """
+    Worker for fetching libraries from PyPI and indexing them for search.
 
-    list_of_libraries = pyqtSignal(list)
+    The index of the local name store is emitted first, so searching works
+    right away and offline. The store is synced with PyPI afterwards, and a
+    second index is emitted only when names were added or removed.
+    """
+
+    search_index = pyqtSignal(object)
     finished = pyqtSignal()
 
-    def __init__(self, appName: str = "P4cMan", fileName: str = "library_list.txt"):
+    def __init__(
+        self,
+        appName: str = "P4cMan",
+        fileName: str = "library_list.bin",
+        indexUrl: str = "https://pypi.org/simple/",
+    ):
         super().__init__()
         self.appName = appName
         self.fileName = fileName
+        self.indexUrl = indexUrl
 
     def run(self):
-        librarylist = load_data(self.appName, self.fileName)
-        self.list_of_libraries.emit(librarylist)
+        # Index is built here once, so searching never has to scan the whole list
+        name_store = load_local_store(self.appName, self.fileName)
+        if name_store is not None:
+            self.search_index.emit(SearchIndex(name_store, name_store.order))
+
+        synced = sync_store(name_store, self.appName, self.fileName, self.indexUrl)
+        if synced is None:
+            self.search_index.emit(SearchIndex([]))
+        elif synced is not name_store:
+            self.search_index.emit(SearchIndex(synced, synced.order))
         self.finished.emit()
+
+
+class SearchWorker(QObject):
+    """
+    Worker answering installer searches away from the GUI thread.
+
+    Every query carries a generation number, queries older than the latest one
+    requested are skipped without being searched.
+
+    Results come a page at a time from a SearchCursor, the cursor of the latest
+    query is kept so further pages can be requested with `fetch_more`.
+    """
+
+    results = pyqtSignal(int, list, bool)
+    more_results = pyqtSignal(int, list, bool)
+
+    def __init__(self, page_size: int = 50):
+        super().__init__()
+        self.page_size = page_size
+        self.latest_generation = 0
+        self.search_index = SearchIndex([])
+        self._cursor = None
+        self._cursor_generation = 0
+
+    @pyqtSlot(object)
+    def set_index(self, search_index):
+        # Removals only ever happen on this thread, so names removed from the
+        # previous index are carried over without racing a queued `remove`
+        previous = self.search_index
+        for idx in previous.removed_ids:
+            search_index.remove(previous.names[idx])
+        self.search_index = search_index
+        self._cursor = None
+
+    @pyqtSlot(str)
+    def remove(self, name: str):
+        # Removed ids are skipped as the cursor goes, it stays valid
+        self.search_index.remove(name)
+
+    @pyqtSlot(int, str)
+    def search(self, generation: int, query: str):
+        if generation < self.latest_generation:
+            return  # Superseded while waiting in the queue
+
+        self._cursor = self.search_index.cursor(query)
+        self._cursor_generation = generation
+        matches = self._cursor.next_page(self.page_size)
+
+        if generation == self.latest_generation:
+            self.results.emit(generation, matches, not self._cursor.exhausted)
+
+    @pyqtSlot(int)
+    def fetch_more(self, generation: int):
+        if self._cursor is None or generation != self._cursor_generation:
+            return  # The cursor was replaced by a newer query
+        matches = self._cursor.next_page(self.page_size)
+        self.more_results.emit(generation, matches, not self._cursor.exhausted)
+
+
+class SearchRunner(QObject):
+    """Owns the thread of the SearchWorker and relays its requests and results"""
+
+    results = pyqtSignal(int, list, bool)
+    more_results = pyqtSignal(int, list, bool)
+    search_requested = pyqtSignal(int, str)
+    more_requested = pyqtSignal(int)
+    index_changed = pyqtSignal(object)
+    remove_requested = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+        self.thread_search = QThread()
+        self.worker = SearchWorker()
+        self.worker.moveToThread(self.thread_search)
+
+        self.worker.results.connect(self._on_results)
+        self.worker.more_results.connect(self._on_more_results)
+        self.search_requested.connect(self.worker.search)
+        self.more_requested.connect(self.worker.fetch_more)
+        self.index_changed.connect(self.worker.set_index)
+        self.remove_requested.connect(self.worker.remove)
+        self.thread_search.start()
+
+    def search(self, query: str):
+        """Queues `query`, superseding every query queued before it"""
+        self.generation += 1
+        # Read by the worker before searching, so stale queued queries get skipped
+        self.worker.latest_generation = self.generation
+        self.search_requested.emit(self.generation, query)
+
+    def fetch_more(self):
+        """Requests the next page of results of the latest query"""
+        self.more_requested.emit(self.generation)
+
+    def set_index(self, search_index):
+        self.index_changed.emit(search_index)
+
+    def remove(self, name: str):
+        self.remove_requested.emit(name)
+
+    def _on_results(self, generation: int, matches: list, has_more: bool):
+        if generation == self.generation:
+            self.results.emit(generation, matches, has_more)
+
+    def _on_more_results(self, generation: int, matches: list, has_more: bool):
+        if generation == self.generation:
+            self.more_results.emit(generation, matches, has_more)
+
+    def quit(self):
+        if self.thread_search.isRunning():
+            self.thread_search.quit()
+            self.thread_search.wait()
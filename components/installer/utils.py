@@ -1,13 +1,19 @@
 import datetime
 import requests
-from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 import os
 import json
+import struct
 from helpers.utils import get_app_support_directory
+from .store import NameStore, pending_path, write_name_store
+from .sync import IndexSync
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Name list used to be saved as a JSON array before the name store
+LEGACY_FILE_NAME = "library_list.txt"
+
 
 def format_pypi_tooltip_html(pypi_data, font_family_name):
     """
@@ -162,44 +168,115 @@ def format_pypi_tooltip_html(pypi_data, font_family_name):
     """
 
 
-def save_file(
-    data: list, app_name: str = "P4cMan", file_name: str = "library_list.txt"
-):
-    """Saves data to a file in the application's support directory."""
-    # Saves Data in a pre-defined directory
-    app_support_dir = get_app_support_directory(app_name)
-    file_path = os.path.join(app_support_dir, file_name)
-    with open(file_path, "w") as file:
-        json.dump(data, file, indent=4)
+class AnchorTextParser(HTMLParser):
+    """
+    Incremental tokenizer collecting the text of every <a> tag.
+
+    HTML can be fed a chunk at a time, names completed so far are handed out
+    by `drain`, so only the names of the current chunk are ever held.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._names = []
+        self._text = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self._text = []
+
+    def handle_data(self, data):
+        if self._text is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self._text is not None:
+            self._names.append("".join(self._text).strip())
+            self._text = None
+
+    def drain(self) -> list:
+        names, self._names = self._names, []
+        return names
+
+
+def iter_simple_index_names(response, chunk_size: int = 64 * 1024):
+    """Yields the project names of a streamed HTML simple index response"""
+    if response.encoding is None:
+        response.encoding = "utf-8"
+    parser = AnchorTextParser()
+    for chunk in response.iter_content(chunk_size=chunk_size, decode_unicode=True):
+        parser.feed(chunk)
+        yield from parser.drain()
+    parser.close()
+    yield from parser.drain()
 
 
 def download_data_from_pypi(
-    app_name: str = "P4cMan", file_name: str = "library_list.txt"
-) -> list:
-    """Downloads the list of all PyPI packages and saves them to a file."""
-    # Downloads Data from PyPi.org
-    url = "https://pypi.org/simple/"
+    app_name: str = "P4cMan",
+    file_name: str = "library_list.bin",
+    url: str = "https://pypi.org/simple/",
+) -> NameStore:
+    """Downloads the list of all PyPI packages and saves them as a name store."""
+    # Downloads Data from PyPi.org, names go from the response into the store as they are parsed
     headers = {"User-Agent": "insomnia/11.4.0"}
-    response = requests.request("GET", url, data="", headers=headers)
-    soup = BeautifulSoup(response.text, "html.parser")
-    library_list = [tag.get_text() for tag in soup.find_all("a")]
-    save_file(library_list, app_name, file_name)
-    return library_list
+    file_path = os.path.join(get_app_support_directory(app_name), file_name)
+    with requests.get(url, headers=headers, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        write_name_store(file_path, iter_simple_index_names(response))
+    return NameStore(file_path)
 
 
-def load_data(app_name="P4cMan", file_name="library_list.txt") -> list:
-    """Loads data from a file in the application's support directory, downloading it if not present."""
-    # Loads Data from a pre-defined directory
-    try:
-        app_support_dir = get_app_support_directory(app_name)
-        file_path = os.path.join(app_support_dir, file_name)
+def migrate_legacy_list(legacy_path: str, file_path: str):
+    """Converts the old JSON list of names into a name store, removing the JSON file"""
+    with open(legacy_path, "r") as file:
+        write_name_store(file_path, json.load(file))
+    os.remove(legacy_path)
+
 
+def load_local_store(
+    app_name="P4cMan", file_name="library_list.bin"
+) -> NameStore | None:
+    """
+    Opens the name store in the application's support directory, without
+    going to the network. Returns None when there is no usable store yet.
+    """
+    file_path = os.path.join(get_app_support_directory(app_name), file_name)
+    try:
+        # Synced while the previous store was still mapped, see IndexSync
+        if os.path.exists(pending_path(file_path)):
+            os.replace(pending_path(file_path), file_path)
+        legacy_path = os.path.join(
+            get_app_support_directory(app_name), LEGACY_FILE_NAME
+        )
+        if not os.path.exists(file_path) and os.path.exists(legacy_path):
+            migrate_legacy_list(legacy_path, file_path)
         if os.path.exists(file_path):
-            with open(file_path, "r") as file:
-                data = json.load(file)
-        else:
-            data = download_data_from_pypi(app_name, file_name)
-    except Exception as e:
-        data = []
-        logging.error(f"Error loading data: {e}")
-    return data
+            return NameStore(file_path)
+    except (OSError, ValueError, struct.error) as e:
+        logger.error(f"Name store is unreadable, downloading again: {e}")
+    return None
+
+
+def sync_store(
+    store: NameStore | None,
+    app_name="P4cMan",
+    file_name="library_list.bin",
+    index_url="https://pypi.org/simple/",
+) -> NameStore | None:
+    """
+    Syncs the name store with the PyPI index, downloading the whole index if
+    `store` is None. Returns the synced store, `store` itself when nothing
+    changed or the index couldn't be reached.
+    """
+    file_path = os.path.join(get_app_support_directory(app_name), file_name)
+    try:
+        return IndexSync(file_path, index_url).sync(store)
+    except (requests.RequestException, ValueError) as e:
+        logger.error(f"Error syncing the package index: {e}")
+        if store is None:
+            try:
+                # JSON API unavailable, fall back to the HTML index
+                return download_data_from_pypi(app_name, file_name, index_url)
+            except Exception as e:
+                logger.error(f"Error loading data: {e}")
+    return store
@@ -0,0 +1,133 @@
+import heapq
+from PyQt6.QtCore import QEvent, QObject, QPoint, QTimer
+from PyQt6.QtWidgets import QListView
+from .fetcher import DetailsFetcher
+from .models import DataRole
+
+# Queue priorities, rows on screen go before the rows around them
+VISIBLE = 0
+PREFETCH = 1
+
+
+class ViewportTracker(QObject):
+    """
+    Requests library details for the rows of `view` which are on screen or
+    within `margin` rows of it, instead of every row of the search.
+
+    Once scrolling, resizing or the model settles for `interval` ms, the rows
+    still missing details are queued by priority (visible rows, then the
+    prefetch margin, nearest first) and sent to `fetcher` `batch_size` at a
+    time, the next batch only once the previous one was answered. The queue is
+    rebuilt from the viewport every time it changes, so rows which scrolled
+    away before their turn are dropped without being requested.
+    """
+
+    def __init__(
+        self,
+        view: QListView,
+        fetcher: DetailsFetcher,
+        margin: int = 20,
+        batch_size: int = 20,
+        interval: int = 100,
+    ):
+        super().__init__(view)
+        self.view = view
+        self.fetcher = fetcher
+        self.margin = margin
+        self.batch_size = batch_size
+        self._queue: list[tuple[int, int, int, str]] = []
+        # Names requested since the last model reset
+        self._requested: set[str] = set()
+        self._in_flight = None
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self._refresh)
+
+        self.view.verticalScrollBar().valueChanged.connect(self.schedule)
+        self.view.viewport().installEventFilter(self)
+        self.fetcher.request_finished.connect(self._on_request_finished)
+        self.set_model(self.view.model())
+
+    def set_model(self, model):
+        if model is None:
+            return
+        model.modelReset.connect(self._on_reset)
+        model.rowsInserted.connect(self.schedule)
+        model.rowsRemoved.connect(self.schedule)
+        model.layoutChanged.connect(self.schedule)
+
+    def eventFilter(self, a0, a1):
+        if a1 is not None and a1.type() in (QEvent.Type.Resize, QEvent.Type.Show):
+            self.schedule()
+        return False
+
+    def schedule(self):
+        """Refreshes the queue once the viewport stopped changing"""
+        self.timer.start()
+
+    def _on_reset(self):
+        # Rows of a new search start without details, even for known names
+        self._requested.clear()
+        self._queue.clear()
+        self.schedule()
+
+    def _row_at(self, y: int, step: int) -> int:
+        """Row at height `y` of the viewport, looking past the spacing between rows"""
+        x = self.view.viewport().width() // 2
+        for offset in range(0, 3 * self.view.spacing() + 2):
+            index = self.view.indexAt(QPoint(x, y + offset * step))
+            if index.isValid():
+                return index.row()
+        return -1
+
+    def visible_rows(self) -> tuple[int, int]:
+        """First and last row on screen, (-1, -1) when the view is empty"""
+        model = self.view.model()
+        row_count = model.rowCount() if model is not None else 0
+        if row_count == 0:
+            return -1, -1
+        first = self._row_at(0, 1)
+        last = self._row_at(self.view.viewport().height() - 1, -1)
+        if first == -1:
+            first = 0
+        if last == -1:
+            # The rows end before the bottom of the viewport
+            last = row_count - 1
+        return first, max(first, last)
+
+    def _refresh(self):
+        model = self.view.model()
+        first, last = self.visible_rows()
+        self._queue = []
+        if model is None or first == -1:
+            return
+        start = max(0, first - self.margin)
+        end = min(model.rowCount() - 1, last + self.margin)
+        for row in range(start, end + 1):
+            row_data = model.index(row, 0).data(DataRole) or {}
+            name = row_data.get("name", "")
+            if not name or "version" in row_data or name in self._requested:
+                continue
+            if first <= row <= last:
+                self._queue.append((VISIBLE, row - first, row, name))
+            else:
+                distance = first - row if row < first else row - last
+                self._queue.append((PREFETCH, distance, row, name))
+        heapq.heapify(self._queue)
+        self._dispatch()
+
+    def _dispatch(self):
+        if self._in_flight is not None or not self._queue:
+            return
+        names = []
+        while self._queue and len(names) < self.batch_size:
+            names.append(heapq.heappop(self._queue)[-1])
+        self._requested.update(names)
+        self._in_flight = self.fetcher.request(names)
+
+    def _on_request_finished(self, request_id: int):
+        if request_id == self._in_flight:
+            self._in_flight = None
+            self._dispatch()
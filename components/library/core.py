@@ -8,10 +8,9 @@ from PyQt6.QtWidgets import (
     QStackedWidget,
     QWidget,
     QVBoxLayout,
-    QListWidget,
+    QListView,
     QHBoxLayout,
     QLabel,
-    QListWidgetItem,
     QPushButton,
     QSizePolicy,
 )
@@ -21,17 +20,16 @@ from PyQt6.QtCore import (
     QTimer,
     Qt,
     pyqtSignal,
-    QSize,
     pyqtSlot,
 )
 from ..widgets.animate import animate_object
 from ..widgets.helper_classes import LineEdit
 from ..onboarding.utils import commit_action
 from ..onboarding.utils import loading_virtual_env
-from ..widgets.tooltip import InteractiveToolTip
 from ..widgets.buttons import RotatingPushButton
 from .threads import LibraryThreads, Uninstall
-from .utils import rank_query, human_readable_size, format_tooltip_html
+from .models import InstalledLibraryModel, LibraryFilterProxyModel
+from .delegates import InstalledLibraryDelegate
 from copy import deepcopy
 from helpers.utils import resource_path
 
@@ -68,7 +66,7 @@ class Library(QWidget):
 
     def _init_properties(self):
         """Initializes non-UI properties, caches, and maps."""
-        self.item_map = {}
+        self.all_items_data = []
         self.animate_env_box = False
         self.search_bar_hiding_animations = False
         self.search_bar_showing_animations = False
@@ -87,6 +85,7 @@ class Library(QWidget):
         """Initializes worker threads for fetching library details and virtual environment lists."""
         self.worker = LibraryThreads()
         self.worker.details.connect(self._handle_list_libraries)
+        self.worker.details_changed.connect(self._apply_library_changes)
         self.worker.virtual_envs.connect(self._venv_loaded_connected)
 
     def _init_ui(self):
@@ -340,7 +339,17 @@ class Library(QWidget):
         library_layout = QVBoxLayout()
         library_layout.setContentsMargins(0, 10, 0, 0)
         self.stacked_library_with_loading_screen = QStackedWidget()
-        self.library_list = QListWidget()
+        # Rows are painted by the delegate, searching only filters the proxy
+        self.library_list = QListView()
+        self.library_model = InstalledLibraryModel(self)
+        self.library_proxy = LibraryFilterProxyModel(self)
+        self.library_proxy.setSourceModel(self.library_model)
+        self.library_list.setModel(self.library_proxy)
+        self.library_delegate = InstalledLibraryDelegate(self.config, self.library_list)
+        self.library_delegate.uninstall_clicked.connect(self.start_library_uninstaller)
+        self.library_list.setItemDelegate(self.library_delegate)
+        self.library_list.setMouseTracking(True)
+        self.library_list.setUniformItemSizes(True)
         self.stacked_library_with_loading_screen.addWidget(self.library_list)
         self.loading_page = loading_virtual_env()
         self.stacked_library_with_loading_screen.addWidget(self.loading_page)
@@ -451,7 +460,7 @@ class Library(QWidget):
             # Manually trigger the load for the first item
             self._change_virtual_env(self.current_dir, self.current_virtual_env)
         else:
-            self.library_list.clear()  # No venvs found
+            self.library_model.setLibraries([])  # No venvs found
             QMessageBox.information(
                 self,
                 "No Environments",
@@ -543,124 +552,21 @@ class Library(QWidget):
         self.search_bar.show()
         self.all_items_data = [items["metadata"] for items in itemsList]
         self.libraries_emitter.emit(self.all_items_data)
+        self.library_model.setLibraries(self.all_items_data)
         self._sort_items_list()
 
     def _sort_items_list(self):
         """
-        Updates the library list with the provided items, applying search and sorting.
+        Applies the search query to the library list.
 
-        Args:
-            itemsList (list): A list of dictionaries, where each dictionary contains
-                              metadata about an installed library.
-            emit (bool, optional): Whether to emit the list_library_refreshed signal after
-                                   updating the list. Defaults to False, which starts a timer
-                                   to delay the signal emission.
+        Only the proxy model is updated: without a query every library is shown
+        sorted by name, with one the matches are shown ranked by `rank_query`.
         """
         self.search_bar.show()
-        query = self.search_bar.text()
-        items = []
-        if not query:
-            items = sorted(self.all_items_data, key=lambda x: x["name"])
-        else:
-            items = rank_query([item_data for item_data in self.all_items_data], query)
-
-        # Clear the UI and re-populate it with the sorted list
-        self.library_list.clear()
-        self.item_map.clear()
-        for item in items:
-            list_lbrary_widget = QWidget()
-            list_lbrary_widget.setObjectName("listLibraryWidget")
-            list_lbrary_widget.setFocusPolicy(Qt.FocusPolicy.NoFocus)
-            list_widget_layout = QHBoxLayout(list_lbrary_widget)
-            # All the QLabels
-
-            # Name of the Library
-            name_library_panel = QLabel(item["name"])
-            name_library_panel.setAlignment(Qt.AlignmentFlag.AlignVCenter)
-            name_library_panel.setObjectName("nameLibraryPanel")
-
-            # Version of the Library
-            version_library_panel = QLabel(item["version"])
-            version_library_panel.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            version_library_panel.setObjectName("versionLibraryPanel")
-
-            # Tag of The Library I means Installed outside and D means Downloaded from the world wide web
-            size_panel = QLabel()
-            size_panel.setText(human_readable_size(item["size"]))
-            size_panel.setFixedWidth(60)
-            size_panel.setObjectName("sizeLibraryPanel")
-
-            # Changing Properties of QLabels
-            uninstall_button = QPushButton()
-            uninstall_button.setFixedSize(30, 30)
-            uninstall_button.setObjectName("deleteButtonFromLibraryListWidget")
-            uninstall_button.setIcon(
-                QIcon(
-                    resource_path(
-                        self.config.get("paths", {})
-                        .get("assets", {})
-                        .get("images", {})
-                        .get("uninstall")
-                    ),
-                )
-            )
-            uninstall_button.setIconSize(QSize(22, 22))
-
-            classifiers = item.get("classifier", [])
-            classifiers = classifiers if classifiers else []
-            license = ""
-            if item.get("license_expression", "") != "":
-                license = item["license_expression"].strip()
-            for classifier in classifiers:
-                if "License :: OSI Approved" in classifier:
-                    license = classifier.split("::")[-1].strip()
-            if license == "":
-                for classifier in classifiers:
-                    if "License :: OSI Approved" in classifier:
-                        license = classifier.split("::")[-1].strip()
-                if item.get("license", "") != "":
-                    license = item["license"].strip()
-
-            license_panel = QLabel()
-            license_panel.setText(license.replace("License", "").strip())
-            license_panel.setAlignment(
-                Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
-            )
-            # license_panel.setFixedWidth(100)
-            license_panel.setObjectName("licenseLibraryPanel")
-            license_panel.setSizePolicy(
-                QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed
-            )
-
-            # Adding Widget in proper Order
-            list_widget_layout.addWidget(size_panel)
-            list_widget_layout.addWidget(name_library_panel)
-            list_widget_layout.addWidget(license_panel)
-            list_widget_layout.addWidget(version_library_panel)
-            list_widget_layout.addSpacing(100)
-            list_widget_layout.addWidget(uninstall_button)
-            listItem = QListWidgetItem(self.library_list)
-            listItem.setSizeHint(QSize(0, 55))
-            self.library_list.addItem(listItem)
-            self.library_list.setItemWidget(listItem, list_lbrary_widget)
-
-            interactiveToolTip = InteractiveToolTip(self)
-            interactiveToolTip.install_on(list_lbrary_widget)
-            interactiveToolTip.set_object_name("listLibraryWidgetToolTip")
-            interactiveToolTip.set_content(format_tooltip_html(item, "figtree"))
-
-            self.item_map[item["name"]] = (list_lbrary_widget, listItem)
-            uninstall_button.clicked.connect(
-                lambda checked=False,
-                packageName=item["name"],
-                uninstall_button=uninstall_button: self.start_library_uninstaller(
-                    packageName, uninstall_button
-                )
-            )
-
+        self.library_proxy.set_query(self.search_bar.text())
         self.stacked_library_with_loading_screen.setCurrentWidget(self.library_list)
 
-    def start_library_uninstaller(self, packageName, uninstall_button: QPushButton):
+    def start_library_uninstaller(self, packageName):
         """
         Initiates the uninstallation process for a specified library.
         Displays a confirmation dialog and starts a separate thread for the uninstall operation.
@@ -673,73 +579,74 @@ class Library(QWidget):
             QMessageBox.StandardButton.No,
         )
         if reply == QMessageBox.StandardButton.Yes:
-            if packageName in self.item_map:
-                uninstall_button.setIcon(
-                    QIcon(
-                        resource_path(
-                            self.config.get("paths", {})
-                            .get("assets", {})
-                            .get("images", {})
-                            .get("uninstalling", "")
-                        )
-                    )
+            self.library_model.updateRow(packageName, {"status": "uninstalling"})
+            self.uninstall_manager = Uninstall(self.python_exec_path, packageName)
+            self.uninstall_manager.progress.connect(
+                lambda event: self.library_model.updateRow(
+                    packageName, {"phase": "" if event.finished else event.label()}
                 )
-            self.uninstall_manager = Uninstall(
-                self.python_exec_path, packageName, uninstall_button
             )
             self.uninstall_manager.finished.connect(self.on_uninstall_finished)
             self.uninstall_manager.finished.connect(self.uninstall_manager.deleteLater)
             self.uninstall_manager.start()
 
     def refetch_libraries(self):
-        self._change_virtual_env(self.current_dir, self.current_virtual_env)
+        """Reloads only the libraries which changed since the environment was loaded"""
+        if not self.current_dir or not self.current_virtual_env:
+            return
+        self.worker.emit_signal_for_refresh(
+            self.current_dir,
+            resource_path(
+                self.config.get("paths", {})
+                .get("executables", {})
+                .get("load_library", {})
+                .get("darwin")
+            ),
+            self.current_virtual_env,
+        )
 
-    @pyqtSlot(int, str, str, QPushButton)
-    def on_uninstall_finished(
-        self, success, package_name, python_path, uninstall_button: QPushButton
-    ):
+    def _apply_library_changes(self, added: list, removed_names: list):
+        """Applies the rows added, changed or removed since the last load of the environment"""
+        added_data = [library["metadata"] for library in added]
+        # A changed library is removed and added again, with its new metadata
+        stale = set(removed_names) | {library["name"] for library in added_data}
+        self.all_items_data = [
+            item for item in self.all_items_data if item["name"] not in stale
+        ] + added_data
+        self.library_model.removeNames(stale)
+        self.library_model.insertLibraries(added_data)
+        if self.search_bar.text():
+            self.library_proxy.set_query(self.search_bar.text())
+        self.libraries_emitter.emit(self.all_items_data)
+
+    @pyqtSlot(int, str, str)
+    def on_uninstall_finished(self, success, package_name, python_path):
         """
         Handles the completion of an uninstall process.
 
         Updates the UI to reflect the success or failure of the uninstall operation,
-        including changing the icon of the uninstall button and, upon success,
-        removing the item from the list after a short delay.
+        by changing the status of the row of the package and, upon success,
+        removing the row from the list after a short delay.
 
         Args:
-            success (int): 1 if the uninstall was successful, 0 otherwise.
+            success (int): 1 if the uninstall was successful, -1 otherwise.
             package_name (str): The name of the package that was attempted to be uninstalled.
             python_path (str): The path to the Python executable used for the uninstall.
-            uninstall_button (QPushButton): The button associated with the uninstalled package.
         """
 
         def _pop_item_in_sometime(self):
-            listItem = self.item_map.pop(package_name)
-            if listItem:
-                row = self.library_list.row(listItem[1])
-                self.library_list.takeItem(row)
-
-        if success:
-            uninstall_button.setIcon(
-                QIcon(
-                    resource_path(
-                        self.config.get("paths", {})
-                        .get("assets", {})
-                        .get("images", {})
-                        .get("uninstalled", "")
-                    )
-                )
+            self.library_model.removeNames([package_name])
+            self.all_items_data = [
+                item for item in self.all_items_data if item["name"] != package_name
+            ]
+
+        if success == 1:
+            self.library_model.updateRow(
+                package_name, {"status": "uninstalled", "phase": ""}
             )
             QTimer.singleShot(2000, lambda: _pop_item_in_sometime(self))
         else:
-            uninstall_button.setIcon(
-                QIcon(
-                    resource_path(
-                        self.config.get("paths", {})
-                        .get("assets", {})
-                        .get("images", {})
-                        .get("failed", "")
-                    )
-                )
+            self.library_model.updateRow(
+                package_name, {"status": "failed", "phase": ""}
             )
-            uninstall_button.setEnabled(False)
         self.uninstall_manager = None
@@ -0,0 +1,264 @@
+from collections import OrderedDict
+from PyQt6.QtCore import QEvent, QModelIndex, QPoint, QRect, QSize, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QFontMetrics, QIcon, QPainter, QPainterPath
+from PyQt6.QtWidgets import QStyle, QStyledItemDelegate
+from ..widgets.tooltip import InteractiveToolTip
+from .models import DataRole
+from .utils import format_tooltip_html, size_with_unit
+from helpers.utils import resource_path
+
+# Widths of the fixed columns of a row
+SIZE_WIDTH = 60
+VERSION_WIDTH = 90
+BUTTON_SIZE = 30
+ICON_SIZE = 22
+# Rendered tooltips kept, least recently hovered first out
+MAX_TOOLTIPS = 256
+
+
+class InstalledLibraryDelegate(QStyledItemDelegate):
+    """
+    Paints a row of the installed library list: size, name, license, version
+    and the uninstall button, without a widget per row.
+
+    The uninstall button is only a hit area, clicking it emits
+    `uninstall_clicked` with the name of the library. Its icon follows the
+    'status' of the row and is loaded once per status.
+
+    One tooltip is shared by every row. Its HTML is only rendered when a row
+    is hovered, and kept per (name, version), so hovering the row again, or
+    the same version in another environment, doesn't render it again. The
+    tooltip's content is only replaced when another row is hovered.
+
+    Signals:
+        uninstall_clicked (str): Emitted with the name of the library whose uninstall button was clicked.
+    """
+
+    uninstall_clicked = pyqtSignal(str)
+
+    def __init__(self, config: dict, parent=None):
+        super().__init__(parent)
+        self.config = config
+        self.tooltip = InteractiveToolTip(parent)
+        self.tooltip.set_object_name("listLibraryWidgetToolTip")
+        colors = self.config.get("ui", {}).get("colors", {})
+        self.color_hover = QColor(
+            colors.get("background", {}).get("hover", QColor(255, 255, 255))
+        )
+        self.text_color = QColor(colors.get("text", {}).get("normal", QColor(0, 0, 0)))
+        self.color_muted = QColor(
+            colors.get("text", {}).get("muted", QColor(128, 128, 128))
+        )
+        self.color_bright = QColor(
+            colors.get("text", {}).get("bright", QColor(255, 255, 255))
+        )
+        self.rounded_corner_radius = (
+            self.config.get("ui", {})
+            .get("window", {})
+            .get("installer", {})
+            .get("roundedCornerRadius", 8)
+        )
+        self._icons: dict[str, QIcon] = {}
+        self._mouse_pos = QPoint(-1, -1)
+        self._button_hover = (-1, False)
+        self._tooltips: OrderedDict[tuple[str, str], str] = OrderedDict()
+        # (name, version) of the row the tooltip was last filled with
+        self._tooltip_key = None
+
+    def _icon(self, status: str) -> QIcon:
+        """Icon of the uninstall button for `status`, read from disk only the first time"""
+        icon = self._icons.get(status)
+        if icon is None:
+            icon = QIcon(
+                resource_path(
+                    self.config.get("paths", {})
+                    .get("assets", {})
+                    .get("images", {})
+                    .get(status, "")
+                )
+            )
+            self._icons[status] = icon
+        return icon
+
+    def _tooltip_html(self, item_data: dict) -> tuple[tuple[str, str], str]:
+        """Key and HTML of the tooltip of a row, rendered the first time it's needed"""
+        key = (item_data.get("name", ""), item_data.get("version", ""))
+        html = self._tooltips.get(key)
+        if html is None:
+            html = format_tooltip_html(item_data, "figtree")
+            self._tooltips[key] = html
+            if len(self._tooltips) > MAX_TOOLTIPS:
+                self._tooltips.popitem(last=False)
+        else:
+            self._tooltips.move_to_end(key)
+        return key, html
+
+    def _button_rect(self, rect: QRect) -> QRect:
+        """Where paint draws the uninstall button of the row in `rect`"""
+        return QRect(
+            rect.right() - BUTTON_SIZE - 10,
+            rect.center().y() - BUTTON_SIZE // 2,
+            BUTTON_SIZE,
+            BUTTON_SIZE,
+        )
+
+    def paint(self, painter: QPainter, option, index):  # type: ignore
+        item_data = index.data(DataRole)
+        if not item_data:
+            return
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rect = option.rect
+        hovering = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        if hovering:
+            path = QPainterPath()
+            path.addRoundedRect(
+                rect.toRectF(), self.rounded_corner_radius, self.rounded_corner_radius
+            )
+            painter.fillPath(path, self.color_hover)
+
+        content = rect.adjusted(10, 0, -10, 0)
+        button_rect = self._button_rect(rect)
+        size_rect = QRect(content.left(), content.top(), SIZE_WIDTH, content.height())
+        version_rect = QRect(
+            button_rect.left() - 100 - VERSION_WIDTH,
+            content.top(),
+            VERSION_WIDTH,
+            content.height(),
+        )
+        middle = QRect(
+            size_rect.right() + 10,
+            content.top(),
+            version_rect.left() - size_rect.right() - 20,
+            content.height(),
+        )
+        name_rect = QRect(
+            middle.left(), middle.top(), middle.width() // 2, middle.height()
+        )
+        license_rect = QRect(
+            name_rect.right() + 10,
+            middle.top(),
+            middle.width() - name_rect.width() - 10,
+            middle.height(),
+        )
+        centered = Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft
+        font = painter.font()
+
+        # Size, with a smaller unit and a line closing the column
+        value, unit = size_with_unit(item_data.get("size", 0))
+        painter.setPen(self.color_muted)
+        painter.drawText(size_rect, centered, value)
+        unit_font = painter.font()
+        unit_font.setPointSizeF(max(font.pointSizeF() - 3, 6))
+        painter.setFont(unit_font)
+        value_width = QFontMetrics(font).horizontalAdvance(value + " ")
+        painter.drawText(size_rect.adjusted(value_width, 0, 0, 0), centered, unit)
+        painter.setFont(font)
+        painter.setPen(self.color_bright)
+        painter.drawLine(
+            size_rect.right(),
+            size_rect.top() + 15,
+            size_rect.right(),
+            size_rect.bottom() - 15,
+        )
+
+        painter.setPen(self.text_color)
+        painter.drawText(
+            name_rect,
+            centered,
+            QFontMetrics(font).elidedText(
+                item_data.get("name", ""),
+                Qt.TextElideMode.ElideRight,
+                name_rect.width(),
+            ),
+        )
+
+        small_font = painter.font()
+        small_font.setPointSizeF(max(font.pointSizeF() - 2, 6))
+        painter.setFont(small_font)
+        painter.setPen(self.color_muted)
+        painter.drawText(
+            license_rect,
+            centered,
+            QFontMetrics(small_font).elidedText(
+                item_data.get("license_label", ""),
+                Qt.TextElideMode.ElideRight,
+                license_rect.width(),
+            ),
+        )
+
+        italic_font = painter.font()
+        italic_font.setPointSizeF(font.pointSizeF())
+        italic_font.setItalic(True)
+        painter.setFont(italic_font)
+        # What pip is doing while uninstalling, in place of the version
+        version_text = item_data.get("phase") or item_data.get("version", "")
+        painter.drawText(
+            version_rect,
+            Qt.AlignmentFlag.AlignCenter,
+            QFontMetrics(italic_font).elidedText(
+                version_text, Qt.TextElideMode.ElideRight, version_rect.width()
+            ),
+        )
+
+        if hovering and button_rect.contains(self._mouse_pos):
+            path = QPainterPath()
+            path.addRoundedRect(
+                button_rect.toRectF(),
+                self.rounded_corner_radius,
+                self.rounded_corner_radius,
+            )
+            painter.fillPath(path, self.color_hover.lighter(120))
+        icon_rect = QRect(0, 0, ICON_SIZE, ICON_SIZE)
+        icon_rect.moveCenter(button_rect.center())
+        self._icon(item_data.get("status", "uninstall")).paint(painter, icon_rect)
+        painter.restore()
+
+    def helpEvent(self, event, view, option, index) -> bool:
+        if event is None:
+            return False
+
+        if event.type() == QEvent.Type.ToolTip:  # type: ignore
+            item_data = index.data(DataRole)
+            if not item_data:
+                self.tooltip.hide()
+                return True
+            key, content = self._tooltip_html(item_data)
+            if key != self._tooltip_key:
+                self._tooltip_key = key
+                self.tooltip.set_content(content)
+                self.tooltip.adjustSize()
+            self.tooltip.schedule_show(
+                content, event.globalPos() + QPoint(15, 15), view.viewport()  # type: ignore
+            )
+            return True
+
+        self.tooltip.hide()
+        return super().helpEvent(event, view, option, index)
+
+    def editorEvent(self, event, model, option, index: QModelIndex) -> bool:
+        if event.type() == QEvent.Type.MouseMove:  # type: ignore
+            self._mouse_pos = event.position().toPoint()  # type: ignore
+            # Only repainted when the mouse enters or leaves the button
+            hover = (
+                index.row(),
+                self._button_rect(option.rect).contains(self._mouse_pos),
+            )
+            if hover != self._button_hover:
+                self._button_hover = hover
+                if option.widget:
+                    option.widget.update(index)  # type: ignore
+
+        if event.type() == QEvent.Type.MouseButtonRelease:  # type: ignore
+            item_data = index.data(DataRole)
+            if (
+                item_data
+                and item_data.get("status", "uninstall") == "uninstall"
+                and self._button_rect(option.rect).contains(event.position().toPoint())  # type: ignore
+            ):
+                self.uninstall_clicked.emit(item_data["name"])
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    def sizeHint(self, option, index):
+        return QSize(0, 55)
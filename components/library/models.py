@@ -0,0 +1,156 @@
+from PyQt6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QSortFilterProxyModel,
+    QVariant,
+    Qt,
+)
+from .utils import rank_query
+
+DataRole = Qt.ItemDataRole.UserRole + 1
+
+
+def license_of(item: dict) -> str:
+    """Short license of an installed library, from its metadata"""
+    classifiers = item.get("classifier", []) or []
+    license = ""
+    if item.get("license_expression", ""):
+        license = item["license_expression"].strip()
+    for classifier in classifiers:
+        if "License :: OSI Approved" in classifier:
+            license = classifier.split("::")[-1].strip()
+    if license == "" and item.get("license", ""):
+        license = item["license"].strip()
+    return license.replace("License", "").strip()
+
+
+class InstalledLibraryModel(QAbstractListModel):
+    """
+    Holds the metadata of the libraries installed in the selected environment,
+    one row per library, for the library list.
+
+    Every row is the metadata dictionary of a library, along with its short
+    'license_label' and the 'status' of its uninstall button ('uninstall',
+    'uninstalling', 'uninstalled' or 'failed'), both set once when the rows
+    are set. `name_to_row` maps a name back to its row.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: list[dict] = []
+        self.name_to_row: dict[str, int] = {}
+
+    def rowCount(self, parent=None):
+        return len(self._rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not (0 <= index.row() < len(self._rows)):
+            return QVariant()
+
+        row_item = self._rows[index.row()]
+        if role == DataRole:
+            return row_item
+        if role == Qt.ItemDataRole.DisplayRole:
+            return row_item.get("name", "")
+
+        return QVariant()
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+
+    def libraries(self) -> list:
+        return list(self._rows)
+
+    def row_data(self, name: str) -> dict | None:
+        row = self.name_to_row.get(name)
+        return self._rows[row] if row is not None else None
+
+    def _row_item(self, library: dict) -> dict:
+        return {**library, "license_label": license_of(library), "status": "uninstall"}
+
+    def setLibraries(self, libraries: list):
+        self.beginResetModel()
+        self._rows = [self._row_item(library) for library in libraries]
+        self.name_to_row = {
+            row_item["name"]: row for row, row_item in enumerate(self._rows)
+        }
+        self.endResetModel()
+
+    def insertLibraries(self, libraries: list):
+        """Appends rows for `libraries`, the proxy puts them in place"""
+        libraries = [
+            library for library in libraries if library["name"] not in self.name_to_row
+        ]
+        if not libraries:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(libraries) - 1)
+        for library in libraries:
+            self.name_to_row[library["name"]] = len(self._rows)
+            self._rows.append(self._row_item(library))
+        self.endInsertRows()
+
+    def updateRow(self, name: str, fields: dict):
+        row = self.name_to_row.get(name)
+        if row is None:
+            return
+        self._rows[row].update(fields)
+        self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
+
+    def removeNames(self, names):
+        """Removes the rows of `names`, from the bottom up so the rows left don't move"""
+        rows = sorted(
+            {self.name_to_row[name] for name in names if name in self.name_to_row},
+            reverse=True,
+        )
+        for row in rows:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.name_to_row[self._rows[row]["name"]]
+            del self._rows[row]
+            self.endRemoveRows()
+        if rows:
+            for moved in range(rows[-1], len(self._rows)):
+                self.name_to_row[self._rows[moved]["name"]] = moved
+
+
+class LibraryFilterProxyModel(QSortFilterProxyModel):
+    """
+    Filters and orders the installed libraries for the search bar.
+
+    Without a query every library is shown, sorted by name. With one, the
+    libraries are ranked once per query with `rank_query`, and only the
+    matches are shown, best match first. The source rows stay untouched,
+    changing the query only maps the indexes again.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.query = ""
+        # Position of every matching name in the ranking of the query
+        self._ranks: dict[str, int] = {}
+        self.setDynamicSortFilter(True)
+        self.sort(0)
+
+    def set_query(self, query: str):
+        self.query = query
+        source = self.sourceModel()
+        if query and source is not None:
+            ranked = rank_query(source.libraries(), query)
+            self._ranks = {item["name"]: rank for rank, item in enumerate(ranked)}
+        else:
+            self._ranks = {}
+        self.invalidate()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        if not self.query:
+            return True
+        name = self.sourceModel().index(source_row, 0, source_parent).data()
+        return name in self._ranks
+
+    def lessThan(self, left: QModelIndex, right: QModelIndex) -> bool:
+        left_name, right_name = left.data() or "", right.data() or ""
+        if self.query:
+            return self._ranks.get(left_name, 0) < self._ranks.get(right_name, 0)
+        return left_name < right_name
@@ -0,0 +1,145 @@
+import glob
+import os
+from importlib.metadata import PathDistribution
+from pathlib import Path
+
+
+def site_dirs_of(installed: list, venv_path: str) -> list:
+    """
+    Directories holding the distributions of an environment: where the
+    loaded distributions live, or the site-packages found under `venv_path`
+    when nothing was loaded yet.
+    """
+    site_dirs = {
+        os.path.dirname(library["metadata_location"])
+        for library in installed
+        if library.get("metadata_location", "").endswith(".dist-info")
+    }
+    if not site_dirs:
+        for pattern in (("lib*", "python*", "site-packages"), ("Lib", "site-packages")):
+            site_dirs.update(glob.glob(os.path.join(venv_path, *pattern)))
+    return sorted(site_dirs)
+
+
+def take_snapshot(site_dirs: list) -> dict[str, int]:
+    """Every `*.dist-info` directory of `site_dirs`, with the mtime of its METADATA"""
+    snapshot = {}
+    for site_dir in site_dirs:
+        try:
+            entries = list(os.scandir(site_dir))
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.name.endswith(".dist-info"):
+                continue
+            try:
+                snapshot[entry.path] = os.stat(
+                    os.path.join(entry.path, "METADATA")
+                ).st_mtime_ns
+            except OSError:
+                continue  # Half written or half removed, picked up next time
+    return snapshot
+
+
+def diff_snapshots(old: dict, new: dict) -> tuple[list[str], list[str]]:
+    """(added or changed, removed) dist-info directories between two snapshots"""
+    changed = [path for path, mtime in new.items() if old.get(path) != mtime]
+    removed = [path for path in old if path not in new]
+    return changed, removed
+
+
+def _record_files(distribution: PathDistribution, site_dir: str) -> dict:
+    """Files the RECORD of `distribution` lists in `site_dir`, with their RECORD size"""
+    files = {}
+    for file in distribution.files or ():
+        path = os.path.normpath(os.path.join(site_dir, str(file)))
+        if path.startswith(site_dir + os.sep) and path not in files:
+            files[path] = file.size
+    return files
+
+
+def file_owners(site_dir: str) -> dict[str, str]:
+    """
+    The dist-info directory every file of `site_dir` is counted for. Like
+    library-loader, a file listed by several distributions goes to the first
+    of them in directory order.
+    """
+    owners = {}
+    try:
+        entries = sorted(os.listdir(site_dir))
+    except OSError:
+        return owners
+    for entry in entries:
+        if not entry.endswith(".dist-info"):
+            continue
+        metadata_location = os.path.join(site_dir, entry)
+        distribution = PathDistribution(Path(metadata_location))
+        for path in _record_files(distribution, site_dir):
+            owners.setdefault(path, metadata_location)
+    return owners
+
+
+def distribution_size(
+    distribution: PathDistribution, metadata_location: str, owners=None
+) -> int:
+    """
+    Size of the files listed in the RECORD of `distribution`, within its
+    site-packages, the way library-loader counts them: the size column of the
+    RECORD where there is one, a stat of the file otherwise, and only the
+    files `owners` (see file_owners) counts for this distribution.
+    """
+    files = distribution.files
+    if files is None:
+        # No RECORD, only the metadata directory is known to belong to it
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(metadata_location)
+            for name in names
+        )
+    site_dir = os.path.dirname(metadata_location)
+    owners = owners or {}
+    total = 0
+    for path, size in _record_files(distribution, site_dir).items():
+        if owners.get(path, metadata_location) != metadata_location:
+            continue  # Counted for an earlier distribution
+        if size is not None:
+            total += size
+            continue
+        try:
+            total += os.lstat(path).st_size
+        except OSError:
+            continue
+    return total
+
+
+def load_distribution(metadata_location: str, owners=None) -> dict:
+    """
+    Metadata of one installed distribution, shaped like the output of
+    library-loader. `owners` is the file_owners of its site-packages, read
+    when not given.
+    """
+    if owners is None:
+        owners = file_owners(os.path.dirname(metadata_location))
+    distribution = PathDistribution(Path(metadata_location))
+    metadata = distribution.metadata
+    installer = distribution.read_text("INSTALLER") or ""
+    return {
+        "metadata": {
+            "name": metadata.get("Name", ""),
+            "version": metadata.get("Version", ""),
+            "summary": metadata.get("Summary", "") or "",
+            "size": distribution_size(distribution, metadata_location, owners),
+            "author": metadata.get("Author", "") or "",
+            "license": metadata.get("License", "") or "",
+            "license_expression": metadata.get("License-Expression", "") or "",
+            "license_file": metadata.get_all("License-File") or [],
+            "classifier": metadata.get_all("Classifier") or [],
+            "requires_dist": metadata.get_all("Requires-Dist") or [],
+            "requires_python": metadata.get("Requires-Python", "") or "",
+            "project_url": metadata.get_all("Project-URL") or [],
+            "provides_extra": metadata.get_all("Provides-Extra") or [],
+        },
+        "metadata_location": metadata_location,
+        "installer": installer.strip(),
+        "requested": distribution.read_text("REQUESTED") is not None,
+    }
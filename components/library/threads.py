@@ -2,7 +2,14 @@ import json
 import os
 import subprocess
 from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
-from PyQt6.QtWidgets import QPushButton
+from helpers.pip_runner import run_pip, save_timings
+from .snapshot import (
+    diff_snapshots,
+    file_owners,
+    load_distribution,
+    site_dirs_of,
+    take_snapshot,
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,31 +19,30 @@ class Uninstall(QThread):
     """
     A QThread subclass to handle the uninstallation of Python packages.
     It runs `pip uninstall` in a separate thread and emits a signal
-    with the result upon completion.
+    with the result upon completion. pip's output is streamed while it runs,
+    its phases are emitted through `progress` and their timings are saved.
     """
 
-    finished = pyqtSignal(
-        int, str, str, QPushButton
-    )  # (success_code, library_name, python_path, button)
+    progress = pyqtSignal(object)  # PipEvent
+    finished = pyqtSignal(int, str, str)  # (success_code, library_name, python_path)
 
-    def __init__(self, python_path, library, uninstall_button):
+    def __init__(self, python_path, library):
         super().__init__()
         self.python_path = python_path
         self.library = library
-        self.uninstall_button = uninstall_button
 
     def run(self):
-        result = subprocess.run(
-            [self.python_path, "-m", "pip", "uninstall", "-y", self.library],
-            text=True,
+        result = run_pip(
+            self.python_path, ["uninstall", "-y", self.library], self.progress.emit
         )
+        save_timings("uninstall", self.python_path, [self.library], result)
+        if result.returncode != 0 and result.output:
+            logger.error(result.output)
 
         if result.returncode == 0:
-            self.finished.emit(1, self.library, self.python_path, self.uninstall_button)
+            self.finished.emit(1, self.library, self.python_path)
         else:
-            self.finished.emit(
-                -1, self.library, self.python_path, self.uninstall_button
-            )
+            self.finished.emit(-1, self.library, self.python_path)
 
 
 class LibraryWorker(QObject):
@@ -44,12 +50,31 @@ class LibraryWorker(QObject):
     A QObject subclass that performs library-related operations
     (fetching details, managing virtual environments) in a separate thread.
     It emits signals upon completion of tasks.
+
+    After every full load of an environment, the `*.dist-info` directories of
+    its site-packages are kept as a snapshot, so a refresh after an install or
+    uninstall only loads the distributions which were added or changed since,
+    and emits them through `details_changed` along with the removed names.
     """
 
     details_with_virtual_envs = pyqtSignal(str, list, list)
     new_virtual_env = pyqtSignal(int, str, str, list)
     virtual_envs = pyqtSignal(list)
     details = pyqtSignal(list)
+    details_changed = pyqtSignal(list, list)  # (added or changed libraries, removed names)
+
+    def __init__(self):
+        super().__init__()
+        # (site dirs, snapshot, name of every dist-info directory), by environment path
+        self._snapshots: dict[str, tuple[list, dict, dict]] = {}
+
+    def _keep_snapshot(self, venv_path: str, details: list):
+        site_dirs = site_dirs_of(details, venv_path)
+        names = {
+            library.get("metadata_location", ""): library["metadata"]["name"]
+            for library in details
+        }
+        self._snapshots[venv_path] = (site_dirs, take_snapshot(site_dirs), names)
 
     @pyqtSlot(str, str, str)
     def fetch_only_details(self, directory: str, load_library_exe: str, venv_name: str):
@@ -74,11 +99,47 @@ class LibraryWorker(QObject):
             if details is None:
                 self.details.emit([])
             else:
+                self._keep_snapshot(os.path.join(directory, venv_name), details)
                 self.details.emit(details)
         except json.JSONDecodeError:
             self.details.emit([])
             return
 
+    @pyqtSlot(str, str, str)
+    def refresh_details(self, directory: str, load_library_exe: str, venv_name: str):
+        """
+        Loads only what changed in the environment since its last load, falls
+        back to a full load when the environment wasn't loaded before.
+        """
+        venv_path = os.path.join(directory, venv_name)
+        if directory == "" or venv_name == "" or venv_path not in self._snapshots:
+            self.fetch_only_details(directory, load_library_exe, venv_name)
+            return
+
+        site_dirs, old_snapshot, names = self._snapshots[venv_path]
+        new_snapshot = take_snapshot(site_dirs)
+        changed, removed = diff_snapshots(old_snapshot, new_snapshot)
+        removed_names = [names.pop(path) for path in removed if path in names]
+        added = []
+        # Read once per site-packages, however many distributions changed in it
+        owners = {}
+        for metadata_location in changed:
+            site_dir = os.path.dirname(metadata_location)
+            try:
+                if site_dir not in owners:
+                    owners[site_dir] = file_owners(site_dir)
+                library = load_distribution(metadata_location, owners[site_dir])
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to load {metadata_location}: {e}")
+                new_snapshot.pop(metadata_location, None)
+                continue
+            if not library["metadata"]["name"]:
+                continue
+            names[metadata_location] = library["metadata"]["name"]
+            added.append(library)
+        self._snapshots[venv_path] = (site_dirs, new_snapshot, names)
+        self.details_changed.emit(added, removed_names)
+
     @pyqtSlot(str, str)
     def fetch_virtual_envs(self, directory: str, find_env_exe: str):
         """fetches virtual environments by running the compiled Go Code"""
@@ -160,7 +221,9 @@ class LibraryThreads(QObject):
     details_with_virtual_envs = pyqtSignal(str, list, list)
     virtual_envs = pyqtSignal(list)
     details = pyqtSignal(list)
+    details_changed = pyqtSignal(list, list)
     get_details = pyqtSignal(str, str, str)
+    refresh_details = pyqtSignal(str, str, str)
     get_virtual_envs = pyqtSignal(str, str)
     get_details_with_virtual_envs = pyqtSignal(str, str, str)
     create_virtual_env = pyqtSignal(str, str, str, str)
@@ -175,15 +238,20 @@ class LibraryThreads(QObject):
         )
         self.worker.virtual_envs.connect(self.virtual_envs.emit)
         self.worker.details.connect(self.details.emit)
+        self.worker.details_changed.connect(self.details_changed.emit)
         self.worker.new_virtual_env.connect(self.new_virtual_env.emit)
         self.thread_library.start()
         self.get_details.connect(self.worker.fetch_only_details)
+        self.refresh_details.connect(self.worker.refresh_details)
         self.get_virtual_envs.connect(self.worker.fetch_virtual_envs)
         self.create_virtual_env.connect(self.worker.initialize_new_virtual_env)
 
     def emit_signal_for_details(self, directory, load_library_exe, venv_name):
         self.get_details.emit(directory, load_library_exe, venv_name)
 
+    def emit_signal_for_refresh(self, directory, load_library_exe, venv_name):
+        self.refresh_details.emit(directory, load_library_exe, venv_name)
+
     def emit_signal_for_virtual_envs(self, directory, load_library_exe):
         self.get_virtual_envs.emit(directory, load_library_exe)
 
@@ -1,57 +1,70 @@
+from helpers.ranking import rank
+
+
 def rank_query(dataList, query):
     """
     Ranks a list of data items based on a query string.
 
-    The function filters `dataList` to find items whose 'name' field (case-insensitive) contains the `query` string (case-insensitive).
-    The matching items are then sorted by the position of the first occurrence of the `query` within their 'name' field.
-    Items where the query appears earlier in the name will be ranked higher.
+    The items are scored on their 'name' field with the shared ranking engine
+    (see helpers.ranking): exact matches come first, then names starting with
+    the query, names with a '-'/'_'/'.' separated word starting with it, names
+    containing it and finally names within a typo or two of it. Separators are
+    treated as equal and the comparison ignores case.
 
     Args:
         dataList (list): A list of dictionaries, where each dictionary is expected to have a 'name' key (str).
         query (str): The search string to use for filtering and ranking.
 
     Returns:
-        list: A new list containing the matching items from `dataList`, sorted by the relevance of the query's
-              position within their 'name'. If no matches are found, an empty list is returned.
+        list: A new list containing the matching items from `dataList`, best match first.
+              If no matches are found, an empty list is returned.
     """
-    lower_query = query.lower()
-    matches = [item for item in dataList if lower_query in item["name"].lower()]
-    sorted_matches = sorted(
-        matches, key=lambda item: item["name"].lower().find(lower_query)
-    )
-    return sorted_matches
+    return rank(dataList, query, name=lambda item: item["name"])
 
 
-def human_readable_size(size: int) -> str:
+def size_with_unit(size: int) -> tuple[str, str]:
     """
-    Converts a size in bytes into a human-readable string with appropriate units.
-
-    The function formats the given size (in bytes) into a more readable format,
-    using B, KB, MB, or GB units, rounded to two decimal places.
-    It also wraps the unit in an HTML `<span>` tag for styling.
+    Splits a size in bytes into its value and unit, using b, B, KB, MB or GB,
+    with the value rounded to two decimal places.
 
     Args:
         size (int): The size in bytes (e.g., file size).
 
     Returns:
-        str: A string representing the size with its unit,
-             e.g., "1.23 <span style='font-size:8pt'>KB</span>".
+        tuple: The value and the unit, e.g. ("1.23", "KB").
     """
     if size / (1024 * 1024 * 1024) < 0.1:
         if size / (1024 * 1024) < 0.1:
             if size / (1024) < 0.1:
                 if size < 0.1:
-                    return f"{size * 8} <span style='font-size:8pt'>b</span>"
+                    return f"{size * 8}", "b"
                 else:
-                    return f"{size:.2f} <span style='font-size:8pt'>B</span>"
+                    return f"{size:.2f}", "B"
             else:
-                return f"{size / 1024:.2f} <span style='font-size:8pt'>KB</span>"
+                return f"{size / 1024:.2f}", "KB"
         else:
-            return f"{size / (1024 * 1024):.2f} <span style='font-size:8pt'>MB</span>"
+            return f"{size / (1024 * 1024):.2f}", "MB"
     else:
-        return (
-            f"{size / (1024 * 1024 * 1024):.2f} <span style='font-size:8pt'>GB</span>"
-        )
+        return f"{size / (1024 * 1024 * 1024):.2f}", "GB"
+
+
+def human_readable_size(size: int) -> str:
+    """
+    Converts a size in bytes into a human-readable string with appropriate units.
+
+    The function formats the given size (in bytes) into a more readable format,
+    using B, KB, MB, or GB units, rounded to two decimal places.
+    It also wraps the unit in an HTML `<span>` tag for styling.
+
+    Args:
+        size (int): The size in bytes (e.g., file size).
+
+    Returns:
+        str: A string representing the size with its unit,
+             e.g., "1.23 <span style='font-size:8pt'>KB</span>".
+    """
+    value, unit = size_with_unit(size)
+    return f"{value} <span style='font-size:8pt'>{unit}</span>"
 
 
 def format_project_urls(urls):
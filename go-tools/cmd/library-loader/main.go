@@ -2,8 +2,8 @@ package main
 
 import (
 	"bytes"
-	"encoding/csv"
 	"encoding/json"
+	"flag"
 	"io"
 	"io/fs"
 	"log/slog"
@@ -43,8 +43,13 @@ type libraries struct {
 	Installed  []Installed `json:"installed"`
 }
 
+var use_pip_inspect = flag.Bool("inspect", false, "list the installed distributions with pip inspect instead of reading their metadata directly")
+var use_size_cache = flag.Bool("size-cache", true, "reuse the sizes of distributions whose RECORD didn't change since the last run")
+
 type Job struct {
-	LibraryIdx  int
+	LibraryIdx int
+	// Files listed in the RECORD, and directories walked for distributions without one
+	Files       []record_file
 	PathsToScan []string
 }
 
@@ -53,6 +58,12 @@ type result struct {
 	size       int64
 }
 
+// Distribution whose size is being computed, to be stored in the size cache
+type pending_size struct {
+	metadata_location string
+	fingerprint       record_fingerprint
+}
+
 func (libraries *libraries) remove(name string) {
 	for index, installed := range libraries.Installed {
 		if name == installed.Metadata.Name {
@@ -62,19 +73,6 @@ func (libraries *libraries) remove(name string) {
 	}
 }
 
-// Get the path to the site-packages directory within a virtual environment.
-func get_site_package_main(python_exec *string) (string, error) {
-
-	code := "import sysconfig; print(sysconfig.get_paths()['purelib'])"
-	cmd := exec.Command(*python_exec, "-c", code)
-	stdout, err := cmd.Output()
-	if err != nil {
-		slog.Error("Error getting site-packages path", "error", err)
-		return "", err
-	}
-	return strings.TrimSpace(string(stdout)), nil
-}
-
 // Gets the size of the directory
 func get_path_size(paths []string) int64 {
 
@@ -105,7 +103,7 @@ func worker(id int, wg *sync.WaitGroup, jobs <-chan Job, results chan<- result)
 	defer wg.Done()
 
 	for job := range jobs {
-		size := get_path_size(job.PathsToScan)
+		size := get_record_size(job.Files) + get_path_size(job.PathsToScan)
 		results <- result{
 			LibraryIdx: job.LibraryIdx,
 			size:       size,
@@ -113,30 +111,20 @@ func worker(id int, wg *sync.WaitGroup, jobs <-chan Job, results chan<- result)
 	}
 }
 
-func get_installed_libraries_with_size(venv_path string) (libraries, error) {
-	venv_path_abs, err := filepath.Abs(venv_path)
-	if err != nil {
-		slog.Error("Error while absoluting paths", "error", err)
-		return libraries{}, err
-	}
+// Lists the installed distributions with pip inspect, which runs the environment's pip.
+func read_installed_with_pip(venv_path_abs string) (libraries, error) {
 	bin_dir := filepath.Join(venv_path_abs, "bin")
 	operating_system := runtime.GOOS
 	if operating_system == "windows" {
 		bin_dir = filepath.Join(venv_path_abs, "Scripts")
 	}
-	python_exec := filepath.Join(bin_dir, "python")
 	pip_exec := filepath.Join(bin_dir, "pip")
-	site_packages_path, site_err := get_site_package_main(&python_exec)
-	if site_err != nil {
-		slog.Error("Error while getting site packages path", "error", site_err)
-		return libraries{}, err
-	}
 
 	cmd := exec.Command(pip_exec, "inspect")
 
-	stdout, inspect_err := cmd.StdoutPipe()
-	if inspect_err != nil {
-		slog.Error("Error while creating stdout pipe", "error", inspect_err)
+	stdout, err := cmd.StdoutPipe()
+	if err != nil {
+		slog.Error("Error while creating stdout pipe", "error", err)
 		return libraries{}, err
 	}
 
@@ -159,13 +147,81 @@ func get_installed_libraries_with_size(venv_path string) (libraries, error) {
 		slog.Error("Error unmarshalling JSON", "error", err)
 		return libraries{}, err
 	}
+	return library_data, nil
+}
+
+func get_installed_libraries_with_size(venv_path string) (libraries, error) {
+	venv_path_abs, err := filepath.Abs(venv_path)
+	if err != nil {
+		slog.Error("Error while absoluting paths", "error", err)
+		return libraries{}, err
+	}
+
+	var library_data libraries
+	if !*use_pip_inspect {
+		library_data, err = read_installed_natively(venv_path_abs)
+		if err != nil || len(library_data.Installed) == 0 {
+			slog.Warn("Reading metadata directly found nothing, falling back to pip inspect", "error", err)
+		}
+	}
+	if *use_pip_inspect || err != nil || len(library_data.Installed) == 0 {
+		library_data, err = read_installed_with_pip(venv_path_abs)
+		if err != nil {
+			return libraries{}, err
+		}
+	}
 
 	num_libraries := len(library_data.Installed)
-	jobs := make(chan Job, num_libraries)
-	results := make(chan result, num_libraries)
+
+	// RECORDs are read up front, a file two distributions list is only counted for one of them
+	records := make([][]record_file, num_libraries)
+	has_record := make([]bool, num_libraries)
+	record_jobs := make(chan int, num_libraries)
+	for index := range library_data.Installed {
+		record_jobs <- index
+	}
+	close(record_jobs)
 
 	number_of_worker := min(runtime.NumCPU(), 8)
 
+	var record_wg sync.WaitGroup
+	for range number_of_worker {
+		record_wg.Add(1)
+		go func() {
+			defer record_wg.Done()
+			for index := range record_jobs {
+				files, err := read_record(library_data.Installed[index].MetadataLocation)
+				if err == nil {
+					records[index] = files
+					has_record[index] = true
+				}
+			}
+		}()
+	}
+	record_wg.Wait()
+
+	// Namespace trees, or files a distribution overwrote, go to the first distribution listing them.
+	// Both sides depend on each other then, so neither is cached.
+	owners := make(map[string]int)
+	shared := make([]bool, num_libraries)
+	for index, files := range records {
+		owned := files[:0]
+		for _, file := range files {
+			owner, claimed := owners[file.path]
+			if !claimed {
+				owners[file.path] = index
+				owned = append(owned, file)
+			} else if owner != index {
+				shared[index] = true
+				shared[owner] = true
+			}
+		}
+		records[index] = owned
+	}
+
+	jobs := make(chan Job, num_libraries)
+	results := make(chan result, num_libraries)
+
 	var wg sync.WaitGroup
 
 	for w := range number_of_worker {
@@ -173,42 +229,33 @@ func get_installed_libraries_with_size(venv_path string) (libraries, error) {
 		go worker(w, &wg, jobs, results)
 	}
 
+	var cache *size_cache
+	if *use_size_cache {
+		if path := size_cache_path(); path != "" {
+			cache = open_size_cache(path)
+		}
+	}
+	pending := make(map[int]pending_size)
+
 	for index, installed_libraries := range library_data.Installed {
 		metadata_location := installed_libraries.MetadataLocation
-		record_path := filepath.Join(metadata_location, "RECORD")
-		paths_to_Size := make(map[string]struct{})
-		file, err := os.Open(record_path)
-		if err == nil {
-			defer file.Close()
-
-			record_file := csv.NewReader(file)
-			for {
-				record, err := record_file.Read()
-				if err == io.EOF {
-					break
-				} else if err != nil {
+		if !has_record[index] {
+			// Nothing says which files are its own, only the metadata directory is sized
+			jobs <- Job{LibraryIdx: index, PathsToScan: []string{metadata_location}}
+			continue
+		}
+		if cache != nil && !shared[index] {
+			// Unchanged since the last run, its files weren't touched either
+			fingerprint, ok := fingerprint_record(metadata_location)
+			if ok {
+				if size, hit := cache.lookup(metadata_location, fingerprint); hit {
+					library_data.Installed[index].Metadata.Size = size
 					continue
 				}
-				relative_row := record[0]
-				abs_file_path, err := filepath.Abs(filepath.Join(site_packages_path, relative_row))
-				if strings.HasPrefix(abs_file_path, site_packages_path) {
-					parts := strings.Split(relative_row, string(filepath.Separator))
-					if len(parts) > 0 && !strings.Contains("__pycache__", relative_row) {
-						top_level := parts[0]
-						paths_to_Size[filepath.Join(site_packages_path, top_level)] = struct{}{}
-					}
-				}
+				pending[index] = pending_size{metadata_location, fingerprint}
 			}
-
-		} else {
-			paths_to_Size[metadata_location] = struct{}{}
-		}
-
-		paths := make([]string, 0, len(paths_to_Size))
-		for p := range paths_to_Size {
-			paths = append(paths, p)
 		}
-		jobs <- Job{LibraryIdx: index, PathsToScan: paths}
+		jobs <- Job{LibraryIdx: index, Files: records[index]}
 	}
 
 	close(jobs)
@@ -220,6 +267,16 @@ func get_installed_libraries_with_size(venv_path string) (libraries, error) {
 
 	for res := range results {
 		library_data.Installed[res.LibraryIdx].Metadata.Size = res.size
+		if entry, ok := pending[res.LibraryIdx]; ok {
+			cache.store(entry.metadata_location, entry.fingerprint, res.size)
+		}
+	}
+
+	if cache != nil {
+		cache.prune(library_data.Installed)
+		if err := cache.save(); err != nil {
+			slog.Warn("Failed to save the size cache", "error", err)
+		}
 	}
 
 	return library_data, nil
@@ -236,7 +293,8 @@ func main() {
 	encoder := json.NewEncoder(multi_encoder)
 	encoder.SetEscapeHTML(false)
 
-	virtual_env_dir := os.Args[1:][0]
+	flag.Parse()
+	virtual_env_dir := flag.Arg(0)
 
 	virtual_env_path := strings.TrimSpace(virtual_env_dir)
 	site_packages_path, err := get_installed_libraries_with_size(virtual_env_path)
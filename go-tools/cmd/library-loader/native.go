@@ -0,0 +1,196 @@
+package main
+
+import (
+	"bufio"
+	"errors"
+	"os"
+	"path/filepath"
+	"regexp"
+	"runtime"
+	"strings"
+	"sync"
+)
+
+var error_no_site_packages = errors.New("no site-packages found")
+
+// Site-packages directories of a virtual environment, found without running its Python.
+func find_site_packages(venv_path string) []string {
+	patterns := []string{
+		filepath.Join(venv_path, "lib", "python*", "site-packages"),
+		filepath.Join(venv_path, "lib64", "python*", "site-packages"),
+		filepath.Join(venv_path, "Lib", "site-packages"),
+	}
+	seen := make(map[string]struct{})
+	var site_dirs []string
+	for _, pattern := range patterns {
+		matches, _ := filepath.Glob(pattern)
+		for _, match := range matches {
+			// lib64 is often a link to lib, the same directory is read once
+			resolved, err := filepath.EvalSymlinks(match)
+			if err != nil {
+				continue
+			}
+			if _, ok := seen[resolved]; ok {
+				continue
+			}
+			seen[resolved] = struct{}{}
+			site_dirs = append(site_dirs, match)
+		}
+	}
+	return site_dirs
+}
+
+// Reads the headers of an RFC 822 style METADATA or PKG-INFO file, keyed by lowercased name.
+// Continuation lines are joined to their header, the body after the first blank line is skipped.
+func parse_metadata_file(path string) (map[string][]string, error) {
+	file, err := os.Open(path)
+	if err != nil {
+		return nil, err
+	}
+	defer file.Close()
+
+	headers := make(map[string][]string)
+	scanner := bufio.NewScanner(file)
+	scanner.Buffer(make([]byte, 64*1024), 4<<20)
+	var last_key string
+	for scanner.Scan() {
+		line := scanner.Text()
+		if line == "" {
+			break
+		}
+		if (line[0] == ' ' || line[0] == '\t') && last_key != "" {
+			values := headers[last_key]
+			values[len(values)-1] += "\n" + strings.TrimSpace(line)
+			continue
+		}
+		key, value, found := strings.Cut(line, ":")
+		if !found {
+			continue
+		}
+		last_key = strings.ToLower(strings.TrimSpace(key))
+		headers[last_key] = append(headers[last_key], strings.TrimSpace(value))
+	}
+	return headers, scanner.Err()
+}
+
+func first_header(headers map[string][]string, key string) string {
+	if values := headers[key]; len(values) > 0 {
+		return values[0]
+	}
+	return ""
+}
+
+// Reads one *.dist-info or *.egg-info entry into the shape pip inspect gives it.
+func read_distribution(metadata_location string, is_dir bool) (Installed, error) {
+	metadata_file := metadata_location
+	if is_dir {
+		metadata_file = filepath.Join(metadata_location, "METADATA")
+		if strings.HasSuffix(metadata_location, ".egg-info") {
+			metadata_file = filepath.Join(metadata_location, "PKG-INFO")
+		}
+	}
+	headers, err := parse_metadata_file(metadata_file)
+	if err != nil {
+		return Installed{}, err
+	}
+
+	installed := Installed{
+		Metadata: Metadata{
+			Name:                 first_header(headers, "name"),
+			Version:              first_header(headers, "version"),
+			Summary:              first_header(headers, "summary"),
+			Author:               first_header(headers, "author"),
+			License:              first_header(headers, "license"),
+			LicenseExpression:    first_header(headers, "license-expression"),
+			LicenseFile:          headers["license-file"],
+			Classifiers:          headers["classifier"],
+			RequiresDistribution: headers["requires-dist"],
+			RequiresPython:       first_header(headers, "requires-python"),
+			ProjectUrl:           headers["project-url"],
+			ProvidesExtra:        headers["provides-extra"],
+		},
+		MetadataLocation: metadata_location,
+	}
+	if is_dir {
+		if installer, err := os.ReadFile(filepath.Join(metadata_location, "INSTALLER")); err == nil {
+			installed.Installer = strings.TrimSpace(string(installer))
+		}
+		if _, err := os.Stat(filepath.Join(metadata_location, "REQUESTED")); err == nil {
+			installed.Requested = true
+		}
+	}
+	return installed, nil
+}
+
+// Lists the installed distributions by reading their metadata directly, without pip.
+func read_installed_natively(venv_path string) (libraries, error) {
+	site_dirs := find_site_packages(venv_path)
+	if len(site_dirs) == 0 {
+		return libraries{}, error_no_site_packages
+	}
+
+	type entry struct {
+		path   string
+		is_dir bool
+	}
+	var entries []entry
+	for _, site_dir := range site_dirs {
+		dir_entries, err := os.ReadDir(site_dir)
+		if err != nil {
+			continue
+		}
+		for _, dir_entry := range dir_entries {
+			name := dir_entry.Name()
+			if strings.HasSuffix(name, ".dist-info") || strings.HasSuffix(name, ".egg-info") {
+				entries = append(entries, entry{filepath.Join(site_dir, name), dir_entry.IsDir()})
+			}
+		}
+	}
+
+	found := make([]Installed, len(entries))
+	jobs := make(chan int, len(entries))
+	for index := range entries {
+		jobs <- index
+	}
+	close(jobs)
+
+	number_of_worker := min(runtime.NumCPU(), 8)
+	var wg sync.WaitGroup
+	for range number_of_worker {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			for index := range jobs {
+				installed, err := read_distribution(entries[index].path, entries[index].is_dir)
+				if err != nil {
+					continue
+				}
+				found[index] = installed
+			}
+		}()
+	}
+	wg.Wait()
+
+	// Keeps the first distribution of every name, like the import system would
+	library_data := libraries{Installed: make([]Installed, 0, len(found))}
+	seen := make(map[string]struct{})
+	for _, installed := range found {
+		name := normalize_name(installed.Metadata.Name)
+		if name == "" {
+			continue
+		}
+		if _, ok := seen[name]; ok {
+			continue
+		}
+		seen[name] = struct{}{}
+		library_data.Installed = append(library_data.Installed, installed)
+	}
+	return library_data, nil
+}
+
+var normalize_pattern = regexp.MustCompile(`[-_.]+`)
+
+// PEP 503 normalized name
+func normalize_name(name string) string {
+	return strings.ToLower(normalize_pattern.ReplaceAllString(strings.TrimSpace(name), "-"))
+}
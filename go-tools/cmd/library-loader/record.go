@@ -0,0 +1,71 @@
+package main
+
+import (
+	"encoding/csv"
+	"io"
+	"os"
+	"path/filepath"
+	"strconv"
+	"strings"
+)
+
+// A file listed in the RECORD of a distribution
+type record_file struct {
+	path string
+	// Size from the RECORD, -1 when it isn't listed there, as for .pyc files and RECORD itself
+	size int64
+}
+
+// Files of a distribution according to its RECORD, limited to its site-packages.
+// Scripts and data installed outside of it, like ../../../bin/*, aren't counted.
+func read_record(metadata_location string) ([]record_file, error) {
+	file, err := os.Open(filepath.Join(metadata_location, "RECORD"))
+	if err != nil {
+		return nil, err
+	}
+	defer file.Close()
+
+	// RECORD paths are relative to the directory holding the dist-info
+	site_packages_path := filepath.Dir(metadata_location)
+	prefix := site_packages_path + string(filepath.Separator)
+	record_reader := csv.NewReader(file)
+	record_reader.FieldsPerRecord = -1
+	var files []record_file
+	for {
+		row, err := record_reader.Read()
+		if err == io.EOF {
+			break
+		} else if err != nil || len(row) == 0 || row[0] == "" {
+			continue
+		}
+		path := filepath.Clean(filepath.Join(site_packages_path, filepath.FromSlash(row[0])))
+		if !strings.HasPrefix(path, prefix) {
+			continue
+		}
+		size := int64(-1)
+		if len(row) >= 3 && row[2] != "" {
+			if parsed, err := strconv.ParseInt(row[2], 10, 64); err == nil {
+				size = parsed
+			}
+		}
+		files = append(files, record_file{path: path, size: size})
+	}
+	return files, nil
+}
+
+// Total size of the files, stat-ing only those the RECORD gives no size for
+func get_record_size(files []record_file) int64 {
+	var total_size int64 = 0
+	for _, file := range files {
+		if file.size >= 0 {
+			total_size += file.size
+			continue
+		}
+		info, err := os.Lstat(file.path)
+		if err != nil {
+			continue
+		}
+		total_size += info.Size()
+	}
+	return total_size
+}
@@ -0,0 +1,128 @@
+package main
+
+import (
+	"os"
+	"path/filepath"
+	"strings"
+	"testing"
+)
+
+func write_file(t *testing.T, path string, content string) {
+	t.Helper()
+	if err := os.MkdirAll(filepath.Dir(path), 0755); err != nil {
+		t.Fatal(err)
+	}
+	if err := os.WriteFile(path, []byte(content), 0644); err != nil {
+		t.Fatal(err)
+	}
+}
+
+// A dist-info directory of name in site_dir, whose RECORD holds rows
+func write_distribution(t *testing.T, site_dir string, name string, rows ...string) string {
+	t.Helper()
+	metadata_location := filepath.Join(site_dir, name+"-1.0.dist-info")
+	write_file(t, filepath.Join(metadata_location, "METADATA"), "Metadata-Version: 2.1\nName: "+name+"\nVersion: 1.0\n\n")
+	write_file(t, filepath.Join(metadata_location, "RECORD"), strings.Join(rows, "\n")+"\n")
+	return metadata_location
+}
+
+// Points the size cache to a directory of the test, HOME or USERPROFILE depending on the platform
+func isolate_home(t *testing.T) {
+	home := t.TempDir()
+	t.Setenv("HOME", home)
+	t.Setenv("USERPROFILE", home)
+}
+
+func new_venv(t *testing.T) (string, string) {
+	t.Helper()
+	venv := t.TempDir()
+	site_dir := filepath.Join(venv, "lib", "python3.12", "site-packages")
+	if err := os.MkdirAll(site_dir, 0755); err != nil {
+		t.Fatal(err)
+	}
+	return venv, site_dir
+}
+
+func TestReadRecord(t *testing.T) {
+	_, site_dir := new_venv(t)
+	metadata_location := write_distribution(t, site_dir, "pkg",
+		"pkg/__init__.py,sha256=abc,100",
+		"pkg/__pycache__/__init__.cpython-312.pyc,,",
+		"../../../bin/pkg,sha256=def,5000",
+		`"pkg/with,comma.py",sha256=ghi,7`,
+		"",
+	)
+
+	files, err := read_record(metadata_location)
+	if err != nil {
+		t.Fatal(err)
+	}
+	want := []record_file{
+		{filepath.Join(site_dir, "pkg", "__init__.py"), 100},
+		{filepath.Join(site_dir, "pkg", "__pycache__", "__init__.cpython-312.pyc"), -1},
+		{filepath.Join(site_dir, "pkg", "with,comma.py"), 7},
+	}
+	if len(files) != len(want) {
+		t.Fatalf("read_record() = %v, want %v", files, want)
+	}
+	for i := range want {
+		if files[i] != want[i] {
+			t.Errorf("read_record()[%d] = %v, want %v", i, files[i], want[i])
+		}
+	}
+
+	if _, err := read_record(filepath.Join(site_dir, "missing-1.0.dist-info")); err == nil {
+		t.Error("read_record() of a distribution without RECORD should fail")
+	}
+}
+
+func TestGetRecordSize(t *testing.T) {
+	dir := t.TempDir()
+	write_file(t, filepath.Join(dir, "a.pyc"), strings.Repeat("x", 40))
+	files := []record_file{
+		{filepath.Join(dir, "listed.py"), 100},
+		{filepath.Join(dir, "a.pyc"), -1},
+		{filepath.Join(dir, "missing.pyc"), -1},
+	}
+	if size := get_record_size(files); size != 140 {
+		t.Errorf("get_record_size() = %d, want 140", size)
+	}
+}
+
+func sizes_by_name(t *testing.T, venv string) map[string]int64 {
+	t.Helper()
+	library_data, err := get_installed_libraries_with_size(venv)
+	if err != nil {
+		t.Fatal(err)
+	}
+	sizes := make(map[string]int64)
+	for _, installed := range library_data.Installed {
+		sizes[installed.Metadata.Name] = installed.Metadata.Size
+	}
+	return sizes
+}
+
+func TestSharedFilesAreCountedOnce(t *testing.T) {
+	isolate_home(t)
+	venv, site_dir := new_venv(t)
+	write_file(t, filepath.Join(site_dir, "ns", "bulky.bin"), strings.Repeat("x", 1<<20))
+	write_distribution(t, site_dir, "ns_a", "ns/__init__.py,,1000", "ns/a.py,,300")
+	write_distribution(t, site_dir, "ns_b", "ns/__init__.py,,1000", "ns/b.py,,500")
+	// Without a RECORD only the metadata directory is sized
+	write_file(t, filepath.Join(site_dir, "legacy-1.0.egg-info", "PKG-INFO"), "Name: legacy\nVersion: 1.0\n\n")
+
+	sizes := sizes_by_name(t, venv)
+	// The rest of the namespace directory belongs to neither
+	if sizes["ns_a"] != 1300 || sizes["ns_b"] != 500 {
+		t.Errorf("sizes = %v, want ns_a 1300 and ns_b 500", sizes)
+	}
+	if sizes["legacy"] != 27 {
+		t.Errorf("size of legacy = %d, want the 27 bytes of its PKG-INFO", sizes["legacy"])
+	}
+
+	// Their sizes depend on each other, so neither is cached
+	cache := open_size_cache(size_cache_path())
+	if len(cache.entries) != 0 {
+		t.Errorf("cached %v, distributions sharing files shouldn't be", cache.entries)
+	}
+}
@@ -0,0 +1,149 @@
+package main
+
+import (
+	"encoding/json"
+	"os"
+	"path/filepath"
+	"runtime"
+	"sync"
+	"time"
+)
+
+const (
+	size_cache_file_name = "library_sizes.json"
+	// Entries of environments not loaded for this long are dropped
+	size_cache_max_age = 30 * 24 * time.Hour
+	// Bumped whenever sizes are computed differently, the entries of other versions are dropped
+	size_cache_version = 2
+)
+
+// Fingerprint of the RECORD of a distribution, any install over it changes one of them.
+type record_fingerprint struct {
+	ModTime int64  `json:"record_mtime"`
+	Size    int64  `json:"record_size"`
+	Inode   uint64 `json:"inode"`
+}
+
+type size_entry struct {
+	record_fingerprint
+	Size     int64 `json:"size"`
+	LastSeen int64 `json:"last_seen"`
+}
+
+type size_cache_file struct {
+	Version int                   `json:"version"`
+	Entries map[string]size_entry `json:"entries"`
+}
+
+// Sizes of distributions computed by earlier runs, keyed by dist-info path.
+// An entry is only used while the RECORD of its distribution is unchanged.
+type size_cache struct {
+	path    string
+	mu      sync.Mutex
+	entries map[string]size_entry
+	now     int64
+}
+
+func size_cache_path() string {
+	home_dir, err := os.UserHomeDir()
+	if err != nil {
+		return ""
+	}
+	app_support_dir := filepath.Join(home_dir, "Library", "Application Support", "P4cMan")
+	if runtime.GOOS == "windows" {
+		app_support_dir = filepath.Join(home_dir, "AppData", "Local", "P4cMan")
+	} else if runtime.GOOS != "darwin" {
+		app_support_dir = filepath.Join(home_dir, ".config", "P4cMan")
+	}
+	return filepath.Join(app_support_dir, size_cache_file_name)
+}
+
+func open_size_cache(path string) *size_cache {
+	cache := &size_cache{path: path, entries: make(map[string]size_entry), now: time.Now().Unix()}
+	if data, err := os.ReadFile(path); err == nil {
+		// A corrupt or outdated cache is started over
+		var stored size_cache_file
+		if json.Unmarshal(data, &stored) == nil && stored.Version == size_cache_version && stored.Entries != nil {
+			cache.entries = stored.Entries
+		}
+	}
+	return cache
+}
+
+func fingerprint_record(metadata_location string) (record_fingerprint, bool) {
+	info, err := os.Stat(filepath.Join(metadata_location, "RECORD"))
+	if err != nil {
+		return record_fingerprint{}, false
+	}
+	return record_fingerprint{ModTime: info.ModTime().UnixNano(), Size: info.Size(), Inode: file_inode(info)}, true
+}
+
+func (cache *size_cache) lookup(metadata_location string, fingerprint record_fingerprint) (int64, bool) {
+	cache.mu.Lock()
+	defer cache.mu.Unlock()
+	entry, ok := cache.entries[metadata_location]
+	if !ok || entry.record_fingerprint != fingerprint {
+		return 0, false
+	}
+	entry.LastSeen = cache.now
+	cache.entries[metadata_location] = entry
+	return entry.Size, true
+}
+
+func (cache *size_cache) store(metadata_location string, fingerprint record_fingerprint, size int64) {
+	cache.mu.Lock()
+	defer cache.mu.Unlock()
+	cache.entries[metadata_location] = size_entry{fingerprint, size, cache.now}
+}
+
+// Drops the entries of distributions gone from the loaded site-packages,
+// and the entries of other environments which weren't loaded for a while.
+func (cache *size_cache) prune(installed []Installed) {
+	cache.mu.Lock()
+	defer cache.mu.Unlock()
+	present := make(map[string]struct{}, len(installed))
+	site_dirs := make(map[string]struct{})
+	for _, library := range installed {
+		present[library.MetadataLocation] = struct{}{}
+		site_dirs[filepath.Dir(library.MetadataLocation)] = struct{}{}
+	}
+	expired := cache.now - int64(size_cache_max_age.Seconds())
+	for metadata_location, entry := range cache.entries {
+		_, loaded_site := site_dirs[filepath.Dir(metadata_location)]
+		_, is_present := present[metadata_location]
+		if (loaded_site && !is_present) || entry.LastSeen < expired {
+			delete(cache.entries, metadata_location)
+		}
+	}
+}
+
+func (cache *size_cache) save() error {
+	cache.mu.Lock()
+	defer cache.mu.Unlock()
+	if err := os.MkdirAll(filepath.Dir(cache.path), 0755); err != nil {
+		return err
+	}
+	data, err := json.Marshal(size_cache_file{Version: size_cache_version, Entries: cache.entries})
+	if err != nil {
+		return err
+	}
+	temp, err := os.CreateTemp(filepath.Dir(cache.path), ".sizes-*")
+	if err != nil {
+		return err
+	}
+	if _, err := temp.Write(data); err != nil {
+		temp.Close()
+		os.Remove(temp.Name())
+		return err
+	}
+	if err := temp.Close(); err != nil {
+		os.Remove(temp.Name())
+		return err
+	}
+	// Renamed over the old file, a loader running next to this one never reads half of it
+	if err := os.Rename(temp.Name(), cache.path); err != nil {
+		os.Remove(temp.Name())
+		return err
+	}
+	return nil
+}
@@ -0,0 +1,104 @@
+package main
+
+import (
+	"os"
+	"path/filepath"
+	"testing"
+	"time"
+)
+
+func TestSizeCacheRoundTrip(t *testing.T) {
+	_, site_dir := new_venv(t)
+	metadata_location := write_distribution(t, site_dir, "pkg", "pkg/__init__.py,,100")
+	fingerprint, ok := fingerprint_record(metadata_location)
+	if !ok {
+		t.Fatal("fingerprint_record() found no RECORD")
+	}
+
+	path := filepath.Join(t.TempDir(), "sizes", size_cache_file_name)
+	cache := open_size_cache(path)
+	if _, hit := cache.lookup(metadata_location, fingerprint); hit {
+		t.Fatal("lookup() hit an empty cache")
+	}
+	cache.store(metadata_location, fingerprint, 100)
+	if err := cache.save(); err != nil {
+		t.Fatal(err)
+	}
+
+	reopened := open_size_cache(path)
+	if size, hit := reopened.lookup(metadata_location, fingerprint); !hit || size != 100 {
+		t.Errorf("lookup() = %d, %v, want 100, true", size, hit)
+	}
+}
+
+func TestSizeCacheMissesOnceTheRecordChanged(t *testing.T) {
+	_, site_dir := new_venv(t)
+	metadata_location := write_distribution(t, site_dir, "pkg", "pkg/__init__.py,,100")
+	fingerprint, _ := fingerprint_record(metadata_location)
+	cache := open_size_cache(filepath.Join(t.TempDir(), size_cache_file_name))
+	cache.store(metadata_location, fingerprint, 100)
+
+	// Reinstalled over, same length but a later mtime
+	write_file(t, filepath.Join(metadata_location, "RECORD"), "pkg/__init__.py,,200\n")
+	later := time.Now().Add(time.Minute)
+	os.Chtimes(filepath.Join(metadata_location, "RECORD"), later, later)
+	changed, _ := fingerprint_record(metadata_location)
+	if _, hit := cache.lookup(metadata_location, changed); hit {
+		t.Error("lookup() hit with the fingerprint of a changed RECORD")
+	}
+}
+
+func TestSizeCachePrune(t *testing.T) {
+	cache := open_size_cache(filepath.Join(t.TempDir(), size_cache_file_name))
+	site_dir := filepath.Join("venv", "site-packages")
+	kept := filepath.Join(site_dir, "kept-1.0.dist-info")
+	uninstalled := filepath.Join(site_dir, "gone-1.0.dist-info")
+	other_venv := filepath.Join("other", "site-packages", "pkg-1.0.dist-info")
+	expired := filepath.Join("old", "site-packages", "pkg-1.0.dist-info")
+	for _, metadata_location := range []string{kept, uninstalled, other_venv} {
+		cache.store(metadata_location, record_fingerprint{}, 1)
+	}
+	cache.entries[expired] = size_entry{LastSeen: cache.now - int64(size_cache_max_age.Seconds()) - 1}
+
+	cache.prune([]Installed{{MetadataLocation: kept}})
+	for metadata_location, want := range map[string]bool{kept: true, uninstalled: false, other_venv: true, expired: false} {
+		if _, ok := cache.entries[metadata_location]; ok != want {
+			t.Errorf("entry of %s kept = %v, want %v", metadata_location, ok, want)
+		}
+	}
+}
+
+func TestSizeCacheDropsOtherVersions(t *testing.T) {
+	path := filepath.Join(t.TempDir(), size_cache_file_name)
+	stale := `{"version": 1, "entries": {"pkg-1.0.dist-info": {"size": 1}}}`
+	write_file(t, path, stale)
+	if cache := open_size_cache(path); len(cache.entries) != 0 {
+		t.Errorf("entries of another version were loaded: %v", cache.entries)
+	}
+	write_file(t, path, "not json")
+	if cache := open_size_cache(path); len(cache.entries) != 0 {
+		t.Errorf("entries of a corrupt cache were loaded: %v", cache.entries)
+	}
+}
+
+func TestUnchangedDistributionsAreReadFromTheCache(t *testing.T) {
+	isolate_home(t)
+	venv, site_dir := new_venv(t)
+	write_distribution(t, site_dir, "pkg", "pkg/__init__.py,,100")
+	if sizes := sizes_by_name(t, venv); sizes["pkg"] != 100 {
+		t.Fatalf("size of pkg = %d, want 100", sizes["pkg"])
+	}
+
+	// A size only the cache knows about shows it was used
+	cache := open_size_cache(size_cache_path())
+	for metadata_location, entry := range cache.entries {
+		entry.Size = 12345
+		cache.entries[metadata_location] = entry
+	}
+	if err := cache.save(); err != nil {
+		t.Fatal(err)
+	}
+	if sizes := sizes_by_name(t, venv); sizes["pkg"] != 12345 {
+		t.Errorf("size of pkg = %d, want the cached 12345", sizes["pkg"])
+	}
+}
@@ -0,0 +1,245 @@
+package main
+
+import (
+	"bufio"
+	"encoding/json"
+	"errors"
+	"io"
+	"log/slog"
+	"net/http"
+	"sync"
+)
+
+// In daemon mode the fetcher keeps running for the lifetime of the app, so the
+// process start and the TLS handshakes are paid once. Every line read from
+// stdin is a request:
+//
+//	{"id": 1, "packages": ["requests", "numpy"]}
+//
+// and every package is answered on its own line as soon as its details are
+// known, cached ones first. Packages PyPI doesn't know come with empty details,
+// like in the one-shot output, packages which failed to fetch with an error.
+// Once every package of a request was answered, a done line follows:
+//
+//	{"id": 1, "package": "requests", "data": {...}}
+//	{"id": 1, "package": "numpy", "error": "..."}
+//	{"id": 1, "done": true}
+//
+// Cached details past the freshness window are answered right away too, and
+// revalidated in the background with a conditional request once no requested
+// package is waiting. When they did change, the new details are pushed on an
+// update line, which belongs to no request:
+//
+//	{"id": 0, "package": "requests", "data": {...}, "update": true}
+//
+// The daemon exits once stdin is closed and every request was answered.
+type daemon_request struct {
+	ID       int      `json:"id"`
+	Packages []string `json:"packages"`
+}
+
+type daemon_response struct {
+	ID      int       `json:"id"`
+	Package string    `json:"package,omitempty"`
+	Data    *PyPIInfo `json:"data,omitempty"`
+	Error   string    `json:"error,omitempty"`
+	Done    bool      `json:"done,omitempty"`
+	Update  bool      `json:"update,omitempty"`
+}
+
+type daemon_job struct {
+	fetch_job
+	request_id int
+	pending    *sync.WaitGroup
+}
+
+// Stale entries waiting for their revalidation, at most one per package
+type revalidation_queue struct {
+	mutex  sync.Mutex
+	queued map[string]bool
+	jobs   chan fetch_job
+}
+
+func new_revalidation_queue(size int) *revalidation_queue {
+	return &revalidation_queue{queued: make(map[string]bool), jobs: make(chan fetch_job, size)}
+}
+
+func (queue *revalidation_queue) push(job fetch_job) {
+	key := normalize_name(job.package_name)
+	queue.mutex.Lock()
+	defer queue.mutex.Unlock()
+	if queue.queued[key] {
+		return
+	}
+	select {
+	case queue.jobs <- job:
+		queue.queued[key] = true
+	default:
+		// Queue is full, the entry gets revalidated the next time it's requested
+	}
+}
+
+func (queue *revalidation_queue) done(job fetch_job) {
+	queue.mutex.Lock()
+	delete(queue.queued, normalize_name(job.package_name))
+	queue.mutex.Unlock()
+}
+
+// Writes responses one line at a time, from any goroutine
+type response_writer struct {
+	mutex   sync.Mutex
+	writer  *bufio.Writer
+	encoder *json.Encoder
+}
+
+func new_response_writer(out io.Writer) *response_writer {
+	writer := bufio.NewWriter(out)
+	encoder := json.NewEncoder(writer)
+	encoder.SetEscapeHTML(false)
+	return &response_writer{writer: writer, encoder: encoder}
+}
+
+func (w *response_writer) write(response daemon_response) {
+	w.mutex.Lock()
+	defer w.mutex.Unlock()
+	if err := w.encoder.Encode(response); err != nil {
+		slog.Error("Failed to encode response", "error", err)
+		return
+	}
+	// Flushed per line, the reader shows every row as soon as it arrives
+	if err := w.writer.Flush(); err != nil {
+		slog.Error("Failed to write response", "error", err)
+	}
+}
+
+func package_response(request_id int, package_name string, info PyPIInfo, err error) daemon_response {
+	response := daemon_response{ID: request_id, Package: package_name}
+	switch {
+	case err == nil:
+		response.Data = &info
+	case errors.Is(err, error_not_found):
+		response.Data = &PyPIInfo{}
+	default:
+		response.Error = err.Error()
+	}
+	return response
+}
+
+func daemon_worker(client *http.Client, store *metadata_store, jobs <-chan daemon_job, revalidations *revalidation_queue, out *response_writer) {
+	for {
+		// Requested packages always go before revalidations
+		select {
+		case job, ok := <-jobs:
+			if !ok {
+				return
+			}
+			fetch_requested(client, store, job, out)
+			continue
+		default:
+		}
+		select {
+		case job, ok := <-jobs:
+			if !ok {
+				return
+			}
+			fetch_requested(client, store, job, out)
+		case job := <-revalidations.jobs:
+			revalidate(client, store, job, out)
+			revalidations.done(job)
+		}
+	}
+}
+
+func fetch_requested(client *http.Client, store *metadata_store, job daemon_job, out *response_writer) {
+	info, _, err := get_library_info(client, store, job.fetch_job)
+	out.write(package_response(job.request_id, job.package_name, info, err))
+	job.pending.Done()
+}
+
+func revalidate(client *http.Client, store *metadata_store, job fetch_job, out *response_writer) {
+	info, changed, err := get_library_info(client, store, job)
+	if !changed {
+		return
+	}
+	if err != nil && !errors.Is(err, error_not_found) {
+		return
+	}
+	response := package_response(0, job.package_name, info, err)
+	response.Update = true
+	out.write(response)
+}
+
+func run_daemon(client *http.Client, store *metadata_store, in io.Reader, out io.Writer) {
+	responses := new_response_writer(out)
+	jobs := make(chan daemon_job)
+	revalidations := new_revalidation_queue(1024)
+	var workers_done sync.WaitGroup
+	for range *workers {
+		workers_done.Add(1)
+		go func() {
+			defer workers_done.Done()
+			daemon_worker(client, store, jobs, revalidations, responses)
+		}()
+	}
+
+	var requests sync.WaitGroup
+	scanner := bufio.NewScanner(in)
+	scanner.Buffer(make([]byte, 64*1024), 16<<20)
+	for scanner.Scan() {
+		var request daemon_request
+		if err := json.Unmarshal(scanner.Bytes(), &request); err != nil {
+			slog.Error("Failed to parse request", "error", err)
+			continue
+		}
+
+		requests.Add(1)
+		// Dispatched on its own goroutine, so reading stdin never waits for the workers
+		go func(request daemon_request) {
+			defer requests.Done()
+			// Cached packages are all answered before any miss waits for a worker
+			var misses []daemon_job
+			var pending sync.WaitGroup
+			for _, pkg := range request.Packages {
+				if pkg == "" {
+					continue
+				}
+				entry, state := store.lookup(pkg)
+				if state == entry_missing {
+					misses = append(misses, daemon_job{
+						fetch_job:  fetch_job{package_name: pkg, cached: &entry},
+						request_id: request.ID,
+						pending:    &pending,
+					})
+					continue
+				}
+
+				var err error
+				if entry.NotFound {
+					err = error_not_found
+				}
+				info := PyPIInfo{}
+				if entry.Data != nil {
+					info = *entry.Data
+				}
+				responses.write(package_response(request.ID, pkg, info, err))
+				if state == entry_stale {
+					revalidations.push(fetch_job{package_name: pkg, cached: &entry})
+				}
+			}
+			pending.Add(len(misses))
+			for _, job := range misses {
+				jobs <- job
+			}
+			pending.Wait()
+			responses.write(daemon_response{ID: request.ID, Done: true})
+			store.evict()
+		}(request)
+	}
+	if err := scanner.Err(); err != nil {
+		slog.Error("Failed to read requests", "error", err)
+	}
+
+	requests.Wait()
+	close(jobs)
+	workers_done.Wait()
+}
@@ -1,16 +1,20 @@
 package main
 
 import (
-	"bytes"
 	"encoding/json"
+	"errors"
+	"flag"
 	"fmt"
 	"io"
 	"log/slog"
+	"math/rand"
+	"net"
 	"net/http"
 	"os"
 	"os/signal"
 	"path/filepath"
 	"runtime"
+	"strconv"
 	"strings"
 	"sync"
 	"syscall"
@@ -42,8 +46,22 @@ type PyPIInfo struct {
 }
 
 var (
-	package_database = make(map[string]PyPIInfo)
-	dbMutex          = &sync.Mutex{}
+	workers = flag.Int("workers", 8, "number of packages fetched concurrently")
+	timeout = flag.Duration("timeout", 15*time.Second, "timeout of a single request")
+	retries = flag.Int("retries", 3, "retries of a request answered with 429 or 5xx")
+	api_url = flag.String("api", "https://pypi.org/pypi/%s/json", "package details endpoint, %s is the package name")
+
+	cache_fresh        = flag.Duration("fresh", 24*time.Hour, "how long fetched details are served without being revalidated")
+	cache_ttl          = flag.Duration("ttl", 30*24*time.Hour, "how long fetched details are served at all, revalidated once older than -fresh")
+	cache_negative_ttl = flag.Duration("negative-ttl", 24*time.Hour, "how long a package missing from PyPI is remembered")
+	cache_size         = flag.Int64("cache-size", 64<<20, "size budget of the details cache in bytes")
+
+	daemon = flag.Bool("daemon", false, "keep running, reading JSON requests from stdin line by line")
+)
+
+const (
+	base_retry_delay = 500 * time.Millisecond
+	max_retry_delay  = 30 * time.Second
 )
 
 func get_license(classifiers []string) string {
@@ -56,50 +74,126 @@ func get_license(classifiers []string) string {
 	return "UNKNOWN"
 }
 
-func save_data(file_dir string) {
-	buffer := new(bytes.Buffer)
-	buffer_encoder := json.NewEncoder(buffer)
-	buffer_encoder.SetEscapeHTML(false)
-	buffer_encoder.SetIndent("", " ")
-	dbMutex.Lock()
-	if err := buffer_encoder.Encode(package_database); err != nil {
-		slog.Error("Failed to encode package database", "error", err)
+// A single client is shared by every worker, so connections are kept alive and reused
+func new_http_client(timeout time.Duration, workers int) *http.Client {
+	transport := &http.Transport{
+		Proxy: http.ProxyFromEnvironment,
+		DialContext: (&net.Dialer{
+			Timeout:   5 * time.Second,
+			KeepAlive: 30 * time.Second,
+		}).DialContext,
+		ForceAttemptHTTP2:     true,
+		MaxIdleConns:          100,
+		MaxIdleConnsPerHost:   workers,
+		MaxConnsPerHost:       workers,
+		IdleConnTimeout:       90 * time.Second,
+		TLSHandshakeTimeout:   10 * time.Second,
+		ExpectContinueTimeout: 1 * time.Second,
 	}
-	dbMutex.Unlock()
+	return &http.Client{Transport: transport, Timeout: timeout}
+}
 
-	if err := os.WriteFile(file_dir, buffer.Bytes(), 0644); err != nil {
-		slog.Error("Failed to write package database: ", "error", err)
+// How long to wait before the next attempt, Retry-After wins over the backoff
+func retry_delay(attempt int, resp *http.Response) time.Duration {
+	if resp != nil {
+		if retry_after := resp.Header.Get("Retry-After"); retry_after != "" {
+			if seconds, err := strconv.Atoi(retry_after); err == nil {
+				return min(time.Duration(seconds)*time.Second, max_retry_delay)
+			}
+			if at, err := http.ParseTime(retry_after); err == nil {
+				return min(max(time.Until(at), 0), max_retry_delay)
+			}
+		}
 	}
+	// Exponential backoff with full jitter
+	backoff := min(base_retry_delay<<attempt, max_retry_delay)
+	return time.Duration(rand.Int63n(int64(backoff)))
 }
 
-func get_library_info(package_name string, wg *sync.WaitGroup) {
-	defer wg.Done()
+// Gets url with header, retrying network errors, 429 and 5xx responses
+func get_with_retry(client *http.Client, url string, header http.Header, retries int) (*http.Response, error) {
+	for attempt := 0; ; attempt++ {
+		req, err := http.NewRequest(http.MethodGet, url, nil)
+		if err != nil {
+			return nil, err
+		}
+		req.Header = header.Clone()
+		resp, err := client.Do(req)
+		retryable := err != nil || resp.StatusCode == http.StatusTooManyRequests || resp.StatusCode >= 500
+		if !retryable || attempt >= retries {
+			return resp, err
+		}
+
+		delay := retry_delay(attempt, resp)
+		if resp != nil {
+			slog.Warn("Retrying request", "url", url, "status", resp.Status, "delay", delay)
+			io.Copy(io.Discard, resp.Body)
+			resp.Body.Close()
+		} else {
+			slog.Warn("Retrying request", "url", url, "error", err, "delay", delay)
+		}
+		time.Sleep(delay)
+	}
+}
+
+// Returned for packages PyPI doesn't know, which are remembered in the store
+var error_not_found = errors.New("package not found")
+
+// A package to fetch, along with its cached entry when there is one
+type fetch_job struct {
+	package_name string
+	// Entry which is stale or past its ttl, its validators make the request conditional
+	cached *cache_entry
+}
 
+// Fetches the details of job.package_name and stores them, or the fact that
+// PyPI doesn't know the package, in store. When PyPI answers that the cached
+// entry didn't change, only its timestamp is bumped and changed is false.
+func get_library_info(client *http.Client, store *metadata_store, job fetch_job) (pypi_data PyPIInfo, changed bool, err error) {
+	package_name := job.package_name
 	// Url is formatted link for get request
-	url := fmt.Sprintf("https://pypi.org/pypi/%s/json", package_name)
-	resp, err := http.Get(url)
+	url := fmt.Sprintf(*api_url, package_name)
+	header := http.Header{}
+	cached := job.cached
+	if cached != nil && cached.Data != nil {
+		if cached.ETag != "" {
+			header.Set("If-None-Match", cached.ETag)
+		}
+		if cached.LastModified != "" {
+			header.Set("If-Modified-Since", cached.LastModified)
+		}
+	}
+	resp, err := get_with_retry(client, url, header, *retries)
 
 	if err != nil {
-		slog.Error("Failed to fetch %s: %v", package_name, err)
-		return
+		slog.Error("Failed to fetch package", "package", package_name, "error", err)
+		return pypi_data, false, err
 	}
 	defer resp.Body.Close()
 
+	if resp.StatusCode == http.StatusNotModified && cached != nil && cached.Data != nil {
+		entry := store.refresh(*cached)
+		return *entry.Data, false, nil
+	}
+	if resp.StatusCode == http.StatusNotFound {
+		slog.Error("Package not found", "package", package_name)
+		store.put_not_found(package_name)
+		return pypi_data, true, error_not_found
+	}
 	if resp.StatusCode != http.StatusOK {
-		slog.Error("Error bad status for fetching %s: %v", package_name, resp.Status)
-		return
+		slog.Error("Bad status fetching package", "package", package_name, "status", resp.Status)
+		return pypi_data, false, fmt.Errorf("bad status %s", resp.Status)
 	}
 
 	body, err := io.ReadAll(resp.Body)
 	if err != nil {
-		slog.Error("Error Parsing JSON file for %s: %v", package_name, err)
-		return
+		slog.Error("Failed to read response", "package", package_name, "error", err)
+		return pypi_data, false, err
 	}
 
-	var pypi_data PyPIInfo
 	if err := json.Unmarshal(body, &pypi_data); err != nil {
-		slog.Error("Error Parsing JSON file for %s: %v", package_name, err)
-		return
+		slog.Error("Failed to parse JSON", "package", package_name, "error", err)
+		return pypi_data, false, err
 	}
 	pypi_data.FetchedAt = time.Now()
 	if license := get_license(pypi_data.Info.Classifiers); license != "UNKNOWN" {
@@ -110,9 +204,34 @@ func get_library_info(package_name string, wg *sync.WaitGroup) {
 		}
 	}
 
-	dbMutex.Lock()
-	package_database[package_name] = pypi_data
-	dbMutex.Unlock()
+	store.put_found(package_name, pypi_data, resp.Header.Get("ETag"), resp.Header.Get("Last-Modified"))
+	return pypi_data, true, nil
+}
+
+// Details gathered during this run, keyed by the requested package name
+type results struct {
+	mutex    sync.Mutex
+	packages map[string]PyPIInfo
+}
+
+func (r *results) set(package_name string, info PyPIInfo) {
+	r.mutex.Lock()
+	r.packages[package_name] = info
+	r.mutex.Unlock()
+}
+
+func worker(client *http.Client, store *metadata_store, jobs <-chan fetch_job, found *results, wg *sync.WaitGroup) {
+	defer wg.Done()
+	for job := range jobs {
+		info, _, err := get_library_info(client, store, job)
+		switch {
+		case err == nil:
+			found.set(job.package_name, info)
+		case job.cached != nil && job.cached.Data != nil && !errors.Is(err, error_not_found):
+			// Better outdated details than none
+			found.set(job.package_name, *job.cached.Data)
+		}
+	}
 }
 
 func create_find_app_support_dir(app_name string) (string, error) {
@@ -139,76 +258,78 @@ func create_find_app_support_dir(app_name string) (string, error) {
 }
 
 func main() {
+	flag.Parse()
+	*workers = max(*workers, 1)
 
 	handler := slog.NewJSONHandler(os.Stderr, nil)
 	logger := slog.New(handler).With("service", "go-detail-api")
 	slog.SetDefault(logger)
 	app_name := "P4cMan"
-	file_name := "library_details.json"
+	legacy_file_name := "library_details.json"
+	store_dir_name := "library_details"
 
 	app_support_dir, err := create_find_app_support_dir(app_name)
 	if err != nil {
 		return
 	}
-	file_dir := filepath.Join(app_support_dir, file_name)
-
-	if _, err := os.Stat(file_dir); os.IsNotExist(err) {
-		file, err := os.Create(file_dir)
-		if err != nil {
-			slog.Error("Failed to create file", "error", err)
-		}
-		defer file.Close()
-	}
+	// The whole-file database is replaced by the store, drop it
+	os.Remove(filepath.Join(app_support_dir, legacy_file_name))
 
-	dbMutex.Lock()
-	file, err := os.ReadFile(file_dir)
+	store, err := new_metadata_store(
+		filepath.Join(app_support_dir, store_dir_name),
+		*cache_fresh,
+		*cache_ttl,
+		*cache_negative_ttl,
+		*cache_size,
+	)
 	if err != nil {
-		file, err := os.Create(file_dir)
-		if err != nil {
-			slog.Error("Failed to create file", "error", err)
-		}
-		file.Close()
-	}
-	if len(file) > 0 {
-		if err := json.Unmarshal(file, &package_database); err != nil {
-			slog.Error("Failed to unmarshal package database", "error", err)
-		}
+		slog.Error("Failed to open details cache", "error", err)
+		return
 	}
 
-	dbMutex.Unlock()
-
 	signal_for_closing := make(chan os.Signal, 1)
 	signal.Notify(signal_for_closing, syscall.SIGINT, syscall.SIGTERM)
 
-	packages := os.Args[1:]
+	client := new_http_client(*timeout, *workers)
+	if *daemon {
+		run_daemon(client, store, os.Stdin, os.Stdout)
+		return
+	}
+
+	packages := flag.Args()
+	found := &results{packages: make(map[string]PyPIInfo, len(packages))}
+	jobs := make(chan fetch_job, len(packages))
 	var wg sync.WaitGroup
+	for range *workers {
+		wg.Add(1)
+		go worker(client, store, jobs, found, &wg)
+	}
 	for _, pkg := range packages {
 		if pkg == "" {
 			continue
 		}
-		dbMutex.Lock()
-		_, ok := package_database[pkg]
-		dbMutex.Unlock()
-		if ok {
+		// This run ends with its output, stale entries are revalidated before it
+		entry, state := store.lookup(pkg)
+		if state == entry_fresh {
+			// Packages remembered as missing come out empty, like failed fetches
+			if entry.Data != nil {
+				found.set(pkg, *entry.Data)
+			}
 			continue
 		}
-		wg.Add(1)
-		go get_library_info(pkg, &wg)
+		jobs <- fetch_job{package_name: pkg, cached: &entry}
 	}
+	close(jobs)
 	wg.Wait()
 
 	current_packages := make(map[string]PyPIInfo)
-	dbMutex.Lock()
 	for _, pkg := range packages {
-		current_packages[pkg] = package_database[pkg]
+		current_packages[pkg] = found.packages[pkg]
 	}
-	dbMutex.Unlock()
 
-	var buffer bytes.Buffer
-	multi_writer := io.MultiWriter(os.Stdout, &buffer)
-	encoder := json.NewEncoder(multi_writer)
+	encoder := json.NewEncoder(os.Stdout)
 	encoder.SetEscapeHTML(false)
 	encoder.SetIndent("", " ")
 	encoder.Encode(current_packages)
-	save_data(file_dir)
+	store.evict()
 }
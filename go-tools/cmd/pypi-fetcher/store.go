@@ -0,0 +1,240 @@
+package main
+
+import (
+	"crypto/sha256"
+	"encoding/hex"
+	"encoding/json"
+	"io/fs"
+	"log/slog"
+	"os"
+	"path/filepath"
+	"regexp"
+	"sort"
+	"strings"
+	"sync"
+	"time"
+)
+
+// Every entry of the metadata store is its own small file, so a lookup only
+// reads the entries it needs and a fetch only writes the entry it changed.
+//
+// Files live in <dir>/<first 2 hex chars>/<sha256 of the normalized name>.json,
+// hashing keeps names like "con" or "aux" away from reserved Windows file names.
+// The modification time of an entry is its last use and drives the eviction.
+type cache_entry struct {
+	Name     string    `json:"name"`
+	StoredAt time.Time `json:"stored_at"`
+	NotFound bool      `json:"not_found,omitempty"`
+	Data     *PyPIInfo `json:"data,omitempty"`
+	// Validators of the response, sent back when the entry gets revalidated
+	ETag         string `json:"etag,omitempty"`
+	LastModified string `json:"last_modified,omitempty"`
+}
+
+type freshness int
+
+const (
+	// No entry, or one past its ttl which has to be fetched again before use
+	entry_missing freshness = iota
+	entry_fresh
+	// Past the freshness window, served as it is while it gets revalidated
+	entry_stale
+)
+
+type metadata_store struct {
+	dir          string
+	fresh        time.Duration
+	ttl          time.Duration
+	negative_ttl time.Duration
+	size_budget  int64
+	// Held while sweeping, the daemon may finish requests concurrently
+	sweeping sync.Mutex
+}
+
+// Eviction walks the whole store, so it is run at most once per interval
+const sweep_interval = time.Hour
+
+var normalize_pattern = regexp.MustCompile(`[-_.]+`)
+
+// PEP 503 normalized form of a package name
+func normalize_name(name string) string {
+	return strings.ToLower(normalize_pattern.ReplaceAllString(name, "-"))
+}
+
+func new_metadata_store(dir string, fresh, ttl, negative_ttl time.Duration, size_budget int64) (*metadata_store, error) {
+	if err := os.MkdirAll(dir, 0755); err != nil {
+		return nil, err
+	}
+	return &metadata_store{
+		dir:          dir,
+		fresh:        fresh,
+		ttl:          ttl,
+		negative_ttl: negative_ttl,
+		size_budget:  size_budget,
+	}, nil
+}
+
+func (store *metadata_store) path(name string) string {
+	sum := sha256.Sum256([]byte(normalize_name(name)))
+	key := hex.EncodeToString(sum[:])
+	return filepath.Join(store.dir, key[:2], key+".json")
+}
+
+// Returns the entry of name and how fresh it is. An entry past its ttl is
+// still returned, its validators make the next fetch a conditional one.
+func (store *metadata_store) lookup(name string) (cache_entry, freshness) {
+	var entry cache_entry
+	path := store.path(name)
+	data, err := os.ReadFile(path)
+	if err != nil {
+		if !os.IsNotExist(err) {
+			slog.Warn("Failed to read cache entry", "package", name, "error", err)
+		}
+		return entry, entry_missing
+	}
+	if err := json.Unmarshal(data, &entry); err != nil {
+		slog.Warn("Dropping corrupt cache entry", "package", name, "error", err)
+		os.Remove(path)
+		return cache_entry{}, entry_missing
+	}
+
+	age := time.Since(entry.StoredAt)
+	if entry.NotFound {
+		if age > store.negative_ttl {
+			return entry, entry_missing
+		}
+	} else if age > store.ttl {
+		return entry, entry_missing
+	}
+	// Mark as recently used for the eviction
+	now := time.Now()
+	os.Chtimes(path, now, now)
+	if !entry.NotFound && age > store.fresh {
+		return entry, entry_stale
+	}
+	return entry, entry_fresh
+}
+
+// Writes entry to a temporary file and renames it over the old one, so a crash
+// leaves either the previous entry or the new one, never half of one
+func (store *metadata_store) put(entry cache_entry) error {
+	path := store.path(entry.Name)
+	if err := os.MkdirAll(filepath.Dir(path), 0755); err != nil {
+		return err
+	}
+	data, err := json.Marshal(entry)
+	if err != nil {
+		return err
+	}
+	temp, err := os.CreateTemp(filepath.Dir(path), ".entry-*")
+	if err != nil {
+		return err
+	}
+	if _, err := temp.Write(data); err != nil {
+		temp.Close()
+		os.Remove(temp.Name())
+		return err
+	}
+	if err := temp.Close(); err != nil {
+		os.Remove(temp.Name())
+		return err
+	}
+	if err := os.Rename(temp.Name(), path); err != nil {
+		os.Remove(temp.Name())
+		return err
+	}
+	return nil
+}
+
+func (store *metadata_store) put_found(name string, info PyPIInfo, etag, last_modified string) {
+	entry := cache_entry{
+		Name:         name,
+		StoredAt:     info.FetchedAt,
+		Data:         &info,
+		ETag:         etag,
+		LastModified: last_modified,
+	}
+	if err := store.put(entry); err != nil {
+		slog.Error("Failed to write cache entry", "package", name, "error", err)
+	}
+}
+
+// Marks entry as fetched now, for responses telling it didn't change
+func (store *metadata_store) refresh(entry cache_entry) cache_entry {
+	entry.StoredAt = time.Now()
+	if entry.Data != nil {
+		data := *entry.Data
+		data.FetchedAt = entry.StoredAt
+		entry.Data = &data
+	}
+	if err := store.put(entry); err != nil {
+		slog.Error("Failed to write cache entry", "package", entry.Name, "error", err)
+	}
+	return entry
+}
+
+func (store *metadata_store) put_not_found(name string) {
+	entry := cache_entry{Name: name, StoredAt: time.Now(), NotFound: true}
+	if err := store.put(entry); err != nil {
+		slog.Error("Failed to write cache entry", "package", name, "error", err)
+	}
+}
+
+// Removes the least recently used entries until the store fits its size
+// budget, along with temporary files left behind by a crash. Does nothing
+// when the last sweep was less than sweep_interval ago.
+func (store *metadata_store) evict() {
+	if !store.sweeping.TryLock() {
+		return
+	}
+	defer store.sweeping.Unlock()
+	stamp := filepath.Join(store.dir, ".last_sweep")
+	if info, err := os.Stat(stamp); err == nil && time.Since(info.ModTime()) < sweep_interval {
+		return
+	}
+	if file, err := os.Create(stamp); err == nil {
+		file.Close()
+	}
+
+	type stored_file struct {
+		path     string
+		size     int64
+		modified time.Time
+	}
+	var files []stored_file
+	var total int64
+	filepath.WalkDir(store.dir, func(path string, entry fs.DirEntry, err error) error {
+		if err != nil || entry.IsDir() || path == stamp {
+			return nil
+		}
+		info, err := entry.Info()
+		if err != nil {
+			return nil
+		}
+		if strings.HasPrefix(entry.Name(), ".entry-") {
+			if time.Since(info.ModTime()) > sweep_interval {
+				os.Remove(path)
+			}
+			return nil
+		}
+		files = append(files, stored_file{path, info.Size(), info.ModTime()})
+		total += info.Size()
+		return nil
+	})
+	if total <= store.size_budget {
+		return
+	}
+
+	sort.Slice(files, func(i, j int) bool { return files[i].modified.Before(files[j].modified) })
+	removed := 0
+	for _, file := range files {
+		if total <= store.size_budget {
+			break
+		}
+		if err := os.Remove(file.path); err == nil {
+			total -= file.size
+			removed++
+		}
+	}
+	slog.Info("Evicted cache entries", "removed", removed, "size", total)
+}
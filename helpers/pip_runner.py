@@ -0,0 +1,216 @@
+import json
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from .utils import get_app_support_directory
+
+logger = logging.getLogger(__name__)
+
+TIMINGS_FILE = "install_timings.jsonl"
+# The timings file is cut down to its newer half once it grows past this
+MAX_TIMINGS_BYTES = 2 * 1024 * 1024
+
+_NAME = r"([A-Za-z0-9][A-Za-z0-9._-]*)"
+_SIZE = re.compile(r"\(([\d.]+) (bytes|kB|MB|GB)\)\s*$")
+_UNITS = {"bytes": 1, "kB": 1000, "MB": 1000**2, "GB": 1000**3}
+# (phase, pattern), the first group being the package when there is one
+_PATTERNS = [
+    ("collecting", re.compile(rf"^Collecting {_NAME}")),
+    ("collecting", re.compile(r"^Processing (\S+)")),
+    ("downloading", re.compile(r"^Downloading (\S+)")),
+    ("cached", re.compile(r"^Using cached (\S+)")),
+    ("building", re.compile(rf"^Building wheel for {_NAME}")),
+    ("installing", re.compile(r"^Installing collected packages: (.+)$")),
+    ("uninstalling", re.compile(rf"^Uninstalling {_NAME}:")),
+    ("done", re.compile(r"^Successfully (?:installed|uninstalled) (.+)$")),
+]
+
+_timings_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class PipEvent:
+    """
+    One phase of a pip run, parsed from a line of its output.
+
+    Every phase is reported twice, once when it starts and once when the next
+    one starts (or pip exits) with `finished` set and its `duration` known.
+    """
+
+    phase: str = ""
+    package: str = ""
+    size: int = 0  # bytes, of downloaded or cached files
+    elapsed: float = 0.0  # seconds since pip was started
+    duration: float = 0.0  # seconds the phase took, once finished
+    finished: bool = False
+
+    def label(self) -> str:
+        text = f"{self.phase.capitalize()} {self.package}".strip()
+        if self.size:
+            text += f" ({format_size(self.size)})"
+        return text
+
+
+@dataclass(frozen=True)
+class PipResult:
+    """Outcome of a pip run, with the finished event of every phase"""
+
+    returncode: int
+    output: str
+    duration: float
+    phases: tuple = ()
+
+
+def format_size(size: int) -> str:
+    for unit in ("GB", "MB", "kB"):
+        if size >= _UNITS[unit]:
+            return f"{size / _UNITS[unit]:.1f} {unit}"
+    return f"{size} bytes"
+
+
+def _package_of_file(file_name: str) -> str:
+    """Project name of a wheel or sdist file name (or url, or path)"""
+    base = os.path.basename(file_name.rstrip("/"))
+    return base.split("-", 1)[0] if "-" in base else base
+
+
+def parse_line(line: str) -> tuple[str, str, int] | None:
+    """(phase, package, size) of a line of pip output, None for other lines"""
+    line = line.strip()
+    for phase, pattern in _PATTERNS:
+        match = pattern.match(line)
+        if match is None:
+            continue
+        package = match.group(1)
+        if phase in ("downloading", "cached") or (
+            phase == "collecting" and line.startswith("Processing")
+        ):
+            package = _package_of_file(package)
+        size = 0
+        size_match = _SIZE.search(line)
+        if size_match is not None:
+            size = int(float(size_match.group(1)) * _UNITS[size_match.group(2)])
+        return phase, package, size
+    return None
+
+
+class PhaseTracker:
+    """Turns parsed lines into events, closing the running phase as the next starts"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: list[PipEvent] = []
+        self._current: PipEvent | None = None
+
+    def _close(self, now: float) -> PipEvent | None:
+        current, self._current = self._current, None
+        if current is None:
+            return None
+        finished = PipEvent(
+            current.phase,
+            current.package,
+            current.size,
+            current.elapsed,
+            now - self.started - current.elapsed,
+            True,
+        )
+        self.phases.append(finished)
+        return finished
+
+    def feed(self, line: str) -> list[PipEvent]:
+        parsed = parse_line(line)
+        if parsed is None:
+            return []
+        now = time.perf_counter()
+        events = []
+        finished = self._close(now)
+        if finished is not None:
+            events.append(finished)
+        phase, package, size = parsed
+        event = PipEvent(phase, package, size, now - self.started)
+        if phase != "done":
+            self._current = event
+        events.append(event)
+        return events
+
+    def close(self) -> list[PipEvent]:
+        finished = self._close(time.perf_counter())
+        return [finished] if finished is not None else []
+
+
+def run_pip(python_exec: str, args: list, on_event=None) -> PipResult:
+    """
+    Runs `python_exec -m pip *args`, reading its output line by line as it's
+    written, and calls `on_event` with every PipEvent parsed from it.
+    """
+    tracker = PhaseTracker()
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    output = []
+    try:
+        process = subprocess.Popen(
+            [python_exec, "-m", "pip", *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            bufsize=1,
+            env=env,
+        )
+    except OSError as e:
+        logger.error(f"Failed to run pip with {python_exec}: {e}")
+        return PipResult(-1, str(e), 0.0)
+
+    with process:
+        for line in process.stdout:
+            output.append(line)
+            for event in tracker.feed(line):
+                if on_event is not None:
+                    on_event(event)
+        returncode = process.wait()
+    for event in tracker.close():
+        if on_event is not None:
+            on_event(event)
+    return PipResult(
+        returncode,
+        "".join(output),
+        time.perf_counter() - tracker.started,
+        tuple(tracker.phases),
+    )
+
+
+def save_timings(action: str, python_exec: str, packages: list, result: PipResult):
+    """Appends the phase timings of a pip run to the timings file, one JSON line per run"""
+    record = {
+        "time": time.time(),
+        "action": action,
+        "python": python_exec,
+        "packages": list(packages),
+        "returncode": result.returncode,
+        "duration": round(result.duration, 3),
+        "phases": [
+            {
+                "phase": event.phase,
+                "package": event.package,
+                "size": event.size,
+                "start": round(event.elapsed, 3),
+                "duration": round(event.duration, 3),
+            }
+            for event in result.phases
+        ],
+    }
+    file_path = os.path.join(get_app_support_directory(), TIMINGS_FILE)
+    with _timings_lock:
+        try:
+            with open(file_path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(record) + "\n")
+            if os.path.getsize(file_path) > MAX_TIMINGS_BYTES:
+                with open(file_path, "r", encoding="utf-8") as file:
+                    lines = file.readlines()
+                with open(file_path, "w", encoding="utf-8") as file:
+                    file.writelines(lines[len(lines) // 2 :])
+        except OSError as e:
+            logger.error(f"Failed to save pip timings: {e}")
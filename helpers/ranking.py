@@ -0,0 +1,120 @@
+import heapq
+from helpers.utils import normalize_name
+
+# Match tiers, a lower tier always ranks first
+EXACT = 0
+PREFIX = 1
+TOKEN = 2
+SUBSTRING = 3
+FUZZY = 4
+
+
+def allowed_typos(query: str) -> int:
+    """Number of typos tolerated for a query, short queries have to be exact"""
+    if len(query) < 5:
+        return 0
+    if len(query) < 9:
+        return 1
+    return 2
+
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> int | None:
+    """
+    Edit distance between `a` and `b` (insertions, deletions, substitutions
+    and swaps of two neighbouring characters), or None when it is above `limit`.
+
+    Only a band of `limit` cells around the diagonal is computed, and the
+    computation stops as soon as a whole row is above `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+    if len(a) > len(b):
+        a, b = b, a
+    too_far = limit + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [too_far] * (len(b) + 1)
+        current[0] = i
+        row_min = i
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            best = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                before_previous is not None
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+            ):
+                best = min(best, before_previous[j - 2] + 1)
+            current[j] = best
+            row_min = min(row_min, best)
+        if row_min > limit:
+            return None
+        before_previous, previous = previous, current
+    return previous[len(b)] if previous[len(b)] <= limit else None
+
+
+def fuzzy_distance(key: str, query: str, typos: int) -> int | None:
+    """Edit distance of `query` to the whole `key` or to the start of it"""
+    distances = [
+        distance
+        for distance in (
+            bounded_edit_distance(key, query, typos),
+            bounded_edit_distance(key[: len(query)], query, typos),
+        )
+        if distance is not None
+    ]
+    return min(distances) if distances else None
+
+
+def match_score(key: str, query: str, typos: int | None = None):
+    """
+    Scores the normalized name `key` against the normalized `query`.
+
+    Returns a (tier, position) tuple, smaller is better, or None when the
+    name doesn't match at all. Tiers go exact, prefix, start of a token
+    (right after a '-'), anywhere in the name and finally within `typos`
+    edits (defaults to `allowed_typos(query)`), where position is the
+    number of edits.
+    """
+    position = key.find(query)
+    if position == 0:
+        return (EXACT if key == query else PREFIX, 0)
+    if position > 0:
+        token_position = key.find("-" + query)
+        if token_position != -1:
+            return (TOKEN, token_position + 1)
+        return (SUBSTRING, position)
+
+    typos = allowed_typos(query) if typos is None else typos
+    if typos:
+        distance = fuzzy_distance(key, query, typos)
+        if distance is not None:
+            return (FUZZY, distance)
+    return None
+
+
+def rank(items, query: str, limit: int | None = None, name=lambda item: item) -> list:
+    """
+    Returns the items of `items` matching `query`, best match first.
+
+    `name` gives the name of an item. With `limit` only the best `limit` items
+    are kept, through a bounded heap, so the cost doesn't grow with the
+    number of matches. Equal scores are ordered by normalized name.
+    """
+    query = normalize_name(query.strip())
+    typos = allowed_typos(query)
+
+    def scored():
+        for order, item in enumerate(items):
+            key = normalize_name(name(item))
+            score = match_score(key, query, typos)
+            if score is not None:
+                yield score, key, order, item
+
+    if limit is None:
+        ranked = sorted(scored())
+    else:
+        ranked = heapq.nsmallest(limit, scored())
+    return [entry[-1] for entry in ranked]
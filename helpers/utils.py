@@ -1,6 +1,9 @@
+import re
 import sys
 import os
 
+_NORMALIZE_PATTERN = re.compile(r"[-_.]+")
+
 
 def get_app_support_directory(app_name: str = "P4cMan") -> str:
     """Returns the application support directory path for macOS."""
@@ -31,3 +34,8 @@ def resource_path(relative_path: str) -> str:
     except Exception:
         base_path = os.path.abspath(".")
     return os.path.join(base_path, relative_path)
+
+
+def normalize_name(name: str) -> str:
+    """Normalizes a package name as described in PEP 503"""
+    return _NORMALIZE_PATTERN.sub("-", name).lower()
@@ -16,7 +16,6 @@ from components.settings.core import Setting
 from helpers.state_manager import save_state
 from components.analysis.core import Analysis
 from components.installer.core import Installer
-from components.installer.utils import save_file
 from components.widgets.control_bar import ControlBar
 from components.onboarding.view import OnboardingPage
 from components.dependency_tree.core import DependencyTree
@@ -370,10 +369,16 @@ class P4cMan(QMainWindow):
         # Set the saving page widget if the saving taking alot of time (thread Processes)
         self.main_stack.setCurrentWidget(self.saving_page)
 
+        # Search worker must be done with the index before it gets saved
+        self.installer.search_runner.quit()
+        self.installer.details_fetcher.stop()
+        self.installer.preview_runner.quit()
+        self.installer.prefetcher.stop()
+
         # They will always get during every change in env or project folder,
         # it won't be set if user never completed the initial steps so there are no state to be saved
         if not self.state_variables.get("project_folder", "") == "":
             save_state(self.state_variables)
-            save_file(self.installer.all_libraries)
+            self.installer.save_library_list()
 
         super().closeEvent(a0)
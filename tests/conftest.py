@@ -0,0 +1,14 @@
+import os
+import sys
+import pytest
+
+# Tests import the application's packages the way main.py does, from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def qt_app():
+    """The QCoreApplication timers and queued signals need, shared by every test"""
+    from PyQt6.QtCore import QCoreApplication
+
+    return QCoreApplication.instance() or QCoreApplication([])
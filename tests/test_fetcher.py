@@ -0,0 +1,34 @@
+from PyQt6.QtCore import QCoreApplication
+from components.installer.fetcher import DetailsFetcher
+
+
+def make_fetcher(tmp_path, finished):
+    # Never starts, every start fails right away
+    fetcher = DetailsFetcher(str(tmp_path / "missing-pypi-fetcher"))
+    fetcher.request_finished.connect(finished.append)
+    return fetcher
+
+
+def test_empty_request_finishes_after_returning_its_id(qt_app, tmp_path):
+    finished = []
+    fetcher = make_fetcher(tmp_path, finished)
+    request_id = fetcher.request(["", ""])
+    assert finished == []
+    QCoreApplication.processEvents()
+    assert finished == [request_id]
+
+
+def test_pending_requests_finish_once_restarts_are_given_up(qt_app, tmp_path):
+    finished = []
+    fetcher = make_fetcher(tmp_path, finished)
+    fetcher.MAX_RESTARTS = 0
+    request_id = fetcher.request(["numpy", "requests"])
+    assert finished == []
+    QCoreApplication.processEvents()
+    assert finished == [request_id]
+    assert fetcher._pending == {}
+
+    # A later request still gets its answer, and tries to start the process again
+    request_id = fetcher.request(["httpx"])
+    QCoreApplication.processEvents()
+    assert finished[-1] == request_id
@@ -0,0 +1,43 @@
+from PyQt6.QtTest import QAbstractItemModelTester
+from components.library.models import InstalledLibraryModel, LibraryFilterProxyModel
+
+
+def make_proxy():
+    model = InstalledLibraryModel()
+    proxy = LibraryFilterProxyModel()
+    proxy.setSourceModel(model)
+    tester = QAbstractItemModelTester(
+        proxy, QAbstractItemModelTester.FailureReportingMode.Fatal
+    )
+    return model, proxy, tester
+
+
+def names(proxy):
+    return [proxy.index(row, 0).data() for row in range(proxy.rowCount())]
+
+
+def test_rows_are_sorted_by_name(qt_app):
+    model, proxy, _ = make_proxy()
+    model.setLibraries([{"name": "requests"}, {"name": "numpy"}, {"name": "attrs"}])
+    assert names(proxy) == ["attrs", "numpy", "requests"]
+
+
+def test_query_filters_and_ranks(qt_app):
+    model, proxy, _ = make_proxy()
+    model.setLibraries(
+        [{"name": "types-requests"}, {"name": "requests"}, {"name": "numpy"}]
+    )
+    proxy.set_query("requests")
+    assert names(proxy) == ["requests", "types-requests"]
+    proxy.set_query("")
+    assert len(names(proxy)) == 3
+
+
+def test_inserting_and_removing_rows(qt_app):
+    model, proxy, _ = make_proxy()
+    model.setLibraries([{"name": "b"}, {"name": "a"}])
+    model.insertLibraries([{"name": "c"}, {"name": "a"}])
+    model.removeNames(["a"])
+    assert names(proxy) == ["b", "c"]
+    assert model.row_data("c")["status"] == "uninstall"
+    assert model.name_to_row == {"b": 0, "c": 1}
@@ -0,0 +1,89 @@
+import pytest
+from helpers.pip_runner import PhaseTracker, format_size, parse_line
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("Collecting requests", ("collecting", "requests", 0)),
+        (
+            "Collecting charset-normalizer<4,>=2",
+            ("collecting", "charset-normalizer", 0),
+        ),
+        (
+            "Processing ./dist/demo_pkg-1.0-py3-none-any.whl",
+            ("collecting", "demo_pkg", 0),
+        ),
+        (
+            "  Downloading requests-2.32.3-py3-none-any.whl (64 kB)",
+            ("downloading", "requests", 64_000),
+        ),
+        (
+            "Downloading https://files.example/numpy-2.0.0.tar.gz (18.3 MB)",
+            ("downloading", "numpy", 18_300_000),
+        ),
+        (
+            "  Using cached idna-3.7-py3-none-any.whl (66 kB)",
+            ("cached", "idna", 66_000),
+        ),
+        (
+            "Building wheel for pyyaml (pyproject.toml): started",
+            ("building", "pyyaml", 0),
+        ),
+        (
+            "Installing collected packages: idna, requests",
+            ("installing", "idna, requests", 0),
+        ),
+        ("  Uninstalling requests-2.31.0:", ("uninstalling", "requests-2.31.0", 0)),
+        (
+            "Successfully installed idna-3.7 requests-2.32.3",
+            ("done", "idna-3.7 requests-2.32.3", 0),
+        ),
+    ],
+)
+def test_parse_line(line, expected):
+    assert parse_line(line) == expected
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "",
+        "Requirement already satisfied: idna in ./venv/lib/site-packages (3.7)",
+        "   ━━━━━━━━━━━━━━━━━━━━ 64.9/64.9 kB 1.2 MB/s eta 0:00:00",
+        "WARNING: Running pip as the 'root' user",
+    ],
+)
+def test_parse_line_ignores_other_lines(line):
+    assert parse_line(line) is None
+
+
+def test_format_size():
+    assert format_size(512) == "512 bytes"
+    assert format_size(64_000) == "64.0 kB"
+    assert format_size(18_300_000) == "18.3 MB"
+    assert format_size(2_000_000_000) == "2.0 GB"
+
+
+def test_phase_tracker_closes_each_phase_as_the_next_starts():
+    tracker = PhaseTracker()
+    events = tracker.feed("Collecting idna")
+    assert [(e.phase, e.package, e.finished) for e in events] == [
+        ("collecting", "idna", False)
+    ]
+    events = tracker.feed("  Downloading idna-3.7-py3-none-any.whl (66 kB)")
+    assert [(e.phase, e.finished) for e in events] == [
+        ("collecting", True),
+        ("downloading", False),
+    ]
+    assert tracker.feed("some progress bar") == []
+    events = tracker.feed("Successfully installed idna-3.7")
+    assert [(e.phase, e.finished) for e in events] == [
+        ("downloading", True),
+        ("done", False),
+    ]
+    # done never stays running, so closing has nothing left to finish
+    assert tracker.close() == []
+    assert [e.phase for e in tracker.phases] == ["collecting", "downloading"]
+    assert tracker.phases[1].size == 66_000
+    assert all(e.duration >= 0 for e in tracker.phases)
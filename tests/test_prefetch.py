@@ -0,0 +1,63 @@
+import time
+import pytest
+from components.installer.prefetch import HOVERED, SELECTED, WheelPrefetcher
+
+
+@pytest.fixture
+def prefetcher(qt_app, tmp_path):
+    prefetcher = WheelPrefetcher(
+        concurrency=2, bytes_per_minute=1000, max_bytes=5000, wheelhouse=str(tmp_path)
+    )
+    prefetcher.started = []
+    prefetcher.probed = []
+    # Downloads and probes are recorded instead of running pip
+    prefetcher._start = lambda python_exec, name, size: prefetcher.started.append(
+        (name, size)
+    )
+    prefetcher._probe = lambda priority, python_exec, name: prefetcher.probed.append(
+        name
+    )
+    yield prefetcher
+    prefetcher.retry_timer.stop()
+
+
+def admit(prefetcher, name, size, priority=HOVERED):
+    prefetcher._sized.append((priority, len(prefetcher._sized), "python", name, size))
+    prefetcher._dispatch()
+
+
+def test_packages_are_probed_before_downloading(prefetcher):
+    prefetcher.prefetch("python", "numpy", SELECTED)
+    prefetcher.prefetch("python", "NumPy", SELECTED)
+    assert prefetcher.probed == ["numpy"]
+    assert prefetcher.started == []
+
+
+def test_downloads_within_the_budget_start(prefetcher):
+    admit(prefetcher, "small", 400)
+    assert prefetcher.started == [("small", 400)]
+
+
+def test_running_downloads_count_against_the_budget(prefetcher):
+    prefetcher._running[object()] = ("python", "running", 800)
+    admit(prefetcher, "small", 400)
+    assert prefetcher.started == []
+    # Waits for the running download instead of a timer
+    assert not prefetcher.retry_timer.isActive()
+
+
+def test_recent_downloads_delay_the_next_one(prefetcher):
+    prefetcher._downloaded.append((time.monotonic(), 900))
+    admit(prefetcher, "small", 400)
+    assert prefetcher.started == []
+    assert prefetcher.retry_timer.isActive()
+
+    prefetcher._downloaded = [(time.monotonic() - 61, 900)]
+    prefetcher._dispatch()
+    assert prefetcher.started == [("small", 400)]
+
+
+def test_budget_wait(prefetcher):
+    assert prefetcher._budget_wait(1000) == 0
+    prefetcher._running[object()] = ("python", "running", 1)
+    assert prefetcher._budget_wait(1000) is None
@@ -0,0 +1,111 @@
+import pytest
+from components.installer.search import SearchIndex
+from components.installer.threads import SearchWorker
+from helpers.ranking import FUZZY, PREFIX, SUBSTRING, TOKEN, EXACT, match_score, rank
+
+NAMES = [
+    "django",
+    "django-rest-framework",
+    "djangorestframework",
+    "numpy",
+    "numpydoc",
+    "pandas",
+    "geopandas",
+    "matplotlib",
+    "tensorflow",
+    "tensorflow-gpu",
+    "sqlalchemy",
+    "flask",
+    "flask-sqlalchemy",
+    "requests",
+    "py",
+    "aaaaab",
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex(NAMES)
+
+
+def all_matches(index, query):
+    return index.cursor(query).next_page(len(NAMES) + 1)
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("nunpy", "numpy"),  # 5 characters, one typo
+        ("flaks", "flask"),
+        ("djnago", "django"),  # 6 characters, one typo
+        ("pandsa", "pandas"),
+        ("matplotlb", "matplotlib"),  # 9 characters, two typos allowed
+        ("tensorflwo", "tensorflow"),  # 10 characters, two typos allowed
+        ("sqlalchemt", "sqlalchemy"),
+    ],
+)
+def test_typos_are_found_for_every_query_length(index, query, expected):
+    assert all_matches(index, query)[0] == expected
+
+
+@pytest.mark.parametrize(
+    "query", ["nunpy", "djnago", "pandsa", "matplotlb", "tensorflwo", "flsk", "aaaaa"]
+)
+def test_index_agrees_with_rank(index, query):
+    assert sorted(all_matches(index, query)) == sorted(rank(NAMES, query))
+
+
+def test_prefixes_come_before_other_matches(index):
+    matches = all_matches(index, "django")
+    assert matches[0] == "django"
+    assert set(matches) == {"django", "django-rest-framework", "djangorestframework"}
+    assert all_matches(index, "pandas") == ["pandas", "geopandas"]
+
+
+def test_short_queries_have_to_be_exact(index):
+    assert all_matches(index, "flsk") == []
+    assert "py" in all_matches(index, "py")
+
+
+def test_removed_names_are_skipped():
+    index = SearchIndex(NAMES)
+    index.remove("numpy")
+    assert "numpy" not in all_matches(index, "numpy")
+    assert "numpy" not in all_matches(index, "nunpy")
+    assert len(index) == len(NAMES) - 1
+
+
+def test_worker_carries_removed_names_to_a_new_index():
+    worker = SearchWorker()
+    worker.set_index(SearchIndex(NAMES))
+    worker.remove("numpy")
+    # The synced index lists the names in another order, ids differ
+    synced = SearchIndex(list(reversed(NAMES)) + ["numpy-financial"])
+    worker.set_index(synced)
+    assert synced.removed_ids == {len(NAMES) - 1 - NAMES.index("numpy")}
+    assert "numpy" not in all_matches(synced, "numpy")
+    assert "numpy-financial" in all_matches(synced, "numpy")
+
+
+def test_pages_cover_every_match_once(index):
+    cursor = index.cursor("a")
+    pages = []
+    while not cursor.exhausted:
+        pages.extend(cursor.next_page(3))
+    assert sorted(pages) == sorted(name for name in NAMES if "a" in name)
+
+
+def test_match_score_tiers():
+    assert match_score("numpy", "numpy") == (EXACT, 0)
+    assert match_score("numpydoc", "numpy") == (PREFIX, 0)
+    assert match_score("flask-sqlalchemy", "sqlalchemy") == (TOKEN, 6)
+    assert match_score("geopandas", "pandas") == (SUBSTRING, 3)
+    assert match_score("numpy", "nunpy") == (FUZZY, 1)
+    assert match_score("requests", "nunpy") is None
+
+
+def test_rank_orders_by_tier_and_keeps_the_best():
+    assert rank(NAMES, "sqlalchemy") == ["sqlalchemy", "flask-sqlalchemy"]
+    assert rank(NAMES, "django", limit=1) == ["django"]
+    items = [{"name": "numpydoc"}, {"name": "NumPy"}]
+    assert rank(items, "numpy", name=lambda item: item["name"])[0] == {"name": "NumPy"}
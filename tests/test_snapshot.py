@@ -0,0 +1,72 @@
+import os
+from components.library.snapshot import (
+    diff_snapshots,
+    file_owners,
+    load_distribution,
+    take_snapshot,
+)
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(b"x" * size)
+
+
+def make_distribution(site_dir, name, files):
+    """A dist-info for `name` whose RECORD lists `files`, (path, size or None)"""
+    dist_info = os.path.join(site_dir, f"{name}-1.0.dist-info")
+    os.makedirs(dist_info)
+    with open(os.path.join(dist_info, "METADATA"), "w") as file:
+        file.write(f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n\n")
+    with open(os.path.join(dist_info, "RECORD"), "w") as file:
+        for path, size in files:
+            file.write(f"{path},,{'' if size is None else size}\n")
+    return dist_info
+
+
+def test_size_uses_the_record_and_stats_the_rest(tmp_path):
+    site_dir = str(tmp_path)
+    write(os.path.join(site_dir, "pkg", "__init__.py"), 100)
+    write(os.path.join(site_dir, "pkg", "__pycache__", "__init__.pyc"), 40)
+    dist_info = make_distribution(
+        site_dir,
+        "pkg",
+        [
+            ("pkg/__init__.py", 100),
+            ("pkg/__pycache__/__init__.pyc", None),
+            ("../../../bin/pkg", 5000),  # Outside of site-packages, not counted
+            ("pkg/missing.py", None),
+        ],
+    )
+    library = load_distribution(dist_info)
+    assert library["metadata"]["name"] == "pkg"
+    assert library["metadata"]["size"] == 140
+
+
+def test_shared_files_are_counted_for_the_first_distribution(tmp_path):
+    site_dir = str(tmp_path)
+    write(os.path.join(site_dir, "ns", "__init__.py"), 1000)
+    first = make_distribution(site_dir, "ns_a", [("ns/__init__.py", 1000)])
+    second = make_distribution(
+        site_dir, "ns_b", [("ns/__init__.py", 1000), ("ns/b.py", 10)]
+    )
+    owners = file_owners(site_dir)
+    assert owners[os.path.join(site_dir, "ns", "__init__.py")] == first
+    assert load_distribution(first, owners)["metadata"]["size"] == 1000
+    assert load_distribution(second, owners)["metadata"]["size"] == 10
+    # Read on its own, the owners come out the same
+    assert load_distribution(second)["metadata"]["size"] == 10
+
+
+def test_snapshots_tell_what_changed(tmp_path):
+    site_dir = str(tmp_path)
+    kept = make_distribution(site_dir, "kept", [])
+    gone = make_distribution(site_dir, "gone", [])
+    before = take_snapshot([site_dir])
+    os.remove(os.path.join(gone, "METADATA"))
+    added = make_distribution(site_dir, "added", [])
+    changed, removed = diff_snapshots(before, take_snapshot([site_dir]))
+    assert changed == [added]
+    assert removed == [gone]
+    assert kept in before
@@ -0,0 +1,151 @@
+import os
+import pytest
+from components.installer import utils
+from components.installer.store import NameStore, pending_path, write_name_store
+from components.installer.sync import SIMPLE_JSON, IndexSync
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, names=(), etag="", serial=0):
+        self.status_code = status_code
+        self.headers = {
+            "Content-Type": SIMPLE_JSON,
+            "ETag": etag,
+            "X-PyPI-Last-Serial": str(serial),
+        }
+        self._names = names
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"projects": [{"name": name} for name in self._names]}
+
+
+class FakeSession:
+    """Answers every request with the next queued response, keeping the headers sent"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.sent_headers.append(headers or {})
+        return self.responses.pop(0)
+
+
+def make_sync(tmp_path, *responses) -> IndexSync:
+    sync = IndexSync(str(tmp_path / "names.bin"), "https://example.invalid/simple/")
+    sync.session = FakeSession(*responses)
+    return sync
+
+
+def test_first_sync_writes_the_store(tmp_path):
+    sync = make_sync(
+        tmp_path, FakeResponse(names=["Django", "numpy"], etag="a", serial=1)
+    )
+    store = sync.sync(None)
+    assert list(store) == ["Django", "numpy"]
+    assert sync.load_state() == {"etag": "a", "last_serial": 1}
+
+
+def test_not_modified_returns_the_same_store(tmp_path):
+    sync = make_sync(
+        tmp_path,
+        FakeResponse(names=["numpy"], etag="a", serial=1),
+        FakeResponse(status_code=304),
+    )
+    store = sync.sync(None)
+    assert sync.sync(store) is store
+    assert sync.session.sent_headers[-1]["If-None-Match"] == "a"
+
+
+def test_delta_goes_into_a_new_store(tmp_path):
+    sync = make_sync(
+        tmp_path,
+        FakeResponse(names=["Django", "numpy", "requests"], etag="a", serial=1),
+        FakeResponse(names=["numpy", "requests", "httpx"], etag="b", serial=2),
+    )
+    store = sync.sync(None)
+    synced = sync.sync(store)
+    assert synced is not store
+    assert list(synced) == ["numpy", "requests", "httpx"]
+    # The store in use is left readable while the synced one replaces it
+    assert list(store) == ["Django", "numpy", "requests"]
+    assert sync.load_state() == {"etag": "b", "last_serial": 2}
+
+
+def test_delta_is_kept_pending_while_the_store_is_mapped(tmp_path, monkeypatch):
+    sync = make_sync(
+        tmp_path,
+        FakeResponse(names=["numpy"], etag="a", serial=1),
+        FakeResponse(names=["numpy", "httpx"], etag="b", serial=2),
+    )
+    store = sync.sync(None)
+    replace = os.replace
+
+    def refuse_mapped(source, destination):
+        if destination == sync.file_path:
+            raise PermissionError(destination)
+        replace(source, destination)
+
+    monkeypatch.setattr(os, "replace", refuse_mapped)
+    synced = sync.sync(store)
+    assert synced.file_path == pending_path(sync.file_path)
+    assert list(synced) == ["numpy", "httpx"]
+
+
+def test_local_store_opens_without_the_network(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "get_app_support_directory", lambda _: str(tmp_path))
+    assert utils.load_local_store("P4cMan", "names.bin") is None
+
+    write_name_store(str(tmp_path / "names.bin"), ["numpy"])
+    write_name_store(pending_path(str(tmp_path / "names.bin")), ["numpy", "httpx"])
+    store = utils.load_local_store("P4cMan", "names.bin")
+    # A store synced on the last launch is moved in place first
+    assert list(store) == ["numpy", "httpx"]
+    assert not os.path.exists(pending_path(str(tmp_path / "names.bin")))
+
+
+def test_sync_failure_keeps_the_local_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "get_app_support_directory", lambda _: str(tmp_path))
+    write_name_store(str(tmp_path / "names.bin"), ["numpy"])
+    store = NameStore(str(tmp_path / "names.bin"))
+
+    def unreachable(self, store):
+        raise utils.requests.ConnectionError("offline")
+
+    monkeypatch.setattr(IndexSync, "sync", unreachable)
+    assert utils.sync_store(store, "P4cMan", "names.bin") is store
+
+
+
+def test_concurrent_writers_never_share_temporary_files(tmp_path):
+    file_path = str(tmp_path / "names.bin")
+    temp_paths = []
+
+    def names_interrupted_by_another_writer():
+        yield "numpy"
+        # A second writer, the sync thread say, runs while the first one writes
+        temp_paths.append(write_name_store(file_path, ["httpx"], replace=False))
+        yield "requests"
+
+    temp_paths.append(
+        write_name_store(file_path, names_interrupted_by_another_writer(), False)
+    )
+    assert temp_paths[0] != temp_paths[1]
+    assert list(NameStore(temp_paths[0])) == ["httpx"]
+    assert list(NameStore(temp_paths[1])) == ["numpy", "requests"]
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        os.path.basename(path) for path in temp_paths
+    )
+
+
+def test_failed_write_leaves_no_temporary_files(tmp_path):
+    def failing_names():
+        yield "numpy"
+        raise OSError("disk full")
+
+    with pytest.raises(OSError):
+        write_name_store(str(tmp_path / "names.bin"), failing_names())
+    assert os.listdir(tmp_path) == []